@@ -202,26 +202,8 @@ async def _run_pipeline(job_id: str):
 
 def _extract_frames(video_path: Path, output_dir: Path, every_n: int = 5):
     """Extract frames from video."""
-    import cv2
-
-    cap = cv2.VideoCapture(str(video_path))
-    if not cap.isOpened():
-        raise RuntimeError(f"Could not open video: {video_path}")
-
-    count = 0
-    saved = 0
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        if count % every_n == 0:
-            frame_path = output_dir / f"frame_{saved:06d}.png"
-            cv2.imwrite(str(frame_path), frame)
-            saved += 1
-        count += 1
-
-    cap.release()
-    return saved
+    from pipeline import extract_frames
+    return extract_frames(video_path, output_dir, every_n_frames=every_n)
 
 
 def _preprocess(input_dir: Path, output_dir: Path):
@@ -260,12 +242,15 @@ def _segment(input_dir: Path, output_dir: Path):
 
 def _write_colmap_missing(frames_dir: Path, output_dir: Path) -> Path:
     """Create a structured placeholder when COLMAP is unavailable."""
-    frames = sorted(frames_dir.glob("*.png"))
+    from frame_analysis import analyze_frames
+    frame_set = analyze_frames(frames_dir)
     payload = {
         "status": "missing_dependency",
         "missing": "colmap",
         "frames_ready": str(frames_dir),
-        "total_frames": len(frames),
+        "total_frames": frame_set["frame_count"],
+        "resolution": frame_set["resolution"],
+        "detail_level": frame_set["detail_level"],
         "timestamp": datetime.utcnow().isoformat() + "Z",
         "instructions": "Install COLMAP (https://colmap.github.io/install.html) and re-run the pipeline.",
     }
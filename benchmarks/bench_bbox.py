@@ -0,0 +1,71 @@
+"""
+Benchmark: content bounding box via np.where vs thresholded boundingRect.
+
+Reports time and peak Python-heap allocation (tracemalloc) per frame for a
+frame with a large foreground object, the worst case for np.where.
+
+Usage:
+    python benchmarks/bench_bbox.py [--width 3840] [--height 2160] [--coverage 0.7]
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from preprocess import content_bbox
+
+
+def bbox_where(image: np.ndarray, threshold: int = 3):
+    """The original auto_crop_frames scan."""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    coords = np.where(gray > threshold)
+    if len(coords[0]) == 0:
+        return None
+    return (int(coords[1].min()), int(coords[0].min()),
+            int(coords[1].max()), int(coords[0].max()))
+
+
+def measure(fn, image, repeats: int):
+    fn(image)  # warm up
+    tracemalloc.start()
+    result = fn(image)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(image)
+    return result, (time.perf_counter() - start) / repeats, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark content bounding-box scan")
+    parser.add_argument("--width", type=int, default=3840)
+    parser.add_argument("--height", type=int, default=2160)
+    parser.add_argument("--coverage", type=float, default=0.7, help="Fraction of each axis covered by the object")
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    image = np.zeros((args.height, args.width, 3), dtype=np.uint8)
+    h0 = int(args.height * (1 - args.coverage) / 2)
+    w0 = int(args.width * (1 - args.coverage) / 2)
+    image[h0:args.height - h0, w0:args.width - w0] = np.random.default_rng(0).integers(
+        20, 255, (args.height - 2 * h0, args.width - 2 * w0, 3), dtype=np.uint8)
+    print(f"Frame {args.width}x{args.height}, object covers {args.coverage:.0%} of each axis")
+
+    expected = None
+    for name, fn in (("np.where", bbox_where), ("boundingRect", content_bbox)):
+        result, seconds, peak = measure(fn, image, args.repeats)
+        expected = expected or result
+        assert result == expected, (name, result, expected)
+        print(f"  {name:12s}: {seconds * 1000:7.1f} ms/frame, peak {peak / 1024**2:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark: COLMAP binary parsing, per-element struct reader vs bulk numpy reader.
+
+Writes a synthetic sparse model (--images images with --keypoints 2D points
+each, --points 3D points with --track-length average track) and times the
+legacy train_gsplat parser against colmap_io.
+
+Usage:
+    python benchmarks/bench_colmap_io.py [--images 2000] [--points 200000]
+"""
+
+import argparse
+import struct
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from colmap_io import (
+    TRACK_ELEM,
+    read_images_binary,
+    read_points3D_binary,
+    write_images_binary,
+    write_points3D_binary,
+)
+
+
+# Parsers as they were in train_gsplat.py before colmap_io
+def legacy_read_images_binary(path: str) -> dict:
+    images = {}
+    with open(path, "rb") as f:
+        num_images = struct.unpack("<Q", f.read(8))[0]
+        for _ in range(num_images):
+            img_id = struct.unpack("<I", f.read(4))[0]
+            qvec = np.array(struct.unpack("<4d", f.read(32)))
+            tvec = np.array(struct.unpack("<3d", f.read(24)))
+            cam_id = struct.unpack("<I", f.read(4))[0]
+            name = b""
+            while True:
+                c = f.read(1)
+                if c == b"\x00":
+                    break
+                name += c
+            num_points2D = struct.unpack("<Q", f.read(8))[0]
+            f.read(num_points2D * 24)
+            images[img_id] = {"qvec": qvec, "tvec": tvec, "camera_id": cam_id, "name": name.decode("utf-8")}
+    return images
+
+
+def legacy_read_points3D_binary(path: str):
+    points = []
+    colors = []
+    with open(path, "rb") as f:
+        num_points = struct.unpack("<Q", f.read(8))[0]
+        for _ in range(num_points):
+            _point3D_id = struct.unpack("<Q", f.read(8))[0]
+            xyz = np.array(struct.unpack("<3d", f.read(24)))
+            rgb = np.array(struct.unpack("<3B", f.read(3)))
+            _error = struct.unpack("<d", f.read(8))[0]
+            track_length = struct.unpack("<Q", f.read(8))[0]
+            f.read(track_length * 8)
+            points.append(xyz)
+            colors.append(rgb)
+    return np.array(points, dtype=np.float32), np.array(colors, dtype=np.uint8)
+
+
+def write_model(out_dir: Path, n_images: int, n_keypoints: int, n_points: int, track_length: int) -> None:
+    rng = np.random.default_rng(0)
+    images = {}
+    for i in range(1, n_images + 1):
+        images[i] = {
+            "qvec": np.array([1.0, 0.0, 0.0, 0.0]),
+            "tvec": rng.normal(size=3),
+            "camera_id": 1,
+            "name": f"frame_{i:06d}.png",
+            "xys": rng.uniform(0, 1920, (n_keypoints, 2)),
+            "point3D_ids": rng.integers(-1, n_points, n_keypoints),
+        }
+    write_images_binary(images, str(out_dir / "images.bin"))
+
+    lengths = rng.poisson(track_length, n_points)
+    track = np.zeros(int(lengths.sum()), dtype=TRACK_ELEM)
+    track["image_id"] = rng.integers(1, n_images + 1, len(track))
+    track["point2D_idx"] = rng.integers(0, n_keypoints, len(track))
+    write_points3D_binary(
+        {
+            "ids": np.arange(1, n_points + 1),
+            "xyz": rng.normal(size=(n_points, 3)),
+            "rgb": rng.integers(0, 256, (n_points, 3), dtype=np.uint8),
+            "error": rng.uniform(0, 2, n_points),
+            "track_lengths": lengths,
+            "track": track,
+        },
+        str(out_dir / "points3D.bin"),
+    )
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark COLMAP binary readers")
+    parser.add_argument("--images", type=int, default=2000)
+    parser.add_argument("--keypoints", type=int, default=2000)
+    parser.add_argument("--points", type=int, default=200000)
+    parser.add_argument("--track-length", type=int, default=6)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = Path(tmp)
+        write_model(out_dir, args.images, args.keypoints, args.points, args.track_length)
+        images_bin = str(out_dir / "images.bin")
+        points_bin = str(out_dir / "points3D.bin")
+
+        legacy_images, t_legacy_images = timed(legacy_read_images_binary, images_bin)
+        new_images, t_new_images = timed(read_images_binary, images_bin)
+        assert [v["name"] for v in legacy_images.values()] == [v["name"] for v in new_images.values()]
+
+        (legacy_xyz, legacy_rgb), t_legacy_points = timed(legacy_read_points3D_binary, points_bin)
+        (new_xyz, new_rgb), t_new_points = timed(read_points3D_binary, points_bin)
+        assert np.array_equal(legacy_xyz, new_xyz) and np.array_equal(legacy_rgb, new_rgb)
+
+    print(f"images.bin   ({args.images} images): legacy {t_legacy_images:.3f}s, "
+          f"colmap_io {t_new_images:.3f}s ({t_legacy_images / t_new_images:.1f}x)")
+    print(f"points3D.bin ({args.points} points): legacy {t_legacy_points:.3f}s, "
+          f"colmap_io {t_new_points:.3f}s ({t_legacy_points / t_new_points:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
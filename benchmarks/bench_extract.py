@@ -0,0 +1,66 @@
+"""
+Benchmark: sparse frame extraction engines vs decoding every frame.
+
+Writes a synthetic video, then times iter_video_frames() with each engine at
+a fixed keep interval (60 fps source -> 2 fps kept = every 30th frame).
+
+Usage:
+    python benchmarks/bench_extract.py [--frames 600] [--width 1280] [--height 720] [--every 30]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pipeline import EXTRACT_ENGINES, iter_video_frames
+
+
+def write_synthetic_video(path: Path, frames: int, width: int, height: int, fps: int = 60) -> Path:
+    """Rotating textured object on black, encoded with mp4v (keyframe every ~12 frames)."""
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError("Could not open a video encoder (mp4v)")
+    rng = np.random.default_rng(0)
+    texture = rng.integers(0, 255, (height // 2, width // 2, 3), dtype=np.uint8)
+    center = (width // 2, height // 2)
+    for i in range(frames):
+        rot = cv2.getRotationMatrix2D((width // 4, height // 4), i * 360 / frames, 1.0)
+        obj = cv2.warpAffine(texture, rot, (width // 2, height // 2))
+        frame = np.zeros((height, width, 3), dtype=np.uint8)
+        frame[center[1] - height // 4:center[1] + height // 4, center[0] - width // 4:center[0] + width // 4] = obj
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark frame extraction engines")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--every", type=int, default=30, help="Keep every Nth frame (default: 30)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        video = write_synthetic_video(Path(tmp) / "synthetic.mp4", args.frames, args.width, args.height)
+        print(f"Synthetic video: {args.frames} frames @ {args.width}x{args.height}, keeping every {args.every}")
+
+        baseline = None
+        for engine in ("read",) + tuple(e for e in EXTRACT_ENGINES if e != "read"):
+            start = time.perf_counter()
+            kept = sum(1 for _ in iter_video_frames(video, args.every, engine=engine, seek_min_gap=args.every))
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"  {engine:5s}: {kept:4d} frames kept in {elapsed:6.2f}s "
+                  f"({args.frames / elapsed:7.1f} source fps, {baseline / elapsed:4.1f}x vs read)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark: cold image-cache build with 1..N decode threads (CPU only).
+
+Writes --images synthetic JPEG frames at --width x --height, then builds an
+ImageStore at --factor downsampling from a fresh cache dir for each worker
+count, reporting wall time and per-image latency percentiles. A final warm
+open shows the cache-hit startup cost.
+
+Usage:
+    python benchmarks/bench_image_load.py [--images 200] [--factor 2] [--workers 1 2 4 8]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from image_store import ImageStore
+
+
+def write_frames(out_dir: Path, n: int, width: int, height: int) -> list:
+    rng = np.random.default_rng(0)
+    base = cv2.resize(rng.integers(0, 256, (height // 8, width // 8, 3), dtype=np.uint8), (width, height))
+    paths = []
+    for i in range(n):
+        frame = np.roll(base, i * 7, axis=1)
+        path = out_dir / f"frame_{i:06d}.jpg"
+        cv2.imwrite(str(path), frame, [cv2.IMWRITE_JPEG_QUALITY, 95])
+        paths.append(str(path))
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parallel image decode for the training cache")
+    parser.add_argument("--images", type=int, default=200)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--factor", type=int, default=2)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        (tmp / "images").mkdir()
+        paths = write_frames(tmp / "images", args.images, args.width, args.height)
+        sizes = [(args.height // args.factor, args.width // args.factor)] * len(paths)
+
+        baseline = None
+        for workers in sorted(set(args.workers)):
+            start = time.perf_counter()
+            store = ImageStore(paths, sizes, str(tmp / f"cache_{workers}"), verbose=False, workers=workers)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            pct = store.latency_percentiles()
+            print(
+                f"workers={workers:2d}: {elapsed:6.2f}s ({baseline / elapsed:4.1f}x) | "
+                f"p50 {pct['p50']:6.1f}ms  p90 {pct['p90']:6.1f}ms  p99 {pct['p99']:6.1f}ms"
+            )
+
+        start = time.perf_counter()
+        warm = ImageStore(paths, sizes, str(tmp / f"cache_{max(args.workers)}"), verbose=False)
+        assert warm.cache_hit
+        print(f"warm open: {(time.perf_counter() - start) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
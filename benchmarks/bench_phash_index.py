@@ -0,0 +1,80 @@
+"""
+Benchmark: global near-duplicate lookup, multi-index hash table vs linear scan.
+
+Simulates a multi-lap turntable capture: `--views` distinct 64-bit hashes,
+each revisited on later laps with a few bits of noise. Every frame is
+checked against all kept frames and kept if nothing is within --radius.
+
+Usage:
+    python benchmarks/bench_phash_index.py [--frames 10000] [--views 2500] [--radius 6]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from preprocess import HammingIndex, hamming_distance, perceptual_hash
+
+
+def synthetic_hashes(frames: int, views: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    base = [int(v) for v in rng.integers(0, 2**63, views, dtype=np.uint64)]
+    hashes = []
+    for i in range(frames):
+        value = base[i % views]
+        for bit in rng.choice(64, size=rng.integers(0, 4), replace=False):
+            value ^= 1 << int(bit)
+        hashes.append(value)
+    return hashes
+
+
+def dedup_linear(hashes: list, radius: int) -> int:
+    kept = []
+    for h in hashes:
+        if not any(hamming_distance(h, k) <= radius for k in kept):
+            kept.append(h)
+    return len(kept)
+
+
+def dedup_index(hashes: list, radius: int) -> int:
+    index = HammingIndex(radius)
+    for h in hashes:
+        if index.find_within(h, radius) is None:
+            index.add(h)
+    return len(index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark perceptual-hash duplicate index")
+    parser.add_argument("--frames", type=int, default=10000)
+    parser.add_argument("--views", type=int, default=2500, help="Distinct views per lap (default: 2500)")
+    parser.add_argument("--radius", type=int, default=6)
+    args = parser.parse_args()
+
+    hashes = synthetic_hashes(args.frames, args.views)
+    print(f"{args.frames} frames, {args.views} distinct views, radius {args.radius}")
+
+    start = time.perf_counter()
+    kept_index = dedup_index(hashes, args.radius)
+    t_index = time.perf_counter() - start
+    print(f"  Hash index:  kept {kept_index:6d} in {t_index:7.3f}s")
+
+    start = time.perf_counter()
+    kept_linear = dedup_linear(hashes, args.radius)
+    t_linear = time.perf_counter() - start
+    print(f"  Linear scan: kept {kept_linear:6d} in {t_linear:7.3f}s ({t_linear / t_index:.1f}x slower)")
+
+    frame = np.random.default_rng(1).integers(0, 255, (2160, 3840, 3), dtype=np.uint8)
+    start = time.perf_counter()
+    for _ in range(20):
+        perceptual_hash(frame)
+    print(f"  pHash of a 4K frame: {(time.perf_counter() - start) / 20 * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark: initial-point subsampling, voxel grid and farthest-point vs random choice.
+
+Builds a synthetic sparse cloud (a dense blob plus thin wires, the case where
+random choice starves thin features) and reports CPU time and how much of the
+budget lands on the wires for each method.
+
+Usage:
+    python benchmarks/bench_point_sampling.py [--points 1000000] [--max-points 5000]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from point_sampling import SUBSAMPLE_METHODS, subsample_points
+
+
+def synthetic_cloud(n_points: int, wire_fraction: float = 0.002, seed: int = 0):
+    """Dense Gaussian blob plus three axis-aligned wires. Returns (points, is_wire)."""
+    rng = np.random.default_rng(seed)
+    n_wire = max(3, int(n_points * wire_fraction)) // 3 * 3
+    blob = rng.normal(0, 0.05, (n_points - n_wire, 3))
+    wires = np.zeros((n_wire, 3))
+    for axis in range(3):
+        part = slice(axis * n_wire // 3, (axis + 1) * n_wire // 3)
+        wires[part, axis] = rng.uniform(0.2, 1.0, n_wire // 3)
+    points = np.concatenate([blob, wires])
+    return points, np.r_[np.zeros(len(blob), bool), np.ones(n_wire, bool)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark initial-point subsampling")
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--max-points", type=int, default=5000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    points, is_wire = synthetic_cloud(args.points)
+    print(f"{len(points)} points ({is_wire.sum()} on thin wires), budget {args.max_points}")
+
+    timings = {}
+    for method in SUBSAMPLE_METHODS:
+        repeats = 1 if method == "fps" else args.repeats
+        subsample_points(points, args.max_points, method)  # warm up
+        start = time.perf_counter()
+        for _ in range(repeats):
+            idx = subsample_points(points, args.max_points, method)
+        timings[method] = (time.perf_counter() - start) / repeats
+        print(f"  {method:7s} {timings[method] * 1000:8.1f} ms | kept {len(idx)} | on wires {is_wire[idx].sum():5d}")
+
+    for method in ("voxel", "fps"):
+        print(f"  {method} / random: {timings[method] / timings['random']:.1f}x the time")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark: SSIM, original per-call-window 2D implementation vs losses.ssim.
+
+Times forward + backward on random (H, W, 3) images on the CPU (or --device)
+and checks the results agree.
+
+Usage:
+    python benchmarks/bench_ssim.py [--width 1280] [--height 720] [--tile-rows 128]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import torch
+import torch.nn.functional as F
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from losses import ssim
+
+
+# As it was in train_gsplat.py before losses.py
+def legacy_ssim(img1, img2, window_size: int = 11):
+    x = img1.permute(2, 0, 1).unsqueeze(0)
+    y = img2.permute(2, 0, 1).unsqueeze(0)
+    C = x.shape[1]
+
+    sigma = 1.5
+    coords = torch.arange(window_size, dtype=x.dtype, device=x.device) - window_size // 2
+    g = torch.exp(-(coords**2) / (2 * sigma**2))
+    g = g / g.sum()
+    window = g.unsqueeze(1) * g.unsqueeze(0)
+    window = window.unsqueeze(0).unsqueeze(0).expand(C, 1, -1, -1)
+
+    pad = window_size // 2
+    mu_x = F.conv2d(x, window, padding=pad, groups=C)
+    mu_y = F.conv2d(y, window, padding=pad, groups=C)
+
+    mu_x2 = mu_x * mu_x
+    mu_y2 = mu_y * mu_y
+    mu_xy = mu_x * mu_y
+
+    sigma_x2 = F.conv2d(x * x, window, padding=pad, groups=C) - mu_x2
+    sigma_y2 = F.conv2d(y * y, window, padding=pad, groups=C) - mu_y2
+    sigma_xy = F.conv2d(x * y, window, padding=pad, groups=C) - mu_xy
+
+    C1 = 0.01**2
+    C2 = 0.03**2
+
+    ssim_map = ((2 * mu_xy + C1) * (2 * sigma_xy + C2)) / ((mu_x2 + mu_y2 + C1) * (sigma_x2 + sigma_y2 + C2))
+    return ssim_map.mean()
+
+
+def measure(fn, rendered, target, repeats: int):
+    """Mean seconds per forward + backward, and the SSIM value."""
+    value = fn(rendered, target)
+    value.backward()  # warm up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        rendered.grad = None
+        fn(rendered, target).backward()
+    return (time.perf_counter() - start) / repeats, value.item()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SSIM implementations")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--tile-rows", type=int, default=128)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--device", type=str, default="cpu")
+    args = parser.parse_args()
+
+    gen = torch.Generator().manual_seed(0)
+    target = torch.rand(args.height, args.width, 3, generator=gen).to(args.device)
+    noise = 0.1 * torch.randn(args.height, args.width, 3, generator=gen).to(args.device)
+    rendered = (target + noise).clamp(0, 1).requires_grad_(True)
+    print(f"{args.width}x{args.height} on {args.device}, forward + backward")
+
+    variants = [
+        ("legacy 2D", legacy_ssim),
+        ("separable", ssim),
+        (f"tiled {args.tile_rows} rows", lambda a, b: ssim(a, b, tile_rows=args.tile_rows)),
+        ("downscale 2", lambda a, b: ssim(a, b, downscale=2)),
+    ]
+    baseline = None
+    for name, fn in variants:
+        seconds, value = measure(fn, rendered, target, args.repeats)
+        baseline = baseline or (seconds, value)
+        print(f"  {name:18s} {seconds * 1000:8.1f} ms | SSIM {value:.6f} "
+              f"(diff {abs(value - baseline[1]):.1e}) | {baseline[0] / seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
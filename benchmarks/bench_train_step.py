@@ -0,0 +1,140 @@
+"""
+Benchmark: training steps per second, original loop vs train_engine.
+
+The original loop (five Adam optimizers, zero_grad/step each, and
+torch.cuda.empty_cache() after every backward) is compared with
+train_engine.train_step (one fused/foreach Adam, set_to_none, no flush).
+Rendering goes through a stub rasterizer, so the harness runs on the CPU
+without gsplat and the numbers isolate per-step overhead; pass --device cuda
+to measure on a GPU. On the CPU torch.cuda.empty_cache() is a no-op, so only
+the optimizer change is measured there. Trials are interleaved (alternating
+which loop runs first) and medians reported, since single CPU runs are noisy.
+
+Usage:
+    python benchmarks/bench_train_step.py [--gaussians 5000 50000] [--steps 200] [--trials 7] [--device cpu]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import torch
+import torch.nn.functional as F
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from train_engine import MemoryPolicy, make_optimizer, make_scheduler, render, train_step
+
+
+def stub_rasterize(means, quats, scales, opacities, colors, viewmats, Ks, width, height, **kwargs):
+    """
+    Cheap differentiable stand-in for gsplat.rasterization: projects each
+    Gaussian's center and adds its weighted color to that pixel.
+    """
+    cam = means @ viewmats[0, :3, :3].T + viewmats[0, :3, 3]
+    uv = cam @ Ks[0].T
+    uv = uv[:, :2] / uv[:, 2:].clamp(min=1e-3)
+    px = uv[:, 0].detach().clamp(0, width - 1).long()
+    py = uv[:, 1].detach().clamp(0, height - 1).long()
+    weight = opacities * scales.mean(dim=-1) * quats[:, 0].abs()
+    rgb = colors.reshape(-1, 3) * weight[:, None]
+    image = torch.zeros(height * width, 3, device=means.device).index_add(0, py * width + px, rgb)
+    image = image + 1e-3 * cam[:, 2].mean()  # keeps means in the graph
+    return image.view(1, height, width, 3), None, None
+
+
+def synthetic_splats(n: int, device: str):
+    gen = torch.Generator().manual_seed(0)
+    tensors = {
+        "means": torch.randn(n, 3, generator=gen) * 0.5,
+        "scales": torch.full((n, 3), -5.0),
+        "quats": torch.randn(n, 4, generator=gen),
+        "opacities": torch.zeros(n),
+        "sh0": torch.randn(n, 1, 3, generator=gen),
+    }
+    return {k: torch.nn.Parameter(v.to(device)) for k, v in tensors.items()}
+
+
+def legacy_loop(splats, views, target, steps):
+    """The train_gsplat step as it was before train_engine."""
+    lrs = {"means": 1.6e-4, "scales": 5e-3, "quats": 1e-3, "opacities": 5e-2, "sh0": 2.5e-3}
+    optimizers = {name: torch.optim.Adam([splats[name]], lr=lr) for name, lr in lrs.items()}
+    schedulers = {"means": torch.optim.lr_scheduler.LambdaLR(optimizers["means"], lambda s: max(0.01, 0.999**s))}
+    for step in range(steps):
+        viewmat, K = views[step % len(views)]
+        rendered = render(splats, stub_rasterize, viewmat, K, target.shape[1], target.shape[0])
+        loss = F.l1_loss(rendered, target)
+        for opt in optimizers.values():
+            opt.zero_grad()
+        loss.backward()
+        del rendered
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+        for opt in optimizers.values():
+            opt.step()
+        for sched in schedulers.values():
+            sched.step()
+
+
+def engine_loop(splats, views, target, steps):
+    optimizer = make_optimizer(splats)
+    scheduler = make_scheduler(optimizer, steps)
+    memory = MemoryPolicy("none", device=str(target.device))
+    for step in range(steps):
+        viewmat, K = views[step % len(views)]
+        train_step(splats, optimizer, scheduler, stub_rasterize, F.l1_loss, target, viewmat, K,
+                   target.shape[1], target.shape[0])
+        memory.after_step(step)
+
+
+def steps_per_second(loop, n, views, target, steps):
+    splats = synthetic_splats(n, str(target.device))
+    loop(splats, views, target, 5)  # warm up
+    if target.is_cuda:
+        torch.cuda.synchronize()
+    start = time.perf_counter()
+    loop(splats, views, target, steps)
+    if target.is_cuda:
+        torch.cuda.synchronize()
+    return steps / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark training steps per second")
+    parser.add_argument("--gaussians", type=int, nargs="+", default=[5000, 50000])
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--width", type=int, default=320)
+    parser.add_argument("--height", type=int, default=240)
+    parser.add_argument("--trials", type=int, default=7)
+    parser.add_argument("--device", type=str, default="cpu")
+    args = parser.parse_args()
+
+    K = torch.tensor([[300.0, 0, args.width / 2], [0, 300.0, args.height / 2], [0, 0, 1]], device=args.device)
+    views = []
+    for angle in torch.linspace(0, 6.28, 8):
+        viewmat = torch.eye(4)
+        viewmat[:3, :3] = torch.tensor([[angle.cos(), 0, angle.sin()], [0, 1, 0], [-angle.sin(), 0, angle.cos()]])
+        viewmat[2, 3] = 3.0
+        views.append((viewmat[None].to(args.device), K[None]))
+    target = torch.rand(args.height, args.width, 3, generator=torch.Generator().manual_seed(1)).to(args.device)
+
+    print(f"{args.width}x{args.height} stub render on {args.device}, {args.steps} steps, "
+          f"median of {args.trials} interleaved trials (min-max)")
+    loops = {"legacy": legacy_loop, "engine": engine_loop}
+    for n in args.gaussians:
+        rates = {name: [] for name in loops}
+        for trial in range(args.trials):
+            # Alternate which loop goes first so drift and warm-up don't favour one
+            names = list(loops) if trial % 2 == 0 else list(reversed(loops))
+            for name in names:
+                rates[name].append(steps_per_second(loops[name], n, views, target, args.steps))
+        medians = {name: statistics.median(r) for name, r in rates.items()}
+        print(f"  {n:7d} Gaussians | " + " | ".join(
+            f"{name} {medians[name]:7.1f} steps/s ({min(r):.0f}-{max(r):.0f})" for name, r in rates.items()
+        ) + f" | {medians['engine'] / medians['legacy']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+Background checkpoint writing for train_gsplat.
+
+Saving used to block the training loop: every parameter was copied to the
+host, activated and copied again for the PLY, then copied a third time for
+torch.save. CheckpointWriter.save() instead snapshots each parameter once
+into a reusable (pinned, when on CUDA) host buffer and returns; a worker
+thread waits for the copies to land and writes the PLY and the .pt from that
+one snapshot. At most one checkpoint is in flight: saving again while the
+last one is still being written waits for it first, which also keeps the
+host buffers from being overwritten mid-write.
+
+Besides the splats, a checkpoint can carry the full training state
+(training_state(): optimizer moments, scheduler, next step, RNG states), so
+train_gsplat --resume continues a run where it stopped.
+
+Files are written to a temporary name and renamed into place, so a killed
+run never leaves a truncated checkpoint. With keep_last > 0, only that many
+of the most recent checkpoints in the output directory are kept on disk,
+counting those an earlier (resumed) run left there.
+
+The PLY is the standard 3D Gaussian splatting layout (raw log-scales, logit
+opacities, unnormalized quaternions and SH DC coefficients), as read by
+common splat viewers.
+"""
+
+import copy
+import os
+import queue
+import random
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+
+CHECKPOINT_VERSION = 2  # 1: splat tensors only; 2: full training state
+
+
+def ply_path(output_dir: str, step: int) -> Path:
+    """splat_<step>.ply in output_dir."""
+    return Path(output_dir) / f"splat_{step}.ply"
+
+
+def checkpoint_path(output_dir: str, step: int) -> Path:
+    """checkpoint_<step>.pt in output_dir."""
+    return Path(output_dir) / f"checkpoint_{step}.pt"
+
+
+def write_splat_ply(path: Path, splats: Dict[str, np.ndarray]) -> Path:
+    """Write raw splat parameters (means, scales, quats, opacities, sh0) as a binary 3DGS PLY."""
+    means = splats["means"].reshape(-1, 3)
+    sh0 = splats["sh0"].reshape(len(means), -1)
+    columns = [("x", means[:, 0]), ("y", means[:, 1]), ("z", means[:, 2])]
+    columns += [(n, np.zeros(len(means))) for n in ("nx", "ny", "nz")]
+    columns += [(f"f_dc_{j}", sh0[:, j]) for j in range(sh0.shape[1])]
+    columns += [("opacity", splats["opacities"].reshape(-1))]
+    columns += [(f"scale_{j}", splats["scales"][:, j]) for j in range(splats["scales"].shape[1])]
+    columns += [(f"rot_{j}", splats["quats"][:, j]) for j in range(splats["quats"].shape[1])]
+
+    vertices = np.empty(len(means), dtype=[(name, "<f4") for name, _ in columns])
+    for name, values in columns:
+        vertices[name] = values
+    header = "\n".join(
+        ["ply", "format binary_little_endian 1.0", f"element vertex {len(means)}"]
+        + [f"property float {name}" for name, _ in columns]
+        + ["end_header"]
+    ) + "\n"
+
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(header.encode())
+        vertices.tofile(f)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _save_torch(obj, path: Path) -> Path:
+    """torch.save to a temporary name, then rename into place."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    torch.save(obj, tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _by_step(output_dir: str, prefix: str, suffix: str) -> Dict[int, Path]:
+    """{step: path} of the <prefix><step><suffix> files in output_dir."""
+    found = {}
+    for path in Path(output_dir).glob(f"{prefix}*{suffix}"):
+        step = path.name[len(prefix):-len(suffix)]
+        if step.isdigit():
+            found[int(step)] = path
+    return found
+
+
+def latest_checkpoint(output_dir: str) -> Optional[Path]:
+    """The checkpoint_<step>.pt with the highest step in output_dir, or None."""
+    found = _by_step(output_dir, "checkpoint_", ".pt")
+    return found[max(found)] if found else None
+
+
+def existing_checkpoints(output_dir: str) -> List[Tuple[int, List[Path]]]:
+    """(step, [splat_<step>.ply, checkpoint_<step>.pt, whichever exist]) in output_dir, by step."""
+    plys = _by_step(output_dir, "splat_", ".ply")
+    pts = _by_step(output_dir, "checkpoint_", ".pt")
+    return [
+        (step, [paths[step] for paths in (plys, pts) if step in paths])
+        for step in sorted(set(plys) | set(pts))
+    ]
+
+
+def load_checkpoint(path: Path) -> dict:
+    """
+    Load a checkpoint onto the CPU as {"splats": ..., ...}.
+
+    Version 1 files (a bare dict of splat tensors) load with splats only.
+    """
+    # Full-state checkpoints hold numpy and Python RNG states, not just tensors
+    ckpt = torch.load(path, map_location="cpu", weights_only=False)
+    if "splats" not in ckpt:
+        return {"version": 1, "splats": ckpt}
+    return ckpt
+
+
+def rng_state() -> dict:
+    """Python, numpy, torch and (when present) CUDA generator states."""
+    state = {"python": random.getstate(), "numpy": np.random.get_state(), "torch": torch.get_rng_state()}
+    if torch.cuda.is_available():
+        state["cuda"] = torch.cuda.get_rng_state_all()
+    return state
+
+
+def set_rng_state(state: dict) -> None:
+    """Restore generator states saved by rng_state()."""
+    random.setstate(state["python"])
+    np.random.set_state(state["numpy"])
+    torch.set_rng_state(state["torch"])
+    if "cuda" in state and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state["cuda"])
+
+
+def training_state(optimizers: Dict, schedulers: Dict, next_step: int, **extra) -> dict:
+    """
+    Everything beyond the splats needed to continue a run: optimizer and
+    scheduler state dicts, the next step to run, RNG states, plus extra
+    (e.g. the sample-order seed).
+    """
+    return {
+        "next_step": next_step,
+        "optimizers": {name: opt.state_dict() for name, opt in optimizers.items()},
+        "schedulers": {name: sched.state_dict() for name, sched in schedulers.items()},
+        "rng": rng_state(),
+        **extra,
+    }
+
+
+def restore_training_state(ckpt: dict, optimizers: Dict, schedulers: Dict) -> int:
+    """Load optimizer, scheduler and RNG state from a checkpoint; returns the next step to run."""
+    if "optimizers" not in ckpt:
+        raise ValueError("Checkpoint has no optimizer state (saved before full-state checkpoints); cannot resume")
+    if set(ckpt["optimizers"]) != set(optimizers) or set(ckpt["schedulers"]) != set(schedulers):
+        raise ValueError(f"Checkpoint optimizers {sorted(ckpt['optimizers'])} do not match {sorted(optimizers)}; cannot resume")
+    for name, opt in optimizers.items():
+        opt.load_state_dict(ckpt["optimizers"][name])
+    for name, sched in schedulers.items():
+        sched.load_state_dict(ckpt["schedulers"][name])
+    set_rng_state(ckpt["rng"])
+    return ckpt["next_step"]
+
+
+class CheckpointWriter:
+    """
+    Writes splat_<step>.ply and checkpoint_<step>.pt on a background thread.
+
+    Use as a context manager, or call close() when done: it waits for the
+    last write and re-raises any error the worker hit. Checkpoints already in
+    output_dir (from the run being resumed) count towards keep_last.
+    """
+
+    def __init__(self, output_dir: str, keep_last: int = 0):
+        self.output_dir = str(output_dir)
+        self.keep_last = keep_last
+        self.written: List[Tuple[int, List[Path]]] = existing_checkpoints(self.output_dir)
+        self._buffers: Dict[tuple, torch.Tensor] = {}
+        self._on_cuda = False
+        self._jobs: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=1)
+        self._errors: List[BaseException] = []
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _snapshot(self, obj, key: tuple = ()):
+        """
+        Copy of obj with every tensor copied into a reusable host buffer.
+
+        Nested dicts, lists and tuples (optimizer state dicts) are walked;
+        anything else is deep-copied. Buffers are keyed by their path in obj.
+        """
+        if isinstance(obj, torch.Tensor):
+            tensor = obj.detach()
+            buf = self._buffers.get(key)
+            if buf is None or buf.shape != tensor.shape or buf.dtype != tensor.dtype:
+                buf = torch.empty(tensor.shape, dtype=tensor.dtype, pin_memory=tensor.is_cuda)
+                self._buffers[key] = buf
+            buf.copy_(tensor, non_blocking=tensor.is_cuda)
+            self._on_cuda = self._on_cuda or tensor.is_cuda
+            return buf
+        if isinstance(obj, dict):
+            return {k: self._snapshot(v, key + (k,)) for k, v in obj.items()}
+        if isinstance(obj, (list, tuple)):
+            return type(obj)(self._snapshot(v, key + (i,)) for i, v in enumerate(obj))
+        return copy.deepcopy(obj)
+
+    def save(self, splats: Dict[str, torch.Tensor], step: int, state: Optional[dict] = None) -> None:
+        """
+        Snapshot splats (and training state, see training_state()) and queue
+        step's checkpoint; returns once the copies are issued.
+        """
+        self.wait()
+        self._on_cuda = False
+        payload = self._snapshot({"splats": splats, **(state or {})})
+        event = None
+        if self._on_cuda:
+            event = torch.cuda.Event()
+            event.record()
+        self._jobs.put((step, payload, event))
+
+    def _write(self, step: int, payload: dict, event) -> None:
+        if event is not None:
+            event.synchronize()
+        arrays = {name: t.numpy() for name, t in payload["splats"].items()}
+        paths = [
+            write_splat_ply(ply_path(self.output_dir, step), arrays),
+            _save_torch({"version": CHECKPOINT_VERSION, "step": step, **payload}, checkpoint_path(self.output_dir, step)),
+        ]
+        print(f"  Saved checkpoint {step}: {paths[0].name}, {paths[1].name}")
+        # A step saved again (resumed from an earlier checkpoint) replaces its old entry
+        self.written = [entry for entry in self.written if entry[0] != step]
+        self.written.append((step, paths))
+        self.written.sort(key=lambda entry: entry[0])
+        while self.keep_last > 0 and len(self.written) > self.keep_last:
+            _, old_paths = self.written.pop(0)
+            for path in old_paths:
+                path.unlink(missing_ok=True)
+
+    def _run(self) -> None:
+        while True:
+            job = self._jobs.get()
+            try:
+                if job is None:
+                    return
+                self._write(*job)
+            except BaseException as e:
+                self._errors.append(e)
+            finally:
+                self._jobs.task_done()
+
+    def wait(self) -> None:
+        """Block until queued checkpoints are on disk; re-raise a worker error."""
+        self._jobs.join()
+        if self._errors:
+            raise self._errors.pop(0)
+
+    def close(self) -> None:
+        """Finish pending writes and stop the worker."""
+        if self._thread.is_alive():
+            self._jobs.put(None)
+            self._thread.join()
+        if self._errors:
+            raise self._errors.pop(0)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
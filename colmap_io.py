@@ -0,0 +1,339 @@
+"""
+COLMAP binary model I/O (cameras.bin, images.bin, points3D.bin).
+
+Readers memory-map the file and decode fixed-size records in bulk with numpy
+structured dtypes. Variable-length blocks (image names, 2D points, point
+tracks) are located with one cheap offset scan; records are then gathered by
+fancy-indexing a zero-copy view of the map with a record starting at every
+byte, and tracks the same way, one gather per distinct track length. Index
+arrays stay one entry per record, never per byte. No pycolmap needed.
+
+inspect_model() summarizes a model from the record counts in the file
+headers and the file sizes alone, without reading any records.
+
+Writers produce byte-identical files to COLMAP's own writer and are used for
+round-trip tests and merged models.
+"""
+
+import mmap
+import os
+import struct
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Tuple
+
+import numpy as np
+
+# model_id -> (name, number of params), from colmap/src/colmap/sensor/models.h
+CAMERA_MODELS = {
+    0: ("SIMPLE_PINHOLE", 3),
+    1: ("PINHOLE", 4),
+    2: ("SIMPLE_RADIAL", 4),
+    3: ("RADIAL", 5),
+    4: ("OPENCV", 8),
+    5: ("OPENCV_FISHEYE", 8),
+    6: ("FULL_OPENCV", 12),
+    7: ("FOV", 5),
+    8: ("SIMPLE_RADIAL_FISHEYE", 4),
+    9: ("RADIAL_FISHEYE", 5),
+    10: ("THIN_PRISM_FISHEYE", 12),
+}
+
+CAMERA_HEADER = np.dtype([("id", "<u4"), ("model_id", "<i4"), ("width", "<u8"), ("height", "<u8")])
+IMAGE_HEADER = np.dtype([("id", "<u4"), ("qvec", "<f8", 4), ("tvec", "<f8", 3), ("camera_id", "<u4")])
+POINT2D = np.dtype([("xy", "<f8", 2), ("point3D_id", "<i8")])
+POINT3D_HEADER = np.dtype(
+    [("id", "<u8"), ("xyz", "<f8", 3), ("rgb", "u1", 3), ("error", "<f8"), ("track_length", "<u8")]
+)
+TRACK_ELEM = np.dtype([("image_id", "<i4"), ("point2D_idx", "<i4")])
+
+# Offset of track_length inside a points3D record header
+_TRACK_LENGTH_OFFSET = POINT3D_HEADER.fields["track_length"][1]
+
+
+@contextmanager
+def _mapped(path: str):
+    """Read-only mmap of a file. Arrays returned to callers must be copies."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError(f"Empty COLMAP file: {path}")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
+
+
+def _record_view(buffer, dtype: np.dtype) -> np.ndarray:
+    """Zero-copy array over buffer whose element i is the dtype record starting at byte i."""
+    dtype = np.dtype(dtype)
+    with memoryview(buffer) as view:  # released at once, so an mmap can still be closed
+        nbytes = view.nbytes
+    count = max(nbytes - dtype.itemsize + 1, 0)
+    return np.ndarray((count,), dtype=dtype, buffer=buffer, strides=(1,))
+
+
+def _gather_records(buffer, offsets: np.ndarray, dtype: np.dtype) -> np.ndarray:
+    """Decode fixed-size records starting at each byte offset into a structured array (a copy)."""
+    if len(offsets) == 0:
+        return np.empty(0, dtype=dtype)
+    return _record_view(buffer, dtype)[offsets]
+
+
+def _copy_blocks(src, src_starts: np.ndarray, dst, dst_starts: np.ndarray, lengths: np.ndarray,
+                 dtype: np.dtype) -> None:
+    """
+    Copy lengths[i] dtype elements from byte src_starts[i] of src to byte
+    dst_starts[i] of dst, one fancy-indexed copy per distinct length.
+    """
+    order = np.argsort(lengths, kind="stable")
+    sorted_lengths = lengths[order]
+    bounds = np.flatnonzero(np.r_[True, sorted_lengths[1:] != sorted_lengths[:-1], True])
+    for begin, end in zip(bounds[:-1], bounds[1:]):
+        length = int(sorted_lengths[begin])
+        if length == 0:
+            continue
+        block = np.dtype((dtype, (length,)))
+        group = order[begin:end]
+        _record_view(dst, block)[dst_starts[group]] = _record_view(src, block)[src_starts[group]]
+
+
+# ── Poses ──────────────────────────────────────────────────────────
+
+
+def qvec2rotmat(qvec: np.ndarray) -> np.ndarray:
+    """COLMAP quaternion (w,x,y,z) to 3x3 rotation matrix."""
+    w, x, y, z = qvec
+    return np.array(
+        [
+            [1 - 2 * y * y - 2 * z * z, 2 * x * y - 2 * w * z, 2 * x * z + 2 * w * y],
+            [2 * x * y + 2 * w * z, 1 - 2 * x * x - 2 * z * z, 2 * y * z - 2 * w * x],
+            [2 * x * z - 2 * w * y, 2 * y * z + 2 * w * x, 1 - 2 * x * x - 2 * y * y],
+        ]
+    )
+
+
+def rotmat2qvec(R: np.ndarray) -> np.ndarray:
+    """3x3 rotation matrix to COLMAP quaternion (w,x,y,z), w >= 0."""
+    # Eigenvector of the symmetric 4x4 matrix K with the largest eigenvalue (as COLMAP's scripts do)
+    Rxx, Ryx, Rzx, Rxy, Ryy, Rzy, Rxz, Ryz, Rzz = R.flat
+    K = np.array([
+        [Rxx - Ryy - Rzz, 0, 0, 0],
+        [Ryx + Rxy, Ryy - Rxx - Rzz, 0, 0],
+        [Rzx + Rxz, Rzy + Ryz, Rzz - Rxx - Ryy, 0],
+        [Ryz - Rzy, Rzx - Rxz, Rxy - Ryx, Rxx + Ryy + Rzz],
+    ]) / 3.0
+    eigvals, eigvecs = np.linalg.eigh(K)
+    qvec = eigvecs[[3, 0, 1, 2], np.argmax(eigvals)]
+    return -qvec if qvec[0] < 0 else qvec
+
+
+# ── Readers ──────────────────────────────────────────────────────────
+
+
+def read_cameras_binary(path: str) -> Dict:
+    """Parse COLMAP cameras.bin. Returns {cam_id: {model_id, width, height, params}}."""
+    cameras = {}
+    with _mapped(path) as mm:
+        num_cameras = struct.unpack_from("<Q", mm, 0)[0]
+        pos = 8
+        for _ in range(num_cameras):
+            header = np.frombuffer(mm, dtype=CAMERA_HEADER, count=1, offset=pos)[0]
+            model_id = int(header["model_id"])
+            if model_id not in CAMERA_MODELS:
+                raise ValueError(f"Unknown COLMAP camera model id {model_id} in {path}")
+            num_params = CAMERA_MODELS[model_id][1]
+            pos += CAMERA_HEADER.itemsize
+            params = np.frombuffer(mm, dtype="<f8", count=num_params, offset=pos).astype(np.float64)
+            pos += 8 * num_params
+            cameras[int(header["id"])] = {
+                "model_id": model_id,
+                "width": int(header["width"]),
+                "height": int(header["height"]),
+                "params": params,
+            }
+            del header
+    return cameras
+
+
+def read_images_binary(path: str, with_points2D: bool = False) -> Dict:
+    """
+    Parse COLMAP images.bin. Returns {img_id: {qvec, tvec, camera_id, name}}.
+
+    With `with_points2D`, each entry also gets `xys` [M,2] and `point3D_ids` [M]
+    (-1 where the keypoint is not triangulated).
+    """
+    images = {}
+    with _mapped(path) as mm:
+        num_images = struct.unpack_from("<Q", mm, 0)[0]
+        offsets = np.empty(num_images, dtype=np.int64)
+        names = []
+        point_blocks = []
+        pos = 8
+        for i in range(num_images):
+            offsets[i] = pos
+            name_start = pos + IMAGE_HEADER.itemsize
+            name_end = mm.find(b"\x00", name_start)
+            names.append(mm[name_start:name_end].decode("utf-8"))
+            num_points2D = struct.unpack_from("<Q", mm, name_end + 1)[0]
+            pos = name_end + 9
+            point_blocks.append((pos, num_points2D))
+            pos += num_points2D * POINT2D.itemsize
+
+        headers = _gather_records(mm, offsets, IMAGE_HEADER)
+        points = []
+        if with_points2D:
+            for start, count in point_blocks:
+                points.append(np.frombuffer(mm, dtype=POINT2D, count=count, offset=start).copy())
+
+    for i, header in enumerate(headers):
+        entry = {
+            "qvec": header["qvec"].copy(),
+            "tvec": header["tvec"].copy(),
+            "camera_id": int(header["camera_id"]),
+            "name": names[i],
+        }
+        if with_points2D:
+            entry["xys"] = points[i]["xy"].copy()
+            entry["point3D_ids"] = points[i]["point3D_id"].copy()
+        images[int(header["id"])] = entry
+    return images
+
+
+def _scan_points3D(mm) -> Tuple[int, np.ndarray, np.ndarray]:
+    """Locate each points3D record: returns (count, record offsets, track lengths)."""
+    num_points = struct.unpack_from("<Q", mm, 0)[0]
+    offsets = np.empty(num_points, dtype=np.int64)
+    lengths = np.empty(num_points, dtype=np.int64)
+    unpack_length = struct.Struct("<Q").unpack_from
+    header_size = POINT3D_HEADER.itemsize
+    pos = 8
+    for i in range(num_points):
+        track_length = unpack_length(mm, pos + _TRACK_LENGTH_OFFSET)[0]
+        offsets[i] = pos
+        lengths[i] = track_length
+        pos += header_size + track_length * TRACK_ELEM.itemsize
+    return num_points, offsets, lengths
+
+
+def read_points3D_binary(path: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Parse COLMAP points3D.bin. Returns (xyz [N,3] float32, rgb [N,3] uint8)."""
+    with _mapped(path) as mm:
+        _, offsets, _ = _scan_points3D(mm)
+        headers = _gather_records(mm, offsets, POINT3D_HEADER)
+    return headers["xyz"].astype(np.float32), headers["rgb"].copy()
+
+
+def read_points3D_full(path: str) -> Dict[str, np.ndarray]:
+    """
+    Parse every field of COLMAP points3D.bin.
+
+    Returns {ids, xyz, rgb, error, track_lengths, track} where `track` is a
+    structured [sum(track_lengths)] array of (image_id, point2D_idx), stored
+    point after point in file order.
+    """
+    with _mapped(path) as mm:
+        _, offsets, lengths = _scan_points3D(mm)
+        headers = _gather_records(mm, offsets, POINT3D_HEADER)
+        track = np.empty(int(lengths.sum()), dtype=TRACK_ELEM)
+        track_starts = (np.cumsum(lengths) - lengths) * TRACK_ELEM.itemsize
+        _copy_blocks(mm, offsets + POINT3D_HEADER.itemsize, track, track_starts, lengths, TRACK_ELEM)
+    return {
+        "ids": headers["id"].astype(np.int64),
+        "xyz": headers["xyz"].copy(),
+        "rgb": headers["rgb"].copy(),
+        "error": headers["error"].copy(),
+        "track_lengths": lengths,
+        "track": track,
+    }
+
+
+def _record_count(path: str) -> int:
+    """The uint64 record count every COLMAP .bin file starts with."""
+    with open(path, "rb") as f:
+        header = f.read(8)
+    if len(header) < 8:
+        raise ValueError(f"Truncated COLMAP file: {path}")
+    return struct.unpack("<Q", header)[0]
+
+
+def inspect_model(model_dir) -> Dict:
+    """
+    Registered images, 3D points and mean track length of a sparse model.
+
+    Reads 8 bytes from images.bin and points3D.bin. The total track length
+    follows from the points3D.bin size, since every record is a fixed header
+    plus 8 bytes per track element.
+
+    Returns {registered_images, points, mean_track_length}.
+    """
+    model_dir = Path(model_dir)
+    points_path = model_dir / "points3D.bin"
+    num_points = _record_count(str(points_path))
+    track_bytes = os.path.getsize(points_path) - 8 - num_points * POINT3D_HEADER.itemsize
+    if track_bytes < 0 or track_bytes % TRACK_ELEM.itemsize:
+        raise ValueError(f"Corrupt COLMAP file: {points_path}")
+    total_track = track_bytes // TRACK_ELEM.itemsize
+    return {
+        "registered_images": _record_count(str(model_dir / "images.bin")),
+        "points": num_points,
+        "mean_track_length": total_track / num_points if num_points else 0.0,
+    }
+
+
+# ── Writers ──────────────────────────────────────────────────────────
+
+
+def write_cameras_binary(cameras: Dict, path: str) -> None:
+    """Write {cam_id: {model_id, width, height, params}} as COLMAP cameras.bin."""
+    with open(path, "wb") as f:
+        f.write(struct.pack("<Q", len(cameras)))
+        for cam_id, cam in cameras.items():
+            num_params = CAMERA_MODELS[cam["model_id"]][1]
+            params = np.asarray(cam["params"], dtype="<f8")
+            if len(params) != num_params:
+                raise ValueError(f"Camera {cam_id}: expected {num_params} params, got {len(params)}")
+            f.write(struct.pack("<IiQQ", cam_id, cam["model_id"], cam["width"], cam["height"]))
+            f.write(params.tobytes())
+
+
+def write_images_binary(images: Dict, path: str) -> None:
+    """Write {img_id: {qvec, tvec, camera_id, name[, xys, point3D_ids]}} as COLMAP images.bin."""
+    with open(path, "wb") as f:
+        f.write(struct.pack("<Q", len(images)))
+        for img_id, img in images.items():
+            header = np.zeros(1, dtype=IMAGE_HEADER)
+            header["id"] = img_id
+            header["qvec"] = img["qvec"]
+            header["tvec"] = img["tvec"]
+            header["camera_id"] = img["camera_id"]
+            f.write(header.tobytes())
+            f.write(img["name"].encode("utf-8") + b"\x00")
+            xys = img.get("xys")
+            points = np.zeros(0 if xys is None else len(xys), dtype=POINT2D)
+            if xys is not None:
+                points["xy"] = xys
+                points["point3D_id"] = img["point3D_ids"]
+            f.write(struct.pack("<Q", len(points)))
+            f.write(points.tobytes())
+
+
+def write_points3D_binary(points: Dict[str, np.ndarray], path: str) -> None:
+    """Write the dict returned by read_points3D_full as COLMAP points3D.bin."""
+    n = len(points["xyz"])
+    headers = np.zeros(n, dtype=POINT3D_HEADER)
+    headers["id"] = points["ids"]
+    headers["xyz"] = points["xyz"]
+    headers["rgb"] = points["rgb"]
+    headers["error"] = points["error"]
+    lengths = np.asarray(points["track_lengths"], dtype=np.int64)
+    headers["track_length"] = lengths
+
+    # Interleave fixed headers and variable tracks into one buffer
+    record_sizes = POINT3D_HEADER.itemsize + lengths * TRACK_ELEM.itemsize
+    offsets = 8 + np.cumsum(record_sizes) - record_sizes
+    out = np.empty(8 + int(record_sizes.sum()), dtype=np.uint8)
+    out[:8] = np.frombuffer(struct.pack("<Q", n), dtype=np.uint8)
+    if n:
+        _record_view(out, POINT3D_HEADER)[offsets] = headers
+        track = np.ascontiguousarray(points["track"], dtype=TRACK_ELEM)
+        track_starts = (np.cumsum(lengths) - lengths) * TRACK_ELEM.itemsize
+        _copy_blocks(track, track_starts, out, offsets + POINT3D_HEADER.itemsize, lengths, TRACK_ELEM)
+    out.tofile(path)
@@ -0,0 +1,117 @@
+"""
+Frame-set analysis shared by reconstruction, the pipeline and the API.
+
+analyze_frames() lists a frame directory and measures it once: frame count,
+resolution, and the Laplacian-variance detail level and object coverage
+that pick COLMAP's SIFT parameters. Results are cached in memory keyed by
+the directory's contents (every frame's name, size and mtime), so asking
+again about an unchanged directory costs a listing and a stat per file,
+not a re-decode of the sampled frames. Any change to the frames recomputes.
+
+The cache lives in this process only. Nothing is written next to the
+frames, which would change the stage cache's view of their directory.
+"""
+
+import threading
+from pathlib import Path
+from typing import List
+
+import cv2
+import numpy as np
+
+from journal import input_fingerprint
+
+FRAME_EXTENSIONS = {".png", ".jpg", ".jpeg"}
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def list_frames(frames_dir: Path) -> List[Path]:
+    """Image files in frames_dir, in capture order."""
+    return sorted(f for f in Path(frames_dir).iterdir() if f.suffix.lower() in FRAME_EXTENSIONS)
+
+
+def measure_frames(frames: List[Path], sample_count: int = 10) -> dict:
+    """Sample frames and measure Laplacian variance to assess detail level.
+
+    High-detail sculpts (flecks not visible): variance > 15
+    Medium (some softness): variance 5-15
+    Low-detail / soft flecks: variance < 5
+
+    Returns dict with frame_count, resolution ((width, height) of the first
+    readable sample, or None), avg_variance, detail_level
+    ('high'/'medium'/'low'/'unknown'), sample_count and coverage_pct.
+    """
+    result = {"frame_count": len(frames), "resolution": None, "avg_variance": 0,
+              "detail_level": "unknown", "sample_count": 0, "coverage_pct": 0}
+    if not frames:
+        return result
+
+    # Sample evenly across the sequence
+    step = max(1, len(frames) // sample_count)
+    sample = frames[::step][:sample_count]
+
+    variances = []
+    coverages = []
+    for f in sample:
+        img = cv2.imread(str(f), cv2.IMREAD_GRAYSCALE)
+        if img is None:
+            continue
+        if result["resolution"] is None:
+            result["resolution"] = (img.shape[1], img.shape[0])
+        # Only measure non-black pixels (Dreams frames are mostly black background)
+        mask = img > 10
+        if mask.sum() < 100:
+            continue
+        coverages.append(mask.sum() / mask.size * 100)
+        lap = cv2.Laplacian(img, cv2.CV_64F)
+        # Variance of Laplacian in the object region only
+        variances.append(lap[mask].var())
+
+    if not variances:
+        return result
+
+    avg_var = float(np.mean(variances))
+    avg_coverage = float(np.mean(coverages)) if coverages else 0
+
+    if avg_var >= 15:
+        detail_level = "high"
+    elif avg_var >= 5:
+        detail_level = "medium"
+    else:
+        detail_level = "low"
+
+    result.update({
+        "avg_variance": round(avg_var, 2),
+        "detail_level": detail_level,
+        "sample_count": len(variances),
+        "coverage_pct": round(avg_coverage, 1),
+    })
+    return result
+
+
+def analyze_frames(frames_dir: Path, sample_count: int = 10) -> dict:
+    """
+    measure_frames() for a directory, cached by its contents.
+
+    Returns the measure_frames() dict plus frames (the sorted frame paths).
+    """
+    frames = list_frames(frames_dir)
+    key = (str(Path(frames_dir).resolve()), sample_count)
+    fingerprint = input_fingerprint(frames)
+    with _cache_lock:
+        cached_fingerprint, analysis = _cache.get(key, (None, None))
+    if cached_fingerprint != fingerprint:
+        analysis = measure_frames(frames, sample_count)
+        analysis["frames"] = tuple(frames)
+        with _cache_lock:
+            # One entry per directory: a changed directory replaces its old analysis
+            _cache[key] = (fingerprint, analysis)
+    return {**analysis, "frames": list(analysis["frames"])}
+
+
+def clear_analysis_cache():
+    """Forget every cached analysis."""
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,223 @@
+"""
+Memory-mapped training image store.
+
+Training images are decoded and resized once, then written as uint8 to a
+flat memory-mapped cache file next to a small JSON index. Later runs with the
+same images and target sizes open the cache without decoding anything. Frames
+are handed out lazily as uint8 views; float conversion is left to the caller
+(on the GPU in train_gsplat), so host RAM holds 1 byte per channel at most and
+only the pages that are actually touched.
+
+A cold cache is built by a thread pool (PIL releases the GIL while decoding
+and resizing); each worker writes straight into its own slice of the map.
+A bounded prefetch thread walks a precomputed sample order so page-ins overlap
+with training.
+"""
+
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+CACHE_VERSION = 1
+
+
+def load_resized(path: str, width: int, height: int) -> np.ndarray:
+    """Decode an image as RGB and resize it with LANCZOS to (height, width, 3) uint8."""
+    with Image.open(path) as img:
+        img = img.convert("RGB")
+        if img.size != (width, height):
+            img = img.resize((width, height), Image.LANCZOS)
+        return np.asarray(img, dtype=np.uint8)
+
+
+def cache_key(paths: Sequence[str], sizes: Sequence[Tuple[int, int]]) -> str:
+    """Hash of every source file's identity (path, byte size, mtime) and its target size."""
+    h = hashlib.sha1(f"v{CACHE_VERSION}".encode())
+    for path, (height, width) in zip(paths, sizes):
+        st = os.stat(path)
+        h.update(f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}|{height}x{width}\n".encode())
+    return h.hexdigest()[:16]
+
+
+class ImageStore:
+    """
+    Resized uint8 images backed by a memory-mapped cache file.
+
+    `store[i]` returns a read-only (H, W, 3) uint8 view into the cache.
+    """
+
+    def __init__(
+        self,
+        paths: Sequence[str],
+        sizes: Sequence[Tuple[int, int]],
+        cache_dir: str,
+        verbose: bool = True,
+        workers: int = 1,
+    ):
+        """
+        Args:
+            paths: Source image files
+            sizes: Target (height, width) per image
+            cache_dir: Directory for the cache files (created if missing)
+            workers: Decode threads used when the cache has to be built
+        """
+        if len(paths) != len(sizes):
+            raise ValueError(f"Got {len(paths)} paths but {len(sizes)} sizes")
+        self.paths = list(paths)
+        self.sizes = [(int(h), int(w)) for h, w in sizes]
+        counts = [h * w * 3 for h, w in self.sizes]
+        self.offsets = np.concatenate([[0], np.cumsum(counts, dtype=np.int64)])
+        self.verbose = verbose
+        self.workers = max(1, workers)
+        self.load_times: list = []  # seconds per image, filled on a cold build
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.key = cache_key(self.paths, self.sizes)
+        self.data_path = os.path.join(cache_dir, f"images_{self.key}.u8")
+        self.index_path = os.path.join(cache_dir, f"images_{self.key}.json")
+        self.cache_hit = self._index_matches()
+        if not self.cache_hit:
+            self._build()
+
+        total = int(self.offsets[-1])
+        if total:
+            self._data = np.memmap(self.data_path, dtype=np.uint8, mode="r", shape=(total,))
+        else:
+            self._data = np.empty(0, dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def __getitem__(self, idx: int) -> np.ndarray:
+        h, w = self.sizes[idx]
+        return self._data[self.offsets[idx] : self.offsets[idx + 1]].reshape(h, w, 3)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.offsets[-1])
+
+    def _index_matches(self) -> bool:
+        """True if a complete cache for this key is on disk (the index is written last)."""
+        if not os.path.exists(self.index_path) or not os.path.exists(self.data_path):
+            return False
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return False
+        return (
+            index.get("key") == self.key
+            and index.get("nbytes") == self.nbytes
+            and os.path.getsize(self.data_path) == self.nbytes
+        )
+
+    def _build(self):
+        """Decode, resize and write every image into a fresh cache file."""
+        if self.verbose:
+            print(f"Building image cache ({len(self)} images, {self.nbytes / 1024**2:.0f}MB): {self.data_path}")
+        tmp_path = self.data_path + ".tmp"
+        if self.nbytes:
+            data = np.memmap(tmp_path, dtype=np.uint8, mode="w+", shape=(self.nbytes,))
+
+            def load_one(i: int) -> float:
+                start = time.perf_counter()
+                h, w = self.sizes[i]
+                data[self.offsets[i] : self.offsets[i + 1]] = load_resized(self.paths[i], w, h).reshape(-1)
+                return time.perf_counter() - start
+
+            start = time.perf_counter()
+            if self.workers > 1:
+                with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                    self.load_times = list(pool.map(load_one, range(len(self))))
+            else:
+                self.load_times = [load_one(i) for i in range(len(self))]
+            data.flush()
+            del data
+
+            if self.verbose:
+                pct = self.latency_percentiles()
+                print(
+                    f"  Decoded {len(self)} images in {time.perf_counter() - start:.1f}s "
+                    f"({self.workers} workers) | per-image p50 {pct['p50']:.1f}ms, "
+                    f"p90 {pct['p90']:.1f}ms, p99 {pct['p99']:.1f}ms"
+                )
+        else:
+            open(tmp_path, "wb").close()
+        os.replace(tmp_path, self.data_path)
+
+        with open(self.index_path, "w") as f:
+            json.dump(
+                {
+                    "key": self.key,
+                    "version": CACHE_VERSION,
+                    "nbytes": self.nbytes,
+                    "names": [os.path.basename(p) for p in self.paths],
+                    "sizes": self.sizes,
+                },
+                f,
+            )
+
+    def latency_percentiles(self) -> dict:
+        """Per-image decode + resize latency of the last cold build, in milliseconds."""
+        if not self.load_times:
+            return {"p50": 0.0, "p90": 0.0, "p99": 0.0}
+        p50, p90, p99 = np.percentile(np.array(self.load_times) * 1000.0, [50, 90, 99])
+        return {"p50": float(p50), "p90": float(p90), "p99": float(p99)}
+
+    def prefetch(self, order: Sequence[int], depth: int = 8) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Yield (index, image) for each index in `order`, read ahead by a background thread.
+
+        At most `depth` images are held in the queue. Images are copied out of the
+        memory map in the worker so page faults happen off the training thread.
+        """
+        q: "queue.Queue[Optional[Tuple[int, np.ndarray]]]" = queue.Queue(maxsize=max(1, depth))
+        stop = threading.Event()
+        errors = []
+
+        def worker():
+            try:
+                for idx in order:
+                    if stop.is_set():
+                        return
+                    q.put((int(idx), np.array(self[int(idx)])))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                q.put(None)
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = q.get()
+                if item is None:
+                    if errors:
+                        raise errors[0]
+                    break
+                yield item
+        finally:
+            stop.set()
+            # Drain so a blocked worker can observe stop and exit
+            while thread.is_alive():
+                try:
+                    q.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            thread.join()
+
+
+def sample_order(num_images: int, num_steps: int, seed: Optional[int] = None) -> np.ndarray:
+    """Uniform random training image index for every step, drawn up front."""
+    if num_images <= 0:
+        raise ValueError("No training images to sample from")
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, num_images, num_steps)
@@ -0,0 +1,117 @@
+"""
+Append-only per-frame completion journal for resumable frame processing.
+
+One JSON object per line: a header with the job's parameters and a
+fingerprint of its input frames, then one record per finished frame. Lines
+are flushed as they are written, so a killed process loses at most the frame
+it was working on. A torn last line is dropped on load.
+
+A journal is only reused when its header matches the current run exactly;
+otherwise it is started over. Callers decide how to replay records.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Iterable, Optional
+
+JOURNAL_NAME = ".journal.jsonl"
+JOURNAL_VERSION = 1
+
+
+def input_fingerprint(paths: Iterable[Path]) -> str:
+    """Digest of every input file's name, size and mtime."""
+    h = hashlib.sha256()
+    for path in paths:
+        st = os.stat(path)
+        h.update(f"{Path(path).name}|{st.st_size}|{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+def output_matches(record: dict, path: Path, field: str = "bytes") -> bool:
+    """True if the output a record describes is still on disk with the byte size in record[field]."""
+    try:
+        return os.path.getsize(path) == record.get(field)
+    except OSError:
+        return False
+
+
+class FrameJournal:
+    """
+    Per-frame records of a processing job, keyed by frame name.
+
+    With resume=True, records from a previous run with an identical header
+    are loaded (the last record for a name wins); otherwise the file is
+    truncated and a new header written.
+    """
+
+    def __init__(self, path: Path, kind: str, params: dict, fingerprint: str, resume: bool = False):
+        self.path = Path(path)
+        # Round-trip through JSON so tuples and lists compare equal to what's on disk
+        self.header = json.loads(json.dumps(
+            {"journal": kind, "version": JOURNAL_VERSION, "params": params, "inputs": fingerprint},
+            sort_keys=True,
+        ))
+        self.records = {}
+
+        if resume and self.path.exists() and self._load():
+            self._file = open(self.path, "a")
+        else:
+            self.records = {}
+            self._file = open(self.path, "w")
+            self._write(self.header)
+
+    def _load(self) -> bool:
+        """Read records if the header matches; trims a torn trailing line. Returns False on mismatch."""
+        with open(self.path, "rb") as f:
+            lines = f.readlines()
+        if not lines:
+            return False
+        try:
+            if json.loads(lines[0]) != self.header:
+                return False
+        except json.JSONDecodeError:
+            return False
+        valid_bytes = len(lines[0])
+        for line in lines[1:]:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                break
+            self.records[record["name"]] = record
+            valid_bytes += len(line)
+        with open(self.path, "r+b") as f:
+            f.truncate(valid_bytes)
+        return True
+
+    def _write(self, obj: dict):
+        self._file.write(json.dumps(obj, sort_keys=True) + "\n")
+        self._file.flush()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.records
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def get(self, name: str) -> Optional[dict]:
+        return self.records.get(name)
+
+    def record(self, name: str, status: str, **fields) -> dict:
+        """Append a completion record for one frame."""
+        record = {"name": name, "status": status, **fields}
+        self._write(record)
+        self.records[name] = record
+        return record
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self) -> "FrameJournal":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
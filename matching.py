@@ -0,0 +1,213 @@
+"""
+Candidate image pairs for COLMAP feature matching.
+
+Exhaustive matching compares all N(N-1)/2 pairs, which dominates sparse
+reconstruction beyond a few hundred frames. For larger captures the pair
+list is built here instead and fed to COLMAP's `matches_importer`:
+
+- capture order: every frame against the next `window` frames, which keeps
+  the sequential chain intact, and
+- retrieval: every frame against its `neighbors` nearest frames anywhere in
+  the capture by 64-bit perceptual hash (see preprocess.perceptual_hash),
+  which recovers the loop-closure pairs — the same view on a later lap —
+  that sequential matching misses and exhaustive matching finds.
+
+For turntable orbits (see CAPTURE_RINGS.md) the lap period is detected from
+how hash distance varies with frame lag, and each frame is also paired with
+the same angle on the adjacent rings: frames i + period +- slack.
+
+That is O(N * (window + neighbors + 2 * slack + 1)) pairs instead of O(N^2).
+"""
+
+import time
+from pathlib import Path
+from typing import List, Optional, Set, Tuple
+
+import cv2
+import numpy as np
+
+from preprocess import perceptual_hash
+
+MATCHING_STRATEGIES = ["auto", "exhaustive", "pairs", "orbit"]
+EXHAUSTIVE_BELOW = 300  # "auto" stays exhaustive for captures smaller than this
+
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def resolve_strategy(strategy: str, num_frames: int, exhaustive_below: int = EXHAUSTIVE_BELOW) -> str:
+    """Map "auto" to "exhaustive" or "pairs" by frame count; validate the rest."""
+    if strategy not in MATCHING_STRATEGIES:
+        raise ValueError(f"Unknown matching strategy '{strategy}'. Supported: {', '.join(MATCHING_STRATEGIES)}.")
+    if strategy == "auto":
+        return "exhaustive" if num_frames < exhaustive_below else "pairs"
+    return strategy
+
+
+def frame_hashes(frames: List[Path]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Perceptual hash of every frame, decoded at quarter resolution.
+
+    Returns (hashes as uint64, valid) where valid is False for unreadable files.
+    """
+    hashes = np.zeros(len(frames), dtype=np.uint64)
+    valid = np.zeros(len(frames), dtype=bool)
+    for i, path in enumerate(frames):
+        # pHash works on a 32x32 thumbnail, so a reduced decode loses nothing
+        image = cv2.imread(str(path), cv2.IMREAD_REDUCED_COLOR_4)
+        if image is not None:
+            hashes[i] = perceptual_hash(image)
+            valid[i] = True
+    return hashes, valid
+
+
+def popcount64(values: np.ndarray) -> np.ndarray:
+    """Set bits of each uint64, as uint8."""
+    if hasattr(np, "bitwise_count"):  # numpy >= 2.0
+        return np.bitwise_count(values)
+    return _POPCOUNT8[values.view(np.uint8)].reshape(*values.shape, 8).sum(axis=-1, dtype=np.uint8)
+
+
+def sequential_pairs(num_frames: int, window: int) -> Set[Tuple[int, int]]:
+    """(i, j) for every frame and the next `window` frames after it."""
+    return {(i, j) for i in range(num_frames) for j in range(i + 1, min(i + window + 1, num_frames))}
+
+
+def retrieval_pairs(
+    hashes: np.ndarray,
+    neighbors: int,
+    valid: Optional[np.ndarray] = None,
+    min_gap: int = 0,
+    block: int = 1024,
+) -> Set[Tuple[int, int]]:
+    """
+    (i, j) with i < j for each frame and its `neighbors` nearest frames by
+    Hamming distance, ignoring frames within min_gap positions of it
+    (those are already paired by capture order).
+
+    Distances are computed a block of rows at a time to bound memory.
+    """
+    n = len(hashes)
+    if valid is None:
+        valid = np.ones(n, dtype=bool)
+    pairs = set()
+    k = min(neighbors, n - 1)
+    if k <= 0:
+        return pairs
+    index = np.arange(n)
+    for start in range(0, n, block):
+        rows = index[start:start + block]
+        dist = popcount64(hashes[rows, None] ^ hashes[None, :]).astype(np.int16)
+        excluded = (np.abs(rows[:, None] - index[None, :]) <= min_gap) | ~valid[None, :] | ~valid[rows, None]
+        dist[excluded] = 64 + 1
+        nearest = np.argpartition(dist, k - 1, axis=1)[:, :k]
+        for i, js in zip(rows, nearest):
+            for j in js:
+                if dist[i - start, j] <= 64:
+                    pairs.add((min(i, j), max(i, j)))
+    return pairs
+
+
+def lag_distances(hashes: np.ndarray, max_lag: int, valid: Optional[np.ndarray] = None) -> np.ndarray:
+    """d[L] = mean Hamming distance between frames i and i + L, for L in 0..max_lag."""
+    if valid is None:
+        valid = np.ones(len(hashes), dtype=bool)
+    d = np.zeros(max_lag + 1)
+    for lag in range(1, max_lag + 1):
+        both = valid[:-lag] & valid[lag:]
+        if both.any():
+            d[lag] = popcount64(hashes[:-lag][both] ^ hashes[lag:][both]).mean()
+    return d
+
+
+def detect_orbit_period(
+    hashes: np.ndarray,
+    valid: Optional[np.ndarray] = None,
+    min_laps: int = 2,
+    min_contrast: float = 0.25,
+) -> Optional[int]:
+    """
+    Frames per lap of a turntable orbit, or None if the capture isn't one.
+
+    The lag distance d[L] (see lag_distances) climbs as the view turns away
+    and levels off at a baseline (its median) once frames no longer overlap.
+    On an orbit it dips again when the next ring comes back to the same
+    angle. The period is the first local minimum past the climb that is
+    within 10% of the deepest dip; the dip must be at least min_contrast
+    below the baseline, so a walk-around or a single lap returns None.
+    """
+    max_lag = len(hashes) // min_laps
+    if max_lag < 4:
+        return None
+    d = lag_distances(hashes, max_lag, valid)
+    baseline = float(np.median(d[1:]))
+    # Skip the initial climb: lags where frames still overlap their neighbours
+    start = int(np.argmax(d[1:] >= baseline)) + 1
+    low = d[start:].min()
+    if low > (1.0 - min_contrast) * baseline:
+        return None
+    threshold = low + 0.1 * (baseline - low)
+    for lag in range(start, max_lag + 1):
+        if d[lag] <= threshold and (lag == max_lag or d[lag] <= d[lag + 1]):
+            return lag
+    return None
+
+
+def orbit_pairs(num_frames: int, period: int, slack: int = 3) -> Set[Tuple[int, int]]:
+    """(i, j) for every frame and frames period +- slack later: the same angle on the next ring."""
+    return {
+        (i, j)
+        for i in range(num_frames)
+        for j in range(max(i + 1, i + period - slack), min(i + period + slack + 1, num_frames))
+    }
+
+
+def select_pairs(
+    frames: List[Path],
+    window: int = 10,
+    neighbors: int = 10,
+    orbit: bool = True,
+    slack: int = 3,
+    orbit_only: bool = False,
+) -> Tuple[List[Tuple[str, str]], Optional[int]]:
+    """
+    Capture-order plus retrieval pairs of frame names, sorted, with the
+    adjacent-ring pairs of a detected orbit when orbit=True. With
+    orbit_only=True retrieval is skipped whenever an orbit is found.
+
+    Returns (pairs, orbit period or None).
+    """
+    hashes, valid = frame_hashes(frames)
+    pairs = sequential_pairs(len(frames), window)
+    period = detect_orbit_period(hashes, valid) if orbit or orbit_only else None
+    if period is not None:
+        pairs |= orbit_pairs(len(frames), period, slack)
+    if not (orbit_only and period is not None):
+        pairs |= retrieval_pairs(hashes, neighbors, valid=valid, min_gap=window)
+    return [(frames[i].name, frames[j].name) for i, j in sorted(pairs)], period
+
+
+def write_pair_list(pairs: List[Tuple[str, str]], path: Path) -> Path:
+    """Write pairs in COLMAP's matches_importer format: one "name1 name2" per line."""
+    path = Path(path)
+    with open(path, "w") as f:
+        for a, b in pairs:
+            f.write(f"{a} {b}\n")
+    return path
+
+
+def build_pair_list(frames: List[Path], path: Path, strategy: str = "pairs",
+                    window: int = 10, neighbors: int = 10) -> dict:
+    """
+    select_pairs() + write_pair_list(), timed.
+
+    strategy "pairs" uses capture order, retrieval and orbit pairs if an
+    orbit is detected; "orbit" uses capture order and orbit pairs only,
+    falling back to "pairs" when no orbit period is found.
+
+    Returns dict with pair_list (path), pairs (count), period and seconds.
+    """
+    start = time.perf_counter()
+    pairs, period = select_pairs(frames, window=window, neighbors=neighbors, orbit_only=strategy == "orbit")
+    write_pair_list(pairs, path)
+    return {"pair_list": str(path), "pairs": len(pairs), "period": period,
+            "seconds": round(time.perf_counter() - start, 3)}
@@ -0,0 +1,256 @@
+"""
+Merge fragmented COLMAP sparse models into one.
+
+When the mapper can't connect every frame it writes several sub-models, and
+reconstruct_sparse() would otherwise keep only the largest. Sub-models that
+register some of the same images can be brought into one frame: the camera
+centers of the shared images give point correspondences, a similarity
+transform (scale, rotation, translation; Umeyama's method) is fit on them,
+and the other model's cameras and points are mapped across.
+
+Merging starts from the model with the most registered images and keeps
+adding any remaining model that shares at least `min_shared` images with the
+merged result and aligns within `max_error` (RMS camera-center residual as a
+fraction of the merged scene's extent). Models that never qualify are left
+out and reported.
+
+Shared images keep the pose and 2D-3D links of the model they were first
+merged from. An incoming point that observes a shared image's keypoint
+already linked to a merged point is that same point: its other observations
+extend the merged point's track. Otherwise it is added as a new point if it
+still has two free observations.
+"""
+
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from colmap_io import (
+    qvec2rotmat,
+    read_cameras_binary,
+    read_images_binary,
+    read_points3D_full,
+    rotmat2qvec,
+    write_cameras_binary,
+    write_images_binary,
+    write_points3D_binary,
+)
+
+
+def load_model(model_dir: Path) -> Dict:
+    """Read cameras, images (with 2D points) and full points3D of a sparse model."""
+    model_dir = Path(model_dir)
+    return {
+        "cameras": read_cameras_binary(str(model_dir / "cameras.bin")),
+        "images": read_images_binary(str(model_dir / "images.bin"), with_points2D=True),
+        "points": read_points3D_full(str(model_dir / "points3D.bin")),
+    }
+
+
+def write_model(model: Dict, model_dir: Path) -> Path:
+    """Write a model dict (see load_model) as COLMAP binary files."""
+    model_dir = Path(model_dir)
+    model_dir.mkdir(parents=True, exist_ok=True)
+    write_cameras_binary(model["cameras"], str(model_dir / "cameras.bin"))
+    write_images_binary(model["images"], str(model_dir / "images.bin"))
+    write_points3D_binary(model["points"], str(model_dir / "points3D.bin"))
+    return model_dir
+
+
+def camera_center(image: Dict) -> np.ndarray:
+    """World position of a camera: -R^T t."""
+    return -qvec2rotmat(image["qvec"]).T @ image["tvec"]
+
+
+def similarity_transform(src: np.ndarray, dst: np.ndarray) -> Tuple[float, np.ndarray, np.ndarray]:
+    """
+    Least-squares (scale, R, t) with dst ~= scale * R @ src + t (Umeyama 1991).
+
+    src and dst are [N, 3] corresponding points, N >= 3 and not collinear.
+    """
+    mu_src, mu_dst = src.mean(axis=0), dst.mean(axis=0)
+    xs, xd = src - mu_src, dst - mu_dst
+    U, D, Vt = np.linalg.svd(xd.T @ xs / len(src))
+    S = np.eye(3)
+    if np.linalg.det(U) * np.linalg.det(Vt) < 0:
+        S[2, 2] = -1
+    R = U @ S @ Vt
+    scale = float(np.trace(np.diag(D) @ S) / (xs ** 2).sum(axis=1).mean())
+    t = mu_dst - scale * R @ mu_src
+    return scale, R, t
+
+
+def transform_model(model: Dict, scale: float, R: np.ndarray, t: np.ndarray) -> Dict:
+    """Model with points and cameras mapped by X -> scale * R @ X + t (projections unchanged)."""
+    images = {}
+    for img_id, img in model["images"].items():
+        R_img = qvec2rotmat(img["qvec"]) @ R.T
+        images[img_id] = {
+            **img,
+            "qvec": rotmat2qvec(R_img),
+            "tvec": scale * img["tvec"] - R_img @ t,
+        }
+    points = dict(model["points"])
+    points["xyz"] = scale * model["points"]["xyz"] @ R.T + t
+    return {"cameras": model["cameras"], "images": images, "points": points}
+
+
+def _alignment(merged: Dict, model: Dict, min_shared: int) -> Tuple[List[str], float, tuple]:
+    """Shared image names, relative RMS residual and (scale, R, t) aligning model onto merged."""
+    merged_centers = {img["name"]: camera_center(img) for img in merged["images"].values()}
+    model_centers = {img["name"]: camera_center(img) for img in model["images"].values()}
+    shared = sorted(set(merged_centers) & set(model_centers))
+    if len(shared) < max(min_shared, 3):
+        return shared, float("inf"), None
+    dst = np.array([merged_centers[n] for n in shared])
+    src = np.array([model_centers[n] for n in shared])
+    scale, R, t = similarity_transform(src, dst)
+    residual = np.sqrt(((scale * src @ R.T + t - dst) ** 2).sum(axis=1).mean())
+    all_centers = np.array(list(merged_centers.values()))
+    extent = np.linalg.norm(all_centers.max(axis=0) - all_centers.min(axis=0))
+    return shared, float(residual / max(extent, 1e-12)), (scale, R, t)
+
+
+def _absorb(merged: Dict, model: Dict) -> None:
+    """Add an already-aligned model's cameras, new images and points to merged, in place."""
+    camera_map = {}
+    for cam_id, cam in model["cameras"].items():
+        same = next((cid for cid, c in merged["cameras"].items()
+                     if c["model_id"] == cam["model_id"] and c["width"] == cam["width"]
+                     and c["height"] == cam["height"] and np.allclose(c["params"], cam["params"])), None)
+        if same is None:
+            same = max(merged["cameras"], default=0) + 1
+            merged["cameras"][same] = cam
+        camera_map[cam_id] = same
+
+    by_name = {img["name"]: img_id for img_id, img in merged["images"].items()}
+    image_map = {}
+    next_image = max(merged["images"], default=0) + 1
+    for img_id, img in model["images"].items():
+        if img["name"] in by_name:
+            image_map[img_id] = by_name[img["name"]]
+            continue
+        merged["images"][next_image] = {
+            **img,
+            "camera_id": camera_map[img["camera_id"]],
+            "point3D_ids": np.full(len(img["point3D_ids"]), -1, dtype=np.int64),
+        }
+        image_map[img_id] = next_image
+        next_image += 1
+
+    points = merged["points"]
+    next_point = int(points["ids"].max()) + 1 if len(points["ids"]) else 1
+    new = {"ids": [], "xyz": [], "rgb": [], "error": [], "track_lengths": [], "track": []}
+    extend = {}  # merged point id -> observations to append to its track
+    starts = np.cumsum(model["points"]["track_lengths"]) - model["points"]["track_lengths"]
+    for p in range(len(model["points"]["ids"])):
+        track = model["points"]["track"][starts[p]:starts[p] + model["points"]["track_lengths"][p]]
+        free, existing = [], set()
+        for image_id, point2D_idx in zip(track["image_id"], track["point2D_idx"]):
+            links = merged["images"][image_map[int(image_id)]]["point3D_ids"]
+            if point2D_idx >= len(links):
+                continue
+            if links[point2D_idx] == -1:
+                free.append((image_map[int(image_id)], int(point2D_idx)))
+            else:
+                existing.add(int(links[point2D_idx]))
+        if len(existing) == 1:
+            target = existing.pop()
+            for image_id, point2D_idx in free:
+                merged["images"][image_id]["point3D_ids"][point2D_idx] = target
+            extend.setdefault(target, []).extend(free)
+            continue
+        if len(free) < 2:
+            continue
+        for image_id, point2D_idx in free:
+            merged["images"][image_id]["point3D_ids"][point2D_idx] = next_point
+        new["ids"].append(next_point)
+        new["xyz"].append(model["points"]["xyz"][p])
+        new["rgb"].append(model["points"]["rgb"][p])
+        new["error"].append(model["points"]["error"][p])
+        new["track_lengths"].append(len(free))
+        new["track"].extend(free)
+        next_point += 1
+
+    track_dtype = points["track"].dtype
+    track = points["track"]
+    lengths = np.asarray(points["track_lengths"], dtype=np.int64).copy()
+    extend = {pid: obs for pid, obs in extend.items() if obs}
+    if extend:
+        # Append each extended point's observations at the end of its track segment
+        index_of = {int(pid): p for p, pid in enumerate(points["ids"])}
+        ends = np.cumsum(lengths)
+        positions = [ends[index_of[pid]] for pid, obs in extend.items() for _ in obs]
+        values = np.array([o for obs in extend.values() for o in obs], dtype=track_dtype)
+        track = np.insert(track, positions, values)
+        for pid, obs in extend.items():
+            lengths[index_of[pid]] += len(obs)
+
+    merged["points"] = {
+        "ids": np.concatenate([points["ids"], np.array(new["ids"], dtype=np.int64)]),
+        "xyz": np.concatenate([points["xyz"], np.array(new["xyz"]).reshape(-1, 3)]),
+        "rgb": np.concatenate([points["rgb"], np.array(new["rgb"], dtype=np.uint8).reshape(-1, 3)]),
+        "error": np.concatenate([points["error"], np.array(new["error"], dtype=np.float64)]),
+        "track_lengths": np.concatenate([lengths, np.array(new["track_lengths"], dtype=np.int64)]),
+        "track": np.concatenate([track, np.array(new["track"], dtype=track_dtype)]),
+    }
+
+
+def merge_models(
+    models: Dict[str, Dict],
+    min_shared: int = 3,
+    max_error: float = 0.05,
+) -> Tuple[Dict, dict]:
+    """
+    Merge sub-models (name -> load_model() dict) that overlap by image name.
+
+    Returns (merged model, report) where report has merged (names, in merge
+    order), skipped (names) and per-model alignment {shared, error, scale}.
+    """
+    if not models:
+        raise ValueError("No models to merge")
+    remaining = dict(models)
+    first = max(remaining, key=lambda name: len(remaining[name]["images"]))
+    base = remaining.pop(first)
+    # Copy what _absorb() mutates so the input models stay untouched
+    merged = {
+        "cameras": dict(base["cameras"]),
+        "images": {i: {**img, "point3D_ids": img["point3D_ids"].copy()} for i, img in base["images"].items()},
+        "points": dict(base["points"]),
+    }
+    report = {"merged": [first], "skipped": [], "alignments": {}}
+
+    progress = True
+    while remaining and progress:
+        progress = False
+        for name in sorted(remaining, key=lambda n: -len(remaining[n]["images"])):
+            shared, error, transform = _alignment(merged, remaining[name], min_shared)
+            report["alignments"][name] = {
+                "shared": len(shared),
+                "error": error,
+                "scale": transform[0] if transform else None,
+            }
+            if transform is None or error > max_error:
+                continue
+            _absorb(merged, transform_model(remaining.pop(name), *transform))
+            report["merged"].append(name)
+            progress = True
+
+    report["skipped"] = sorted(remaining)
+    return merged, report
+
+
+def merge_model_dirs(model_dirs: List[Path], output_dir: Path, min_shared: int = 3,
+                     max_error: float = 0.05) -> dict:
+    """
+    Load sub-model directories, merge them and write the result to output_dir.
+
+    Returns the merge_models() report plus output_dir and registered_images.
+    """
+    models = {Path(d).name: load_model(d) for d in model_dirs}
+    merged, report = merge_models(models, min_shared=min_shared, max_error=max_error)
+    write_model(merged, output_dir)
+    report["output_dir"] = str(output_dir)
+    report["registered_images"] = len(merged["images"])
+    return report
@@ -3,46 +3,125 @@ import argparse
 import shutil
 import zipfile
 from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
 import cv2
 import numpy as np
-from preprocess import preprocess_frames
-from segment import segment_frames, validate_segment_model, VALID_SEGMENT_MODELS
+from preprocess import content_bbox, mask_corners, preprocess_frames, preprocess_frame_stream
+from segment import segment_frames, validate_segment_model, SEGMENT_ENGINES, VALID_SEGMENT_MODELS
+from frame_analysis import analyze_frames
+from matching import MATCHING_STRATEGIES
 from reconstruct import detect_gpu, run_reconstruction
+from stage_cache import file_digest, run_stage, stage_key
 
 SEGMENT_MODEL_CHOICES = VALID_SEGMENT_MODELS
+EXTRACT_ENGINES = ("grab", "seek", "read")
 
-def extract_frames(video_path: Path, output_dir: Path, every_n_frames: int = 1) -> int:
-    """Extract frames from video file."""
+def probe_video(video_path: Path) -> dict:
+    """Read frame rate and frame count from the container header."""
+    cap = cv2.VideoCapture(str(video_path))
+    info = {
+        "fps": cap.get(cv2.CAP_PROP_FPS),
+        "frame_count": int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+    }
+    cap.release()
+    return info
+
+def iter_video_frames(
+    video_path: Path,
+    every_n_frames: int = 1,
+    engine: str = "grab",
+    seek_min_gap: int = 60,
+) -> Iterator[Tuple[str, np.ndarray]]:
+    """Decode a video and yield (frame name, BGR frame) for every Nth frame.
+
+    Names match what extract_frames() writes, so a streamed run produces the
+    same clean_frames/ file names as one that goes through raw_frames/.
+
+    Engines:
+        read - cap.read() every frame (decode + convert everything)
+        grab - cap.grab() skipped frames, only retrieve the kept ones
+        seek - jump straight to each kept frame when the gap is at least
+               seek_min_gap frames (decoder restarts at the previous
+               keyframe), grab() across shorter gaps. Seek accuracy depends
+               on the container; falls back to grab when the frame count
+               is unknown.
+    """
+    if engine not in EXTRACT_ENGINES:
+        raise ValueError(f"Unknown extraction engine '{engine}'. Supported: {', '.join(EXTRACT_ENGINES)}.")
     if not video_path.exists():
         raise FileNotFoundError(f"Video not found: {video_path}")
-        
-    output_dir.mkdir(parents=True, exist_ok=True)
-    
+
     cap = cv2.VideoCapture(str(video_path))
     if not cap.isOpened():
         raise RuntimeError(f"Could not open video: {video_path}")
-        
+
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    use_seek = engine == "seek" and frame_count > 0 and every_n_frames >= seek_min_gap
+
     count = 0
+    saved = 0
+    try:
+        while True:
+            if engine == "read" or count % every_n_frames == 0:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                if count % every_n_frames == 0:
+                    yield f"frame_{saved:06d}.png", frame
+                    saved += 1
+                count += 1
+                continue
+
+            # Skipped frame(s) up to the next kept one
+            target = count + (every_n_frames - count % every_n_frames)
+            if use_seek:
+                if target >= frame_count:
+                    break
+                cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+                count = target
+                continue
+            while count < target:
+                if not cap.grab():
+                    return
+                count += 1
+    finally:
+        cap.release()
+
+def extract_frames(video_path: Path, output_dir: Path, every_n_frames: int = 1, engine: str = "grab") -> int:
+    """Extract frames from video file."""
+    if not video_path.exists():
+        raise FileNotFoundError(f"Video not found: {video_path}")
+        
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
     saved = 0
     
     print(f"Extracting frames from {video_path.name}...")
     
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-            
-        if count % every_n_frames == 0:
-            frame_path = output_dir / f"frame_{saved:06d}.png"
-            cv2.imwrite(str(frame_path), frame)
-            saved += 1
-            
-        count += 1
+    for name, frame in iter_video_frames(video_path, every_n_frames, engine=engine):
+        cv2.imwrite(str(output_dir / name), frame)
+        saved += 1
         
-    cap.release()
     print(f"Extracted {saved} frames.")
     return saved
 
+def preprocess_video(video_path: Path, output_dir: Path, every_n_frames: int = 1,
+                     engine: str = "grab", **kwargs) -> dict:
+    """Stream decoded frames straight into preprocessing, skipping raw_frames/.
+
+    Only frames that survive the UI/blur/duplicate filters are encoded, once,
+    into output_dir. Keyword arguments go to preprocess_frame_stream().
+    """
+    info = probe_video(video_path)
+    expected = -(-info["frame_count"] // every_n_frames) if info["frame_count"] > 0 else None
+    print(f"Streaming frames from {video_path.name} (every {every_n_frames} frame(s))...")
+    return preprocess_frame_stream(
+        iter_video_frames(video_path, every_n_frames, engine=engine),
+        output_dir,
+        total=expected,
+        **kwargs,
+    )
+
 def mask_corner_artifacts(frames_dir: Path, margin: int = 80) -> int:
     """Zero out faint light artifacts in frame corners (Dreams rendering artifact)."""
     fixed = 0
@@ -50,48 +129,30 @@ def mask_corner_artifacts(frames_dir: Path, margin: int = 80) -> int:
         img = cv2.imread(str(f))
         if img is None:
             continue
-        h, w = img.shape[:2]
-        roi = img[h-margin:, w-margin*3:]
-        if np.any(roi > 0):
-            img[h-margin:, w-margin*3:] = 0
+        if mask_corners(img, margin):
             cv2.imwrite(str(f), img)
             fixed += 1
     return fixed
 
-def auto_crop_frames(frames_dir: Path, padding: float = 0.10, threshold: int = 3) -> dict:
-    """Crop all frames to the union bounding box of non-black content.
+def _union_crop_region(bboxes: Iterable, img_w: int, img_h: int, padding: float) -> Optional[dict]:
+    """Union of per-frame content boxes plus padding, clamped to the frame.
 
-    Scans every frame to find the maximum extent the object reaches,
-    then crops all frames to that region plus padding. Keeps dimensions
-    consistent across all frames (required for photogrammetry).
-
-    Returns dict with crop stats.
+    Returns None when there is no usable content box.
     """
-    files = sorted(frames_dir.glob("*.png"))
-    if not files:
-        return {"cropped": 0, "skipped": True}
-
-    # Pass 1: find union bounding box
     global_min_y, global_min_x = 99999, 99999
     global_max_y, global_max_x = 0, 0
-    img_h, img_w = 0, 0
 
-    for f in files:
-        img = cv2.imread(str(f))
-        if img is None:
+    for bbox in bboxes:
+        if bbox is None:
             continue
-        img_h, img_w = img.shape[:2]
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        coords = np.where(gray > threshold)
-        if len(coords[0]) == 0:
-            continue
-        global_min_y = min(global_min_y, coords[0].min())
-        global_max_y = max(global_max_y, coords[0].max())
-        global_min_x = min(global_min_x, coords[1].min())
-        global_max_x = max(global_max_x, coords[1].max())
+        min_x, min_y, max_x, max_y = bbox
+        global_min_y = min(global_min_y, min_y)
+        global_max_y = max(global_max_y, max_y)
+        global_min_x = min(global_min_x, min_x)
+        global_max_x = max(global_max_x, max_x)
 
     if global_min_y >= global_max_y or global_min_x >= global_max_x:
-        return {"cropped": 0, "skipped": True}
+        return None
 
     # Add padding
     obj_w = global_max_x - global_min_x
@@ -110,24 +171,92 @@ def auto_crop_frames(frames_dir: Path, padding: float = 0.10, threshold: int = 3
     cropped_pixels = crop_w * crop_h
     reduction = (original_pixels - cropped_pixels) / original_pixels
 
-    # Pass 2: crop all frames in-place
+    return {
+        "original_size": f"{img_w}x{img_h}",
+        "cropped_size": f"{crop_w}x{crop_h}",
+        "reduction_pct": round(reduction * 100, 1),
+        "crop_region": (x1, y1, x2, y2),
+    }
+
+def _rewrite_cropped(files: List[Path], region: dict, mask_margin: int = 0) -> Tuple[int, int]:
+    """Read each frame once, optionally mask its corner, crop and write it back.
+
+    Returns (frames cropped, frames with a masked corner artifact).
+    """
+    x1, y1, x2, y2 = region["crop_region"]
     cropped = 0
+    masked = 0
     for f in files:
         img = cv2.imread(str(f))
         if img is None:
             continue
-        cropped_img = img[y1:y2, x1:x2]
-        cv2.imwrite(str(f), cropped_img)
+        if mask_margin and mask_corners(img, mask_margin):
+            masked += 1
+        cv2.imwrite(str(f), img[y1:y2, x1:x2])
         cropped += 1
+    return cropped, masked
 
-    return {
-        "cropped": cropped,
-        "skipped": False,
-        "original_size": f"{img_w}x{img_h}",
-        "cropped_size": f"{crop_w}x{crop_h}",
-        "reduction_pct": round(reduction * 100, 1),
-        "crop_region": (x1, y1, x2, y2),
-    }
+def auto_crop_frames(frames_dir: Path, padding: float = 0.10, threshold: int = 3,
+                     mask_margin: int = 0) -> dict:
+    """Crop all frames to the union bounding box of non-black content.
+
+    Scans every frame to find the maximum extent the object reaches,
+    then crops all frames to that region plus padding. Keeps dimensions
+    consistent across all frames (required for photogrammetry).
+
+    With mask_margin > 0 the corner artifact mask is applied in the same
+    pass (bounding boxes are measured on the masked frame), giving the same
+    result as mask_corner_artifacts() followed by a plain auto-crop.
+
+    Returns dict with crop stats.
+    """
+    files = sorted(frames_dir.glob("*.png"))
+    if not files:
+        return {"cropped": 0, "skipped": True}
+
+    # Pass 1: find union bounding box
+    bboxes = []
+    img_h, img_w = 0, 0
+    for f in files:
+        img = cv2.imread(str(f))
+        if img is None:
+            continue
+        img_h, img_w = img.shape[:2]
+        if mask_margin:
+            mask_corners(img, mask_margin)
+        bboxes.append(content_bbox(img, threshold))
+
+    region = _union_crop_region(bboxes, img_w, img_h, padding)
+    if region is None:
+        if mask_margin:
+            mask_corner_artifacts(frames_dir, mask_margin)
+        return {"cropped": 0, "skipped": True}
+
+    # Pass 2: (mask and) crop all frames in-place
+    cropped, masked = _rewrite_cropped(files, region, mask_margin)
+    result = {"cropped": cropped, "skipped": False, **region}
+    if mask_margin:
+        result["artifacts_masked"] = masked
+    return result
+
+def crop_frames_to_union(frames_dir: Path, bboxes: dict, frame_size: Tuple[int, int],
+                         padding: float = 0.10) -> dict:
+    """Crop frames whose content boxes were already measured during preprocessing.
+
+    bboxes maps frame name -> content_bbox() result (see preprocess_frames
+    track_bbox), so this is a single read + write per frame. Same result as
+    auto_crop_frames() on the preprocessed directory.
+    """
+    if not bboxes or frame_size is None:
+        return {"cropped": 0, "skipped": True}
+
+    region = _union_crop_region(bboxes.values(), frame_size[0], frame_size[1], padding)
+    if region is None:
+        return {"cropped": 0, "skipped": True}
+
+    files = [frames_dir / name for name in sorted(bboxes)]
+    cropped, _ = _rewrite_cropped(files, region)
+    return {"cropped": cropped, "skipped": False, **region}
 
 def create_zip_archive(source_dir: Path, output_zip: Path):
     """Create a ZIP archive of the preprocessed frames."""
@@ -145,14 +274,29 @@ def main():
                         help='Processing mode: meshroom (detail), nerf (volumetric), or splat (AI-enhanced 3DGS)')
     parser.add_argument('--zip', action='store_true', help='Export clean frames as a ZIP archive')
     parser.add_argument('--fps', type=int, default=2, help='Frames per second to extract (default: 2)')
+    parser.add_argument('--stream', action='store_true',
+                        help='Decode video straight into preprocessing without writing raw_frames/')
+    parser.add_argument('--extract-engine', choices=EXTRACT_ENGINES, default='grab',
+                        help='Frame extraction: grab skips decoding unused frames, seek jumps between '
+                             'keyframes, read decodes everything (default: grab)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Preprocess frames in N worker processes (default: 1 = serial, ignored with --stream)')
     parser.add_argument('--sharpen', action='store_true', help='Enable image sharpening')
     parser.add_argument('--denoise', action='store_true', help='Enable denoising')
     parser.add_argument('--no-segment', action='store_true', help='Skip background removal')
     parser.add_argument('--no-duplicate-filter', action='store_true',
                         help='Skip duplicate detection (needed for black-background turntable captures)')
+    parser.add_argument('--global-dedup', action='store_true',
+                        help='Drop frames that repeat any kept view (perceptual hash), e.g. later orbit laps')
     parser.add_argument('--segment-model', default='u2net',
                         choices=['u2net', 'u2net_human_seg', 'isnet-general-use'],
                         help='Segmentation model (default: u2net)')
+    parser.add_argument('--segment-engine', default='rembg', choices=SEGMENT_ENGINES,
+                        help='Segmentation engine: rembg per frame, or batched onnxruntime (default: rembg)')
+    parser.add_argument('--segment-batch-size', type=int, default=4,
+                        help='Frames per inference run with --segment-engine onnx (default: 4)')
+    parser.add_argument('--segment-keyframes', type=int, default=1,
+                        help='Run segmentation on every Kth frame and propagate masks in between (default: 1)')
     parser.add_argument('--save-masks', action='store_true', help='Save segmentation masks for debugging')
     parser.add_argument('--mask-artifacts', action='store_true',
                         help='Zero out corner light artifacts (Dreams rendering bug)')
@@ -168,95 +312,45 @@ def main():
                         help='Skip local reconstruction, print cloud service instructions')
     parser.add_argument('--check-hardware', action='store_true',
                         help='Detect GPU/VRAM and recommend local vs cloud')
+    parser.add_argument('--matching', choices=MATCHING_STRATEGIES, default='auto',
+                        help='COLMAP pair selection: exhaustive, pairs, orbit or auto (default: auto)')
+    parser.add_argument('--merge-models', action='store_true',
+                        help='Merge COLMAP sub-models that share images instead of keeping only the largest')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Recompute every stage even if its inputs and parameters are unchanged')
 
     args = parser.parse_args()
     
     # 1. Setup paths
     raw_frames_dir = args.project_dir / "raw_frames"
     clean_frames_dir = args.project_dir / "clean_frames"
-    
+    segmented_frames_dir = args.project_dir / "segmented_frames"
+    use_cache = not args.no_cache
+
+    # Stage keys chain from the video bytes, so any change to the input or to a
+    # stage's parameters recomputes that stage and everything after it.
+    video_key = file_digest(args.video_path)
+
     # 2. Extract
-    # Check if we already have frames extracted to save time
-    existing_frames = list(raw_frames_dir.glob("*.png"))
-    if len(existing_frames) > 100:
-        print(f"\nFound {len(existing_frames)} existing frames in {raw_frames_dir}")
-        print("Skipping extraction step (delete folder to force re-extraction).")
+    # Calculate frame interval based on video FPS and target FPS
+    video_fps = probe_video(args.video_path)["fps"]
+    interval = max(1, int(video_fps / args.fps))
+    extract_params = {"every_n_frames": interval, "engine": args.extract_engine}
+    extract_key = stage_key("extract", extract_params, video_key)
+    if args.stream:
+        # Frames are decoded during preprocessing instead
+        print("\nStreaming mode: skipping raw_frames/ extraction.")
     else:
-        # Calculate frame interval based on video FPS and target FPS
-        cap = cv2.VideoCapture(str(args.video_path))
-        video_fps = cap.get(cv2.CAP_PROP_FPS)
-        cap.release()
-        interval = max(1, int(video_fps / args.fps))
-        extract_frames(args.video_path, raw_frames_dir, every_n_frames=interval)
-    
-    # 3. Preprocess
-    existing_clean = list(clean_frames_dir.glob("*.png"))
-    if len(existing_clean) > 100:
-        print(f"\nFound {len(existing_clean)} existing clean frames in {clean_frames_dir}")
-        print("Skipping preprocessing (delete folder to force re-run).")
-        final_frames_dir = clean_frames_dir
-        # Skip to segmentation
-        segmented_frames_dir = args.project_dir / "segmented_frames"
-        if not args.no_segment:
-            print(f"\nStarting background segmentation (model: {args.segment_model})...")
-            validated_model = None
-            try:
-                validated_model = validate_segment_model(args.segment_model)
-                seg_stats = segment_frames(
-                    input_dir=clean_frames_dir,
-                    output_dir=segmented_frames_dir,
-                    model_name=validated_model,
-                    save_masks=args.save_masks,
-                )
-            except ValueError as exc:
-                raise SystemExit(f"Background segmentation configuration error: {exc}") from exc
-            except Exception as exc:
-                model_info = validated_model or args.segment_model
-                raise RuntimeError(
-                    f"Background segmentation failed using model '{model_info}': {exc}"
-                ) from exc
-            print(f"Segmented {seg_stats['processed']}/{seg_stats['total']} frames")
-            final_frames_dir = segmented_frames_dir
-        zip_path = None
-        if args.zip or args.mode in ['nerf', 'splat']:
-            zip_path = args.project_dir / f"clean_frames_{args.mode}.zip"
-            create_zip_archive(final_frames_dir, zip_path)
-        if args.check_hardware:
-            gpu_info = detect_gpu()
-            print(f"\nHardware Detection:")
-            print(f"  GPU: {gpu_info['name']} ({gpu_info['vram_mb']}MB)" if gpu_info['has_nvidia']
-                  else "  GPU: None detected (CPU only)")
-            if gpu_info['has_nvidia'] and gpu_info['vram_mb'] >= 4000:
-                print("  Recommendation: Local reconstruction should work well.")
-            elif gpu_info['has_nvidia']:
-                print(f"  Recommendation: Sparse OK. Dense may need --cloud ({gpu_info['vram_mb']}MB VRAM).")
-            else:
-                print("  Recommendation: Use --cloud for GPU-accelerated reconstruction.")
-        if args.reconstruct or args.cloud:
-            gpu_info = detect_gpu()
-            recon_result = run_reconstruction(
-                frames_dir=final_frames_dir,
-                output_dir=args.project_dir,
-                mode=args.mode,
-                dense=args.dense,
-                cloud=args.cloud,
-                gpu_info=gpu_info,
-                zip_path=str(zip_path) if zip_path else None,
-            )
-            if recon_result.get("sparse", {}).get("ply_path"):
-                print(f"\nSparse point cloud: {recon_result['sparse']['ply_path']}")
-            if recon_result.get("dense", {}).get("ply_path"):
-                print(f"Dense point cloud: {recon_result['dense']['ply_path']}")
-        print("\nPipeline Complete!")
-        if args.mode == 'meshroom':
-            print(f"Ready for Meshroom / COLMAP: {final_frames_dir}")
-        else:
-            upload_target = f" / ZIP: {zip_path}" if zip_path else ""
-            print(f"Ready for KIRI Engine / Polycam / Google Colab (3DGS): {final_frames_dir}{upload_target}")
-        return
+        extract = run_stage(
+            "extract", raw_frames_dir, extract_params, video_key,
+            lambda: {"saved": extract_frames(args.video_path, raw_frames_dir, every_n_frames=interval,
+                                             engine=args.extract_engine)},
+            use_cache=use_cache,
+        )
+        if extract["cached"]:
+            print(f"\nReusing {extract['stats']['saved']} extracted frames in {raw_frames_dir} (stage cache)")
 
-    print(f"\nStarting preprocessing (Mode: {args.mode})...")
-    
+    # 3. Preprocess
     # Dreams-specific defaults
     # Meshroom: High threshold, needs sharp details
     # NeRF/Splat: Volumetric, more forgiving of blur
@@ -272,55 +366,93 @@ def main():
     if args.mode == 'meshroom' and (args.sharpen or args.denoise):
         print("Note: Applying AI filters for Meshroom (Experimental)")
 
-    stats = preprocess_frames(
-        input_dir=raw_frames_dir,
-        output_dir=clean_frames_dir,
+    filter_params = dict(
         skip_ui=True,
         skip_duplicates=not args.no_duplicate_filter,
         min_blur_score=min_blur,
         duplicate_threshold=duplicate_thresh,
         sharpen=use_sharpen,
-        denoise=use_denoise
+        denoise=use_denoise,
+        global_dedup=args.global_dedup,
+        # Corner masking and crop boxes are done as each kept frame is written
+        mask_margin=80 if args.mask_artifacts else 0,
+        track_bbox=not args.no_auto_crop,
     )
-    
-    # 3b. Mask corner artifacts
-    if args.mask_artifacts:
-        print("\nMasking corner light artifacts...")
-        n_fixed = mask_corner_artifacts(clean_frames_dir)
-        print(f"Fixed {n_fixed} frames with corner artifacts")
-
-    # 3c. Auto-crop to minimize black space
-    if not args.no_auto_crop:
-        print(f"\nAuto-cropping frames (padding: {args.crop_padding*100:.0f}%)...")
-        crop_stats = auto_crop_frames(clean_frames_dir, padding=args.crop_padding)
-        if crop_stats.get("skipped"):
-            print(f"  Auto-crop skipped (insufficient reduction)")
+    # Streaming and worker count don't change the output, so they are not part of the key
+    preprocess_params = dict(filter_params, crop_padding=None if args.no_auto_crop else args.crop_padding)
+
+    def run_preprocess() -> dict:
+        print(f"\nStarting preprocessing (Mode: {args.mode})...")
+        if args.stream:
+            stats = preprocess_video(args.video_path, output_dir=clean_frames_dir, every_n_frames=interval,
+                                     engine=args.extract_engine, **filter_params)
         else:
-            print(f"  Cropped {crop_stats['cropped']} frames: "
-                  f"{crop_stats['original_size']} -> {crop_stats['cropped_size']} "
-                  f"({crop_stats['reduction_pct']}% reduction)")
+            stats = preprocess_frames(input_dir=raw_frames_dir, output_dir=clean_frames_dir,
+                                      workers=args.workers, resume=True, **filter_params)
+
+        # 3b. Mask corner artifacts (applied while writing clean frames)
+        if args.mask_artifacts:
+            print(f"\nFixed {stats['artifacts_masked']} frames with corner artifacts")
+
+        # 3c. Auto-crop to minimize black space, using boxes measured during preprocessing
+        crop_stats = None
+        if not args.no_auto_crop:
+            print(f"\nAuto-cropping frames (padding: {args.crop_padding*100:.0f}%)...")
+            crop_stats = crop_frames_to_union(clean_frames_dir, stats['bboxes'], stats['frame_size'],
+                                              padding=args.crop_padding)
+            if crop_stats.get("skipped"):
+                print(f"  Auto-crop skipped (insufficient reduction)")
+            else:
+                print(f"  Cropped {crop_stats['cropped']} frames: "
+                      f"{crop_stats['original_size']} -> {crop_stats['cropped_size']} "
+                      f"({crop_stats['reduction_pct']}% reduction)")
+        return {"total": stats['total'], "kept": stats['kept'], "crop": crop_stats}
+
+    # Frame-by-frame journaling only exists for frames on disk, not the streaming path
+    preprocess = run_stage("preprocess", clean_frames_dir, preprocess_params, extract_key,
+                           run_preprocess, use_cache=use_cache, resumable=not args.stream)
+    if preprocess["cached"]:
+        print(f"\nReusing {preprocess['stats']['kept']} clean frames in {clean_frames_dir} (stage cache)")
 
     # 4. Background Segmentation
-    segmented_frames_dir = args.project_dir / "segmented_frames"
     if not args.no_segment:
-        print(f"\nStarting background segmentation (model: {args.segment_model})...")
-        validated_model = None
-        try:
-            validated_model = validate_segment_model(args.segment_model)
-            seg_stats = segment_frames(
-                input_dir=clean_frames_dir,
-                output_dir=segmented_frames_dir,
-                model_name=validated_model,
-                save_masks=args.save_masks,
-            )
-        except ValueError as exc:
-            raise SystemExit(f"Background segmentation configuration error: {exc}") from exc
-        except Exception as exc:
-            model_info = validated_model or args.segment_model
-            raise RuntimeError(
-                f"Background segmentation failed using model '{model_info}': {exc}"
-            ) from exc
-        print(f"Segmented {seg_stats['processed']}/{seg_stats['total']} frames")
+        segment_params = {
+            "model": args.segment_model,
+            "engine": args.segment_engine,
+            "batch_size": args.segment_batch_size,
+            "keyframe_interval": args.segment_keyframes,
+            "save_masks": args.save_masks,
+        }
+
+        def run_segment() -> dict:
+            print(f"\nStarting background segmentation (model: {args.segment_model})...")
+            validated_model = None
+            try:
+                validated_model = validate_segment_model(args.segment_model)
+                seg_stats = segment_frames(
+                    input_dir=clean_frames_dir,
+                    output_dir=segmented_frames_dir,
+                    model_name=validated_model,
+                    save_masks=args.save_masks,
+                    engine=args.segment_engine,
+                    batch_size=args.segment_batch_size,
+                    keyframe_interval=args.segment_keyframes,
+                    resume=True,
+                )
+            except ValueError as exc:
+                raise SystemExit(f"Background segmentation configuration error: {exc}") from exc
+            except Exception as exc:
+                model_info = validated_model or args.segment_model
+                raise RuntimeError(
+                    f"Background segmentation failed using model '{model_info}': {exc}"
+                ) from exc
+            return {"processed": seg_stats['processed'], "total": seg_stats['total']}
+
+        segment = run_stage("segment", segmented_frames_dir, segment_params, preprocess["key"],
+                            run_segment, use_cache=use_cache, resumable=True)
+        if segment["cached"]:
+            print(f"\nReusing segmented frames in {segmented_frames_dir} (stage cache)")
+        print(f"Segmented {segment['stats']['processed']}/{segment['stats']['total']} frames")
         final_frames_dir = segmented_frames_dir
     else:
         final_frames_dir = clean_frames_dir
@@ -346,6 +478,12 @@ def main():
             print("  Recommendation: Use --cloud for GPU-accelerated reconstruction.")
 
     # 7. Reconstruction (opt-in)
+    # Measured once here; run_reconstruction() reuses the cached analysis
+    frame_set = analyze_frames(final_frames_dir)
+    if frame_set["resolution"]:
+        print(f"\nFrame set: {frame_set['frame_count']} frames at "
+              f"{frame_set['resolution'][0]}x{frame_set['resolution'][1]}, "
+              f"{frame_set['detail_level']} detail, {frame_set['coverage_pct']}% coverage")
     if args.reconstruct or args.cloud:
         gpu_info = detect_gpu() if not args.check_hardware else gpu_info
         recon_result = run_reconstruction(
@@ -356,6 +494,8 @@ def main():
             cloud=args.cloud,
             gpu_info=gpu_info,
             zip_path=str(zip_path) if zip_path else None,
+            matching=args.matching,
+            merge_submodels=args.merge_models,
         )
         if recon_result.get("sparse", {}).get("ply_path"):
             print(f"\nSparse point cloud: {recon_result['sparse']['ply_path']}")
@@ -0,0 +1,156 @@
+"""
+Spatially even subsampling of the sparse point cloud that seeds training.
+
+train_gsplat caps the initial Gaussians at --max-points. A uniform random
+choice keeps the point density COLMAP happened to produce: well-textured
+regions stay crowded and thin or sparsely matched features lose most of
+their points. The samplers here spread the budget over space instead:
+
+- voxel: points are sorted once along a Morton (Z-order) curve over a
+  2^21 grid per axis. Because Morton cells nest, the number of occupied
+  cells at every coarser grid is a count of changes in the shifted codes,
+  so the finest grid with at most `max_points` occupied cells is found by
+  bisecting over levels, O(N) per probe with no re-sort. Every cell of that
+  grid keeps one point (the middle of its run along the curve, so an
+  interior point rather than a corner), and the remaining budget goes to
+  cells of the next finer grid, evenly spaced along the curve.
+- fps: farthest-point sampling, approximated by running it over a voxel
+  subsample of `candidates * max_points` points rather than the full cloud.
+  Slower than voxel but spreads points by true distance, not grid cells.
+- random: the original np.random.choice.
+
+All of them return sorted indices into the input, so points and colors (or
+anything else per point) are subsampled together.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+SUBSAMPLE_METHODS = ["voxel", "fps", "random"]
+MORTON_BITS = 21  # per axis: 63 bits of code
+
+
+def _spread_bits(v: np.ndarray) -> np.ndarray:
+    """Insert two zero bits between each of the low 21 bits of v."""
+    v = v.astype(np.uint64) & np.uint64(0x1FFFFF)
+    v = (v | v << np.uint64(32)) & np.uint64(0x1F00000000FFFF)
+    v = (v | v << np.uint64(16)) & np.uint64(0x1F0000FF0000FF)
+    v = (v | v << np.uint64(8)) & np.uint64(0x100F00F00F00F00F)
+    v = (v | v << np.uint64(4)) & np.uint64(0x10C30C30C30C30C3)
+    v = (v | v << np.uint64(2)) & np.uint64(0x1249249249249249)
+    return v
+
+
+def morton_codes(points: np.ndarray) -> np.ndarray:
+    """Z-order code (uint64) of each point on a 2^21 grid over the cloud's bounding cube."""
+    lo = points.min(axis=0)
+    extent = float((points.max(axis=0) - lo).max())
+    cells = (1 << MORTON_BITS) - 1
+    q = np.zeros(points.shape, dtype=np.int32)
+    if extent > 0:
+        # 21 bits fit int32, whose float conversion is vectorized (64-bit ones are not)
+        q = ((points - lo) * (cells / extent)).astype(np.int32)
+        np.minimum(q, cells, out=q)
+    return _spread_bits(q[:, 0]) | _spread_bits(q[:, 1]) << np.uint64(1) | _spread_bits(q[:, 2]) << np.uint64(2)
+
+
+def _cell_starts(codes: np.ndarray, shift: int) -> np.ndarray:
+    """Start index of each occupied cell in sorted codes, dropping the low `shift` bits."""
+    cells = codes >> np.uint64(shift)
+    return np.flatnonzero(np.r_[True, cells[1:] != cells[:-1]])
+
+
+def _middle_of_cells(starts: np.ndarray, n: int) -> np.ndarray:
+    """Index of the middle point along the curve of each cell beginning at starts."""
+    return starts + np.diff(np.r_[starts, n]) // 2
+
+
+def voxel_subsample(points: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Sorted indices of at most max_points points, one per occupied voxel.
+
+    Exactly max_points unless the cloud has fewer distinct positions.
+    """
+    n = len(points)
+    if n <= max_points:
+        return np.arange(n)
+    codes = morton_codes(points)
+    order = np.argsort(codes)
+    codes = codes[order]
+
+    fine = _cell_starts(codes, 0)
+    if len(fine) <= max_points:
+        # Duplicate positions: one point per distinct position is all there is
+        return np.sort(order[_middle_of_cells(fine, n)])
+    # Occupancy falls as cells grow: bisect for the finest level within budget
+    lo, hi = 0, MORTON_BITS  # level lo is over budget, level hi (one cell) is not
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if len(_cell_starts(codes, 3 * mid)) > max_points:
+            lo = mid
+        else:
+            hi = mid
+    fine, coarse = _cell_starts(codes, 3 * lo), _cell_starts(codes, 3 * hi)
+
+    # Every coarse cell keeps one fine cell; the rest of the budget is spread along the curve
+    keep = np.isin(fine, coarse, assume_unique=True)
+    rest = np.flatnonzero(~keep)
+    n_extra = max_points - len(coarse)
+    keep[rest[np.arange(n_extra) * len(rest) // max(n_extra, 1)]] = True
+
+    return np.sort(order[_middle_of_cells(fine, n)[keep]])
+
+
+def farthest_point_subsample(points: np.ndarray, max_points: int, candidates: int = 8) -> np.ndarray:
+    """
+    Sorted indices of max_points points chosen by farthest-point sampling.
+
+    Runs over a voxel subsample of candidates * max_points points, starting
+    from the candidate nearest the centroid, so the cost is
+    O(N + candidates * max_points^2) rather than O(N * max_points).
+    """
+    n = len(points)
+    if n <= max_points:
+        return np.arange(n)
+    pool = voxel_subsample(points, candidates * max_points)
+    if len(pool) <= max_points:
+        return pool
+    # The loop below dominates the runtime: keep it to in-place float32 ops on one
+    # contiguous row per axis, with no temporaries
+    P = np.ascontiguousarray((points[pool] - points[pool].mean(axis=0)).T, dtype=np.float32)
+    chosen = np.empty(max_points, dtype=np.int64)
+    chosen[0] = np.argmin((P * P).sum(axis=0))  # nearest the centroid
+    dist = np.full(P.shape[1], np.inf, dtype=np.float32)
+    d = np.empty_like(dist)
+    axis_d = np.empty_like(dist)
+    for k in range(1, max_points):
+        c = P[:, chosen[k - 1]]
+        np.subtract(P[0], c[0], out=d)
+        np.multiply(d, d, out=d)
+        for a in (1, 2):
+            np.subtract(P[a], c[a], out=axis_d)
+            np.multiply(axis_d, axis_d, out=axis_d)
+            d += axis_d
+        np.minimum(dist, d, out=dist)
+        chosen[k] = np.argmax(dist)
+    return np.sort(pool[chosen])
+
+
+def subsample_points(
+    points: np.ndarray,
+    max_points: int,
+    method: str = "voxel",
+    rng: Optional[np.random.Generator] = None,
+) -> np.ndarray:
+    """Sorted indices of at most max_points points, by one of SUBSAMPLE_METHODS."""
+    if method not in SUBSAMPLE_METHODS:
+        raise ValueError(f"Unknown subsample method '{method}'. Supported: {', '.join(SUBSAMPLE_METHODS)}.")
+    if len(points) <= max_points:
+        return np.arange(len(points))
+    if method == "voxel":
+        return voxel_subsample(points, max_points)
+    if method == "fps":
+        return farthest_point_subsample(points, max_points)
+    choice = rng.choice if rng is not None else np.random.choice
+    return np.sort(choice(len(points), max_points, replace=False))
@@ -15,12 +15,18 @@ import os
 import sys
 import shutil
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
 
 import cv2
 import numpy as np
 from tqdm import tqdm
 
+from journal import JOURNAL_NAME, FrameJournal, input_fingerprint, output_matches
+
 
 def detect_ui_overlay(image: np.ndarray, threshold: float = 0.15) -> bool:
     """
@@ -63,30 +69,106 @@ def calculate_blur_score(image: np.ndarray) -> float:
     return laplacian.var()
 
 
-def calculate_frame_similarity(frame1: np.ndarray, frame2: np.ndarray) -> float:
+def compute_frame_histogram(frame: np.ndarray) -> np.ndarray:
     """
-    Calculate similarity between two frames using histogram comparison.
-    Returns value between 0 (different) and 1 (identical).
+    Normalized hue-saturation histogram used for duplicate detection.
     """
     # Resize for faster comparison
-    size = (256, 256)
-    f1 = cv2.resize(frame1, size)
-    f2 = cv2.resize(frame2, size)
+    small = cv2.resize(frame, (256, 256))
     
     # Convert to HSV for better color comparison
-    hsv1 = cv2.cvtColor(f1, cv2.COLOR_BGR2HSV)
-    hsv2 = cv2.cvtColor(f2, cv2.COLOR_BGR2HSV)
+    hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
     
-    # Calculate histograms
-    hist1 = cv2.calcHist([hsv1], [0, 1], None, [50, 60], [0, 180, 0, 256])
-    hist2 = cv2.calcHist([hsv2], [0, 1], None, [50, 60], [0, 180, 0, 256])
-    
-    # Normalize
-    cv2.normalize(hist1, hist1, alpha=0, beta=1, norm_type=cv2.NORM_MINMAX)
-    cv2.normalize(hist2, hist2, alpha=0, beta=1, norm_type=cv2.NORM_MINMAX)
-    
-    # Compare using correlation
-    return cv2.compareHist(hist1, hist2, cv2.HISTCMP_CORREL)
+    hist = cv2.calcHist([hsv], [0, 1], None, [50, 60], [0, 180, 0, 256])
+    cv2.normalize(hist, hist, alpha=0, beta=1, norm_type=cv2.NORM_MINMAX)
+    return hist
+
+
+@dataclass(frozen=True, eq=False)
+class FrameSignature:
+    """
+    Compact stand-in for a frame in duplicate detection.
+
+    Holds the normalized H-S histogram (50x60 float32, ~12KB) so each frame's
+    histogram is computed once and the full-resolution image can be dropped.
+    """
+    hist: np.ndarray
+
+    @classmethod
+    def from_image(cls, image: np.ndarray) -> "FrameSignature":
+        return cls(compute_frame_histogram(image))
+
+    def similarity(self, other: "FrameSignature") -> float:
+        """Histogram correlation: 0 (different) to 1 (identical)."""
+        return cv2.compareHist(self.hist, other.hist, cv2.HISTCMP_CORREL)
+
+
+def calculate_frame_similarity(frame1: np.ndarray, frame2: np.ndarray) -> float:
+    """
+    Calculate similarity between two frames using histogram comparison.
+    Returns value between 0 (different) and 1 (identical).
+    """
+    return FrameSignature.from_image(frame1).similarity(FrameSignature.from_image(frame2))
+
+
+def perceptual_hash(image: np.ndarray) -> int:
+    """
+    64-bit DCT perceptual hash (pHash) of a frame.
+
+    Low-frequency structure of a 32x32 grayscale thumbnail, thresholded at
+    the median. Unlike the colour histogram it is sensitive to layout, so the
+    same view on a later orbit lap hashes close to the first one.
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8]
+    bits = (low > np.median(low)).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return (a ^ b).bit_count()
+
+
+class HammingIndex:
+    """
+    Multi-index hash table over 64-bit hashes for "anything within r bits?".
+
+    Each hash is split into max_distance + 1 disjoint bit chunks, and every
+    chunk gets its own exact-match table. Two hashes within max_distance
+    bits must agree exactly on at least one chunk (pigeonhole), so a query
+    only compares against the hashes sharing one of its chunk values instead
+    of scanning everything stored.
+    """
+
+    def __init__(self, max_distance: int = 6):
+        n_chunks = max_distance + 1
+        bounds = np.linspace(0, 64, n_chunks + 1).astype(int)
+        self.max_distance = max_distance
+        self._chunks = [(int(lo), (1 << int(hi - lo)) - 1) for lo, hi in zip(bounds[:-1], bounds[1:])]
+        self._tables = [{} for _ in self._chunks]
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, value: int) -> None:
+        """Insert a hash."""
+        self._size += 1
+        for (shift, mask), table in zip(self._chunks, self._tables):
+            table.setdefault((value >> shift) & mask, []).append(value)
+
+    def find_within(self, value: int, radius: Optional[int] = None) -> Optional[int]:
+        """Return a stored hash within `radius` bits of `value`, or None."""
+        radius = self.max_distance if radius is None else radius
+        if radius > self.max_distance:
+            raise ValueError(f"radius {radius} exceeds index max_distance {self.max_distance}")
+        for (shift, mask), table in zip(self._chunks, self._tables):
+            for candidate in table.get((value >> shift) & mask, ()):
+                if hamming_distance(value, candidate) <= radius:
+                    return candidate
+        return None
 
 
 def enhance_image(image: np.ndarray, sharpen: bool = True, denoise: bool = True) -> np.ndarray:
@@ -107,8 +189,137 @@ def enhance_image(image: np.ndarray, sharpen: bool = True, denoise: bool = True)
     return processed
 
 
-def preprocess_frames(
-    input_dir: Path,
+def mask_corners(image: np.ndarray, margin: int = 80) -> bool:
+    """
+    Zero the bottom-right corner in place (Dreams light artifact).
+
+    Returns True if anything non-black was cleared.
+    """
+    h, w = image.shape[:2]
+    roi = image[h-margin:, w-margin*3:]
+    if np.any(roi > 0):
+        roi[...] = 0
+        return True
+    return False
+
+
+def content_bbox(image: np.ndarray, threshold: int = 3) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Inclusive (min_x, min_y, max_x, max_y) of pixels brighter than threshold.
+
+    Returns None for an all-black frame. Works on a uint8 mask with
+    cv2.boundingRect rather than np.where, which would materialize int64
+    index arrays the size of the foreground.
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    _, mask = cv2.threshold(gray, threshold, 255, cv2.THRESH_BINARY)
+    x, y, w, h = cv2.boundingRect(mask)
+    if w == 0 or h == 0:
+        return None
+    return (x, y, x + w - 1, y + h - 1)
+
+
+def _finish_frame(image: np.ndarray, mask_margin: int, track_bbox: bool,
+                  bbox_threshold: int) -> Tuple[bool, Optional[Tuple[int, int, int, int]]]:
+    """Corner masking and bounding-box capture on a kept frame, just before it's written."""
+    masked = mask_corners(image, mask_margin) if mask_margin else False
+    bbox = content_bbox(image, bbox_threshold) if track_bbox else None
+    return masked, bbox
+
+
+def _new_stats(total: int, mask_margin: int, track_bbox: bool) -> dict:
+    stats = {
+        'total': total,
+        'ui_filtered': 0,
+        'blur_filtered': 0,
+        'duplicate_filtered': 0,
+        'global_duplicate_filtered': 0,
+        'blur_scores': [],
+        'kept': 0,
+        'errors': 0
+    }
+    if mask_margin:
+        stats['artifacts_masked'] = 0
+    if track_bbox:
+        # Per kept frame, for cropping to the union box without re-reading
+        stats['bboxes'] = {}
+        stats['frame_size'] = None
+    return stats
+
+
+def iter_frame_files(frames: Iterable[Path],
+                     skip: Callable[[str], bool] = lambda name: False
+                     ) -> Iterator[Tuple[str, Optional[np.ndarray]]]:
+    """
+    Decode frame files one at a time.
+
+    Yields (name, image) pairs; image is None when the file can't be read,
+    or without decoding for names where skip(name) is true.
+    """
+    for frame_path in frames:
+        if skip(frame_path.name):
+            yield frame_path.name, None
+        else:
+            yield frame_path.name, cv2.imread(str(frame_path))
+
+
+def _journal(journal: Optional[FrameJournal], name: str, status: str, **fields):
+    if journal is not None:
+        journal.record(name, status, **fields)
+
+
+def _record_done(journal: Optional[FrameJournal], output_dir: Path, name: str) -> Optional[dict]:
+    """
+    Journal record for a frame that needs no more work, or None.
+
+    A kept frame counts as done only if its output file is still the one
+    that was written (a crash mid-write or a later crop changes its size).
+    """
+    record = journal.get(name) if journal is not None else None
+    if record is None:
+        return None
+    if record['status'] == 'kept' and not output_matches(record, output_dir / name):
+        return None
+    return record
+
+
+def _replay_record(record: dict, stats: dict, kept_frames: List[str],
+                   kept_hashes: Optional[HammingIndex]):
+    """Apply a journaled frame decision to stats exactly as processing it would."""
+    status = record['status']
+    if status == 'error':
+        stats['errors'] += 1
+        return
+    if status == 'ui':
+        stats['ui_filtered'] += 1
+        return
+    stats['blur_scores'].append(record['blur_score'])
+    filtered = {'blur': 'blur_filtered', 'duplicate': 'duplicate_filtered',
+                'global_duplicate': 'global_duplicate_filtered'}
+    if status in filtered:
+        stats[filtered[status]] += 1
+        return
+    if record['masked']:
+        stats['artifacts_masked'] += 1
+    if 'bboxes' in stats:
+        bbox = record['bbox']
+        stats['bboxes'][record['name']] = tuple(bbox) if bbox is not None else None
+        stats['frame_size'] = tuple(record['size'])
+    stats['kept'] += 1
+    kept_frames.append(record['name'])
+    if kept_hashes is not None:
+        kept_hashes.add(record['phash'])
+
+
+def _kept_signature(image: np.ndarray, sharpen: bool, denoise: bool) -> "FrameSignature":
+    """Signature later frames are compared against once this source frame is kept."""
+    if sharpen or denoise:
+        image = enhance_image(image, sharpen=sharpen, denoise=denoise)
+    return FrameSignature.from_image(image)
+
+
+def preprocess_frame_stream(
+    frames: Iterable[Tuple[str, Optional[np.ndarray]]],
     output_dir: Path,
     skip_ui: bool = True,
     skip_duplicates: bool = True,
@@ -116,53 +327,67 @@ def preprocess_frames(
     duplicate_threshold: float = 0.98,
     sharpen: bool = False,
     denoise: bool = False,
-    verbose: bool = True
+    verbose: bool = True,
+    total: Optional[int] = None,
+    global_dedup: bool = False,
+    global_dedup_distance: int = 6,
+    mask_margin: int = 0,
+    track_bbox: bool = False,
+    bbox_threshold: int = 3,
+    journal: Optional[FrameJournal] = None,
+    source_frame: Optional[Callable[[str], Optional[np.ndarray]]] = None,
 ) -> dict:
     """
-    Process all frames in input directory and copy valid ones to output.
-    
+    Filter a stream of decoded frames and write the survivors to output.
+
+    `frames` yields (name, image) pairs in capture order — from disk via
+    iter_frame_files() or straight from a video decoder — so frames that get
+    filtered out are never encoded. `total` only sizes the progress bar.
+
+    global_dedup additionally drops frames whose perceptual hash is within
+    global_dedup_distance bits of any kept frame (not just the last one),
+    e.g. repeat views from later laps of a turntable orbit.
+
+    Kept frames can be finished in the same write: mask_margin > 0 zeroes the
+    corner light artifact (see mask_corners) and track_bbox records each
+    frame's content box in stats['bboxes'] so the pipeline can crop without
+    another full read.
+
+    With a journal, every frame decision is recorded as it is made, and frames
+    the journal already has are replayed into stats instead of processed.
+    Replaying needs source_frame(name) to re-derive the duplicate-check
+    signature of the last replayed kept frame.
+
     Returns dict with statistics about processing.
     """
-    input_dir = Path(input_dir)
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Get all image files
-    extensions = {'.png', '.jpg', '.jpeg'}
-    frames = sorted([
-        f for f in input_dir.iterdir()
-        if f.suffix.lower() in extensions
-    ])
-    
-    stats = {
-        'total': len(frames),
-        'ui_filtered': 0,
-        'blur_filtered': 0,
-        'duplicate_filtered': 0,
-        'blur_scores': [],
-        'kept': 0,
-        'errors': 0
-    }
-    
-    if verbose:
-        print(f"Processing {len(frames)} frames from {input_dir}")
-        if sharpen or denoise:
-            print(f"Enhancements: {'Sharpen ' if sharpen else ''}{'Denoise' if denoise else ''}")
-    
-    previous_frame = None
+
+    stats = _new_stats(0, mask_margin, track_bbox)
+
+    previous_signature = None
+    replayed_kept = None  # last kept frame taken from the journal, signature not yet rebuilt
     kept_frames = []
-    
-    for frame_path in tqdm(frames, disable=not verbose):
+    kept_hashes = HammingIndex(global_dedup_distance) if global_dedup else None
+
+    for name, image in tqdm(frames, total=total, disable=not verbose):
+        stats['total'] += 1
+        record = _record_done(journal, output_dir, name)
+        if record is not None:
+            _replay_record(record, stats, kept_frames, kept_hashes)
+            if record['status'] == 'kept':
+                replayed_kept = name
+            continue
         try:
-            # Read frame
-            image = cv2.imread(str(frame_path))
             if image is None:
                 stats['errors'] += 1
+                _journal(journal, name, 'error')
                 continue
             
             # Check for UI overlay
             if skip_ui and detect_ui_overlay(image):
                 stats['ui_filtered'] += 1
+                _journal(journal, name, 'ui')
                 continue
             
             # Check blur
@@ -171,34 +396,76 @@ def preprocess_frames(
             
             if blur_score < min_blur_score:
                 stats['blur_filtered'] += 1
+                _journal(journal, name, 'blur', blur_score=blur_score)
                 continue
             
             # Check for near-duplicates
-            if skip_duplicates and previous_frame is not None:
-                similarity = calculate_frame_similarity(image, previous_frame)
-                if similarity > duplicate_threshold:
-                    stats['duplicate_filtered'] += 1
+            signature = None
+            if skip_duplicates:
+                if replayed_kept is not None:
+                    previous_signature = _kept_signature(source_frame(replayed_kept), sharpen, denoise)
+                    replayed_kept = None
+                signature = FrameSignature.from_image(image)
+                if previous_signature is not None:
+                    similarity = signature.similarity(previous_signature)
+                    if similarity > duplicate_threshold:
+                        stats['duplicate_filtered'] += 1
+                        _journal(journal, name, 'duplicate', blur_score=blur_score)
+                        continue
+            
+            # Check against every kept frame
+            phash = None
+            if kept_hashes is not None:
+                phash = perceptual_hash(image)
+                if kept_hashes.find_within(phash, global_dedup_distance) is not None:
+                    stats['global_duplicate_filtered'] += 1
+                    _journal(journal, name, 'global_duplicate', blur_score=blur_score)
                     continue
             
             # Enhancement (Optional)
             if sharpen or denoise:
                 image = enhance_image(image, sharpen=sharpen, denoise=denoise)
+                if skip_duplicates:
+                    # Later frames are compared against the kept (enhanced) frame
+                    signature = FrameSignature.from_image(image)
+            
+            masked, bbox = _finish_frame(image, mask_margin, track_bbox, bbox_threshold)
             
             # Frame passed all checks - save to output
-            output_path = output_dir / frame_path.name
+            output_path = output_dir / name
             cv2.imwrite(str(output_path), image)
             
+            if masked:
+                stats['artifacts_masked'] += 1
+            if track_bbox:
+                stats['bboxes'][name] = bbox
+                stats['frame_size'] = (image.shape[1], image.shape[0])
             stats['kept'] += 1
-            kept_frames.append(frame_path.name)
-            previous_frame = image
+            kept_frames.append(name)
+            previous_signature = signature
+            replayed_kept = None
+            if kept_hashes is not None:
+                kept_hashes.add(phash)
+            _journal(journal, name, 'kept', blur_score=blur_score, phash=phash, masked=masked,
+                     bbox=bbox, size=(image.shape[1], image.shape[0]),
+                     bytes=output_path.stat().st_size)
             
         except Exception as e:
             if verbose:
-                print(f"Error processing {frame_path.name}: {e}")
+                print(f"Error processing {name}: {e}")
             stats['errors'] += 1
+            _journal(journal, name, 'error')
     
-    # Write manifest of kept frames
-    manifest_path = output_dir / 'frames_manifest.txt'
+    write_manifest(output_dir, stats, kept_frames, sharpen=sharpen, denoise=denoise,
+                   global_dedup=global_dedup)
+    return stats
+
+
+def write_manifest(output_dir: Path, stats: dict, kept_frames: List[str],
+                   sharpen: bool = False, denoise: bool = False,
+                   global_dedup: bool = False) -> Path:
+    """Write frames_manifest.txt listing the kept frames and filter counts."""
+    manifest_path = Path(output_dir) / 'frames_manifest.txt'
     with open(manifest_path, 'w') as f:
         f.write(f"# Preprocessed frames for photogrammetry\n")
         f.write(f"# Total: {stats['kept']} frames\n")
@@ -208,14 +475,301 @@ def preprocess_frames(
             avg_blur = sum(stats['blur_scores']) / len(stats['blur_scores'])
             f.write(f"# Average Blur Score: {avg_blur:.2f}\n")
         f.write(f"# Duplicate filtered: {stats['duplicate_filtered']}\n")
+        if global_dedup:
+            f.write(f"# Global duplicate filtered: {stats['global_duplicate_filtered']}\n")
         f.write(f"# Sharpen: {sharpen}\n")
         f.write(f"# Denoise: {denoise}\n\n")
         for frame in kept_frames:
             f.write(f"{frame}\n")
-    
+    return manifest_path
+
+
+CANDIDATE_DIR = ".candidates"  # scratch subdirectory of output_dir for the parallel path
+
+
+def _score_frame(
+    frame_path: Path,
+    skip_ui: bool,
+    skip_duplicates: bool,
+    min_blur_score: float,
+    sharpen: bool,
+    denoise: bool,
+    global_dedup: bool,
+    candidate_dir: Path,
+    mask_margin: int,
+    track_bbox: bool,
+    bbox_threshold: int,
+) -> dict:
+    """
+    Filter features for one frame, and the frame as it would be kept (runs in
+    a worker process).
+
+    Everything except the duplicate checks is independent of other frames.
+    A frame that passes UI and blur filtering is a candidate: its signature
+    is returned, along with the signature of the frame as kept (enhanced, if
+    enhancement is on), which the serial path compares the next candidate
+    against. The candidate is also enhanced, finished and written to
+    candidate_dir, so keeping it later is a rename. A failed write is
+    returned as 'write_error', not raised: the frame is only an error if the
+    duplicate checks would have kept it.
+    """
+    try:
+        image = cv2.imread(str(frame_path))
+        if image is None:
+            return {'status': 'error'}
+        if skip_ui and detect_ui_overlay(image):
+            return {'status': 'ui'}
+        blur_score = calculate_blur_score(image)
+        if blur_score < min_blur_score:
+            return {'status': 'blur', 'blur_score': blur_score}
+        result = {'status': 'candidate', 'blur_score': blur_score}
+        if global_dedup:
+            result['phash'] = perceptual_hash(image)
+        if skip_duplicates:
+            result['signature'] = FrameSignature.from_image(image)
+        if sharpen or denoise:
+            image = enhance_image(image, sharpen=sharpen, denoise=denoise)
+        if skip_duplicates:
+            result['kept_signature'] = FrameSignature.from_image(image)
+        masked, bbox = _finish_frame(image, mask_margin, track_bbox, bbox_threshold)
+        result.update(candidate=Path(candidate_dir) / frame_path.name, masked=masked, bbox=bbox,
+                      size=(image.shape[1], image.shape[0]))
+        if not cv2.imwrite(str(result['candidate']), image):
+            result['write_error'] = f"Could not write {result['candidate']}"
+        return result
+    except Exception as e:
+        return {'status': 'error', 'message': str(e)}
+
+
+def _drop_candidate(result: dict) -> None:
+    """Delete a filtered candidate's scratch file, if it was written."""
+    if 'candidate' in result:
+        result['candidate'].unlink(missing_ok=True)
+
+
+def _preprocess_parallel(
+    frames: List[Path],
+    output_dir: Path,
+    workers: int,
+    skip_ui: bool,
+    skip_duplicates: bool,
+    min_blur_score: float,
+    duplicate_threshold: float,
+    sharpen: bool,
+    denoise: bool,
+    verbose: bool,
+    global_dedup: bool,
+    global_dedup_distance: int,
+    mask_margin: int,
+    track_bbox: bool,
+    bbox_threshold: int,
+    journal: Optional[FrameJournal] = None,
+) -> dict:
+    """
+    Process-pool version of preprocess_frame_stream() for frames on disk.
+
+    1. Workers score every frame (UI, blur, signatures) in parallel and write
+       each candidate, enhanced and finished, to output_dir/.candidates.
+    2. A sequential pass chains the duplicate checks through the kept frames,
+       using the precomputed signatures, and renames kept candidates into
+       place (deleting the rest) in frame order — same decisions as the
+       serial path, including a frame whose write failed not counting as kept.
+
+    Frames the journal already has are replayed instead of scored. Every
+    frame is journaled in step 2. The scratch directory is removed when done.
+    """
+    output_dir = Path(output_dir)
+    candidate_dir = output_dir / CANDIDATE_DIR
+    candidate_dir.mkdir(parents=True, exist_ok=True)
+
+    stats = _new_stats(len(frames), mask_margin, track_bbox)
+    kept_frames = []  # kept frames taken from the journal or kept now, in order
+    kept_hashes = HammingIndex(global_dedup_distance) if global_dedup else None
+    done = {f.name: _record_done(journal, output_dir, f.name) for f in frames}
+    pending = [f for f in frames if done[f.name] is None]
+
+    score = partial(
+        _score_frame,
+        skip_ui=skip_ui,
+        skip_duplicates=skip_duplicates,
+        min_blur_score=min_blur_score,
+        sharpen=sharpen,
+        denoise=denoise,
+        global_dedup=global_dedup,
+        candidate_dir=candidate_dir,
+        mask_margin=mask_margin,
+        track_bbox=track_bbox,
+        bbox_threshold=bbox_threshold,
+    )
+    chunksize = max(1, len(pending) // (workers * 8))
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            previous_signature = None
+            replayed_kept = None
+            results = pool.map(score, pending, chunksize=chunksize)
+            for frame_path in tqdm(frames, disable=not verbose, desc="Processing"):
+                name = frame_path.name
+                record = done[name]
+                if record is not None:
+                    _replay_record(record, stats, kept_frames, kept_hashes)
+                    if record['status'] == 'kept':
+                        replayed_kept = frame_path
+                    continue
+                result = next(results)
+                status = result['status']
+                if status == 'error':
+                    if verbose and 'message' in result:
+                        print(f"Error processing {name}: {result['message']}")
+                    stats['errors'] += 1
+                    _journal(journal, name, 'error')
+                    continue
+                if status == 'ui':
+                    stats['ui_filtered'] += 1
+                    _journal(journal, name, 'ui')
+                    continue
+                blur_score = result['blur_score']
+                stats['blur_scores'].append(blur_score)
+                if status == 'blur':
+                    stats['blur_filtered'] += 1
+                    _journal(journal, name, 'blur', blur_score=blur_score)
+                    continue
+                if skip_duplicates and replayed_kept is not None:
+                    previous_signature = _kept_signature(cv2.imread(str(replayed_kept)), sharpen, denoise)
+                    replayed_kept = None
+                if skip_duplicates and previous_signature is not None:
+                    similarity = result['signature'].similarity(previous_signature)
+                    if similarity > duplicate_threshold:
+                        stats['duplicate_filtered'] += 1
+                        _drop_candidate(result)
+                        _journal(journal, name, 'duplicate', blur_score=blur_score)
+                        continue
+                phash = result.get('phash')
+                if kept_hashes is not None:
+                    if kept_hashes.find_within(phash, global_dedup_distance) is not None:
+                        stats['global_duplicate_filtered'] += 1
+                        _drop_candidate(result)
+                        _journal(journal, name, 'global_duplicate', blur_score=blur_score)
+                        continue
+
+                output_path = output_dir / name
+                try:
+                    if 'write_error' in result:
+                        raise IOError(result['write_error'])
+                    result['candidate'].replace(output_path)
+                except Exception as e:
+                    if verbose:
+                        print(f"Error processing {name}: {e}")
+                    stats['errors'] += 1
+                    _drop_candidate(result)
+                    _journal(journal, name, 'error')
+                    continue
+
+                if result['masked']:
+                    stats['artifacts_masked'] += 1
+                if track_bbox:
+                    stats['bboxes'][name] = result['bbox']
+                    stats['frame_size'] = result['size']
+                kept_frames.append(name)
+                if skip_duplicates:
+                    previous_signature = result['kept_signature']
+                replayed_kept = None
+                if kept_hashes is not None:
+                    kept_hashes.add(phash)
+                _journal(journal, name, 'kept', blur_score=blur_score, phash=phash, masked=result['masked'],
+                         bbox=result['bbox'], size=result['size'], bytes=output_path.stat().st_size)
+    finally:
+        shutil.rmtree(candidate_dir, ignore_errors=True)
+
+    stats['kept'] = len(kept_frames)
+    write_manifest(output_dir, stats, kept_frames, sharpen=sharpen, denoise=denoise,
+                   global_dedup=global_dedup)
     return stats
 
 
+def preprocess_frames(
+    input_dir: Path,
+    output_dir: Path,
+    skip_ui: bool = True,
+    skip_duplicates: bool = True,
+    min_blur_score: float = 100.0,
+    duplicate_threshold: float = 0.98,
+    sharpen: bool = False,
+    denoise: bool = False,
+    verbose: bool = True,
+    workers: int = 1,
+    global_dedup: bool = False,
+    global_dedup_distance: int = 6,
+    mask_margin: int = 0,
+    track_bbox: bool = False,
+    bbox_threshold: int = 3,
+    resume: bool = False,
+) -> dict:
+    """
+    Process all frames in input directory and copy valid ones to output.
+    
+    With workers > 1, per-frame scoring and writing run in a process pool;
+    the kept set is the same as the serial path. See preprocess_frame_stream()
+    for global_dedup, mask_margin and track_bbox.
+    
+    Each frame decision is journaled to output_dir/.journal.jsonl. With
+    resume=True, a journal left by an interrupted run with the same
+    parameters and input frames is picked up: finished frames are skipped
+    and the output and stats are the same as an uninterrupted run.
+    
+    Returns dict with statistics about processing.
+    """
+    input_dir = Path(input_dir)
+    
+    # Get all image files
+    extensions = {'.png', '.jpg', '.jpeg'}
+    frames = sorted([
+        f for f in input_dir.iterdir()
+        if f.suffix.lower() in extensions
+    ])
+    
+    if verbose:
+        print(f"Processing {len(frames)} frames from {input_dir}")
+        if sharpen or denoise:
+            print(f"Enhancements: {'Sharpen ' if sharpen else ''}{'Denoise' if denoise else ''}")
+        if workers > 1:
+            print(f"Workers: {workers}")
+    
+    options = dict(
+        skip_ui=skip_ui,
+        skip_duplicates=skip_duplicates,
+        min_blur_score=min_blur_score,
+        duplicate_threshold=duplicate_threshold,
+        sharpen=sharpen,
+        denoise=denoise,
+        verbose=verbose,
+        global_dedup=global_dedup,
+        global_dedup_distance=global_dedup_distance,
+        mask_margin=mask_margin,
+        track_bbox=track_bbox,
+        bbox_threshold=bbox_threshold,
+    )
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    params = {k: v for k, v in options.items() if k != 'verbose'}
+    with FrameJournal(output_dir / JOURNAL_NAME, 'preprocess', params,
+                      input_fingerprint(frames), resume=resume) as journal:
+        if verbose and len(journal):
+            print(f"Resuming: {len(journal)} frames already journaled")
+        # Candidates left by a killed parallel run, whichever path resumes it
+        shutil.rmtree(output_dir / CANDIDATE_DIR, ignore_errors=True)
+        if workers > 1:
+            return _preprocess_parallel(frames, output_dir, workers, journal=journal, **options)
+        return preprocess_frame_stream(
+            iter_frame_files(frames, skip=lambda name: _record_done(journal, output_dir, name) is not None),
+            output_dir,
+            total=len(frames),
+            journal=journal,
+            source_frame=lambda name: cv2.imread(str(input_dir / name)),
+            **options,
+        )
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Preprocess Dreams footage for photogrammetry'
@@ -252,6 +806,17 @@ def main():
         default=0.98,
         help='Similarity threshold for duplicate detection (0-1)'
     )
+    parser.add_argument(
+        '--global-dedup',
+        action='store_true',
+        help='Also drop frames whose perceptual hash matches any kept frame (repeat orbit laps)'
+    )
+    parser.add_argument(
+        '--global-dedup-distance',
+        type=int,
+        default=6,
+        help='Max Hamming distance (of 64 bits) for a global duplicate (default 6)'
+    )
     parser.add_argument(
         '--sharpen',
         action='store_true',
@@ -262,6 +827,17 @@ def main():
         action='store_true',
         help='Enable denoising'
     )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Score and write frames in N worker processes (default 1 = serial)'
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Continue an interrupted run from the journal in output_dir'
+    )
     
     args = parser.parse_args()
     
@@ -277,7 +853,11 @@ def main():
         min_blur_score=args.min_blur_score,
         duplicate_threshold=args.duplicate_threshold,
         sharpen=args.sharpen,
-        denoise=args.denoise
+        denoise=args.denoise,
+        workers=args.workers,
+        global_dedup=args.global_dedup,
+        global_dedup_distance=args.global_dedup_distance,
+        resume=args.resume
     )
     
     print("\n" + "=" * 60)
@@ -287,6 +867,8 @@ def main():
     print(f"UI filtered:       {stats['ui_filtered']}")
     print(f"Blur filtered:     {stats['blur_filtered']}")
     print(f"Duplicate filtered: {stats['duplicate_filtered']}")
+    if args.global_dedup:
+        print(f"Global duplicates: {stats['global_duplicate_filtered']}")
     print(f"Errors:            {stats['errors']}")
     print(f"Frames kept:       {stats['kept']}")
     if stats['blur_scores']:
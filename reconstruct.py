@@ -17,12 +17,17 @@ Usage (via pipeline):
 import argparse
 import shutil
 import subprocess
+import time
 from pathlib import Path
 from typing import Optional
 
-import cv2
 import numpy as np
 
+from colmap_io import inspect_model
+from frame_analysis import analyze_frames
+from matching import EXHAUSTIVE_BELOW, MATCHING_STRATEGIES, build_pair_list, resolve_strategy
+from model_merge import merge_model_dirs
+
 
 def assess_detail_level(frames_dir: Path, sample_count: int = 10) -> dict:
     """Sample frames and measure Laplacian variance to assess detail level.
@@ -32,51 +37,11 @@ def assess_detail_level(frames_dir: Path, sample_count: int = 10) -> dict:
     Low-detail / soft flecks: variance < 5
 
     Returns dict with avg_variance, detail_level ('high'/'medium'/'low'),
-    and recommended SIFT parameters.
+    coverage_pct, frame_count, resolution and frames. Cached per directory
+    contents (see frame_analysis.analyze_frames), so repeated calls on the
+    same frames don't decode them again.
     """
-    extensions = {".png", ".jpg", ".jpeg"}
-    frames = sorted(f for f in Path(frames_dir).iterdir() if f.suffix.lower() in extensions)
-    if not frames:
-        return {"avg_variance": 0, "detail_level": "unknown", "sample_count": 0}
-
-    # Sample evenly across the sequence
-    step = max(1, len(frames) // sample_count)
-    sample = frames[::step][:sample_count]
-
-    variances = []
-    coverages = []
-    for f in sample:
-        img = cv2.imread(str(f), cv2.IMREAD_GRAYSCALE)
-        if img is None:
-            continue
-        # Only measure non-black pixels (Dreams frames are mostly black background)
-        mask = img > 10
-        if mask.sum() < 100:
-            continue
-        coverages.append(mask.sum() / mask.size * 100)
-        lap = cv2.Laplacian(img, cv2.CV_64F)
-        # Variance of Laplacian in the object region only
-        variances.append(lap[mask].var())
-
-    if not variances:
-        return {"avg_variance": 0, "detail_level": "unknown", "sample_count": 0, "coverage_pct": 0}
-
-    avg_var = float(np.mean(variances))
-    avg_coverage = float(np.mean(coverages)) if coverages else 0
-
-    if avg_var >= 15:
-        detail_level = "high"
-    elif avg_var >= 5:
-        detail_level = "medium"
-    else:
-        detail_level = "low"
-
-    return {
-        "avg_variance": round(avg_var, 2),
-        "detail_level": detail_level,
-        "sample_count": len(variances),
-        "coverage_pct": round(avg_coverage, 1),
-    }
+    return analyze_frames(frames_dir, sample_count)
 
 
 def _get_sift_params(detail_level: str, coverage_pct: float = 100.0) -> dict:
@@ -167,16 +132,48 @@ def find_colmap() -> Optional[str]:
     return None
 
 
+def inspect_models(model_dirs) -> dict:
+    """inspect_model() for each sub-model directory; unreadable ones are skipped."""
+    models = {}
+    for d in model_dirs:
+        try:
+            models[d.name] = inspect_model(d)
+        except (OSError, ValueError) as e:
+            print(f"  Skipping model {d.name}: {e}")
+    return models
+
+
+def select_best_model(models: dict) -> Optional[str]:
+    """Name of the sub-model with the most registered images (ties: most points)."""
+    if not models:
+        return None
+    return max(models, key=lambda name: (models[name]["registered_images"], models[name]["points"]))
+
+
 def reconstruct_sparse(
     frames_dir: Path,
     output_dir: Path,
     colmap_bin: str,
     mode: str,
     gpu_info: dict,
+    matching: str = "auto",
+    exhaustive_below: int = EXHAUSTIVE_BELOW,
+    merge_submodels: bool = False,
 ) -> dict:
     """Run COLMAP sparse reconstruction with Dreams-tuned parameters.
 
-    Returns dict with paths and stats.
+    matching picks how image pairs are chosen (see matching.py): "exhaustive"
+    matches every pair, "pairs" imports a capture-order + retrieval pair list
+    (plus adjacent-ring pairs when a turntable orbit is detected), "orbit"
+    uses capture-order + adjacent-ring pairs only, and "auto" is exhaustive
+    below exhaustive_below frames and "pairs" above.
+
+    With merge_submodels, sub-models that share images are aligned and merged
+    into sparse/merged (see model_merge.py), which is exported when it
+    registers more images than the best single sub-model.
+
+    Returns dict with paths and stats, including the matching strategy,
+    pair count and per-step timings in seconds.
     """
     output_dir.mkdir(parents=True, exist_ok=True)
     database_path = output_dir / "database.db"
@@ -195,6 +192,8 @@ def reconstruct_sparse(
     print(f"  SIFT: peak={sift['peak_threshold']}, edge={sift['edge_threshold']}, "
           f"octave={sift['first_octave']}, max_features={sift['max_num_features']}")
 
+    timings = {}
+    step_start = time.perf_counter()
     print("  [1/4] Extracting features...")
     subprocess.run([
         colmap_bin, "feature_extractor",
@@ -208,20 +207,46 @@ def reconstruct_sparse(
         "--SiftExtraction.use_gpu", use_gpu,
     ], check=True)
 
-    # Always use exhaustive matching for Dreams content.
+    timings["features"] = round(time.perf_counter() - step_start, 2)
+
+    # Never plain sequential matching for Dreams content.
     # Sequential matching breaks the chain when feature-sparse frames can't bridge gaps,
     # producing disconnected sub-models. Exhaustive compares all pairs and finds connections
     # regardless of capture order. Proven in custom_pipeline.py (110k point cloud).
-    # GPU-accelerated, ~2-5 min for 800 frames on GTX 1650.
-    num_frames = len(list(Path(frames_dir).glob("*.png"))) + len(list(Path(frames_dir).glob("*.jpg")))
-    print(f"  [2/4] Matching features (exhaustive, {num_frames} frames)...")
-    subprocess.run([
-        colmap_bin, "exhaustive_matcher",
-        "--database_path", str(database_path),
-        "--SiftMatching.use_gpu", use_gpu,
-    ], check=True)
+    # GPU-accelerated, ~2-5 min for 800 frames on GTX 1650 — but O(N^2), so larger
+    # captures match a pair list that keeps the loop-closure pairs via hash retrieval.
+    frames = detail["frames"]
+    num_frames = detail["frame_count"]
+    strategy = resolve_strategy(matching, num_frames, exhaustive_below)
+    if strategy == "exhaustive":
+        num_pairs = num_frames * (num_frames - 1) // 2
+        timings["pair_selection"] = 0.0
+        print(f"  [2/4] Matching features (exhaustive, {num_frames} frames, {num_pairs} pairs)...")
+        step_start = time.perf_counter()
+        subprocess.run([
+            colmap_bin, "exhaustive_matcher",
+            "--database_path", str(database_path),
+            "--SiftMatching.use_gpu", use_gpu,
+        ], check=True)
+    else:
+        pair_list = build_pair_list(frames, output_dir / "match_pairs.txt", strategy=strategy)
+        num_pairs = pair_list["pairs"]
+        timings["pair_selection"] = pair_list["seconds"]
+        orbit = f"orbit of {pair_list['period']} frames/lap" if pair_list["period"] else "no orbit detected"
+        print(f"  [2/4] Matching features (pair list, {orbit}, {num_frames} frames, {num_pairs} pairs "
+              f"vs {num_frames * (num_frames - 1) // 2} exhaustive; selected in {pair_list['seconds']:.1f}s)...")
+        step_start = time.perf_counter()
+        subprocess.run([
+            colmap_bin, "matches_importer",
+            "--database_path", str(database_path),
+            "--match_list_path", pair_list["pair_list"],
+            "--match_type", "pairs",
+            "--SiftMatching.use_gpu", use_gpu,
+        ], check=True)
+    timings["matching"] = round(time.perf_counter() - step_start, 2)
 
     # Mapper
+    step_start = time.perf_counter()
     print("  [3/4] Running mapper (sparse reconstruction)...")
     subprocess.run([
         colmap_bin, "mapper",
@@ -229,20 +254,41 @@ def reconstruct_sparse(
         "--image_path", str(frames_dir),
         "--output_path", str(sparse_dir),
     ], check=True)
+    timings["mapper"] = round(time.perf_counter() - step_start, 2)
+    print(f"  Timings: features {timings['features']}s, pair selection {timings['pair_selection']}s, "
+          f"matching {timings['matching']}s, mapper {timings['mapper']}s")
 
     # Find the largest model (most registered images) — COLMAP may produce multiple
     ply_path = output_dir / "sparse.ply"
     model_dirs = sorted(sparse_dir.iterdir()) if sparse_dir.exists() else []
     model_dirs = [d for d in model_dirs if d.is_dir() and d.name.isdigit()]
 
-    if model_dirs:
-        # Pick largest by file size of images.bin (proxy for registered camera count)
-        best = max(model_dirs, key=lambda d: (d / "images.bin").stat().st_size
-                   if (d / "images.bin").exists() else 0)
-        print(f"  [4/4] Exporting model {best.name} ({len(model_dirs)} total) to PLY...")
+    models = inspect_models(model_dirs)
+    best = select_best_model(models)
+    for name, summary in models.items():
+        print(f"  Model {name}: {summary['registered_images']} images, {summary['points']} points, "
+              f"mean track {summary['mean_track_length']:.2f}")
+
+    merge_report = None
+    if merge_submodels and len(models) > 1:
+        print(f"  Merging {len(models)} sub-models...")
+        try:
+            merge_report = merge_model_dirs([sparse_dir / name for name in models], sparse_dir / "merged")
+        except (ValueError, np.linalg.LinAlgError) as e:
+            print(f"  Merge failed ({e}); keeping model {best}")
+        else:
+            print(f"  Merged models {', '.join(merge_report['merged'])} "
+                  f"({merge_report['registered_images']} images)"
+                  + (f"; no overlap with {', '.join(merge_report['skipped'])}" if merge_report["skipped"] else ""))
+            if merge_report["registered_images"] > models[best]["registered_images"]:
+                models["merged"] = inspect_model(sparse_dir / "merged")
+                best = "merged"
+
+    if best is not None:
+        print(f"  [4/4] Exporting model {best} ({len(model_dirs)} total) to PLY...")
         subprocess.run([
             colmap_bin, "model_converter",
-            "--input_path", str(best),
+            "--input_path", str(sparse_dir / best),
             "--output_path", str(ply_path),
             "--output_type", "PLY",
         ], check=True)
@@ -255,6 +301,13 @@ def reconstruct_sparse(
         "ply_path": str(ply_path) if ply_path else None,
         "database_path": str(database_path),
         "num_models": len(model_dirs),
+        "models": models,
+        "best_model": best,
+        "merge": merge_report,
+        "matching": strategy,
+        "num_pairs": num_pairs,
+        "orbit_period": pair_list["period"] if strategy != "exhaustive" else None,
+        "timings": timings,
     }
 
 
@@ -264,8 +317,9 @@ def reconstruct_dense(
     output_dir: Path,
     colmap_bin: str,
     gpu_info: dict,
+    model_name: str = "0",
 ) -> dict:
-    """Run COLMAP dense reconstruction (MVS).
+    """Run COLMAP dense reconstruction (MVS) on sparse sub-model model_name.
 
     Requires GPU with ~3.5GB+ VRAM. Uses max_image_size=1000 as safety cap.
     Returns dict with fused PLY path.
@@ -273,9 +327,9 @@ def reconstruct_dense(
     dense_dir = output_dir / "dense"
     dense_dir.mkdir(parents=True, exist_ok=True)
 
-    model_dir = Path(sparse_dir) / "0"
+    model_dir = Path(sparse_dir) / model_name
     if not model_dir.exists():
-        return {"error": "No sparse model found at sparse/0", "ply_path": None}
+        return {"error": f"No sparse model found at sparse/{model_name}", "ply_path": None}
 
     # Undistort
     print("  [dense 1/3] Undistorting images...")
@@ -309,7 +363,7 @@ def reconstruct_dense(
         "--output_type", "PLY",
     ]
     # Only lower check_num_images for small datasets (<200 frames)
-    num_frames = len(list(Path(frames_dir).glob("*.png"))) + len(list(Path(frames_dir).glob("*.jpg")))
+    num_frames = analyze_frames(frames_dir)["frame_count"]
     if num_frames < 200:
         fusion_cmd.extend(["--StereoFusion.check_num_images", "15"])
     subprocess.run(fusion_cmd, check=True)
@@ -486,6 +540,9 @@ def run_reconstruction(
     cloud: bool = False,
     gpu_info: Optional[dict] = None,
     zip_path: Optional[str] = None,
+    matching: str = "auto",
+    exhaustive_below: int = EXHAUSTIVE_BELOW,
+    merge_submodels: bool = False,
 ) -> dict:
     """Main reconstruction dispatcher called from pipeline.py.
 
@@ -497,6 +554,8 @@ def run_reconstruction(
         cloud: skip local, print cloud guidance instead
         gpu_info: GPU detection result (or None to auto-detect)
         zip_path: path to frames ZIP for cloud upload guidance
+        matching, exhaustive_below: pair selection, see reconstruct_sparse()
+        merge_submodels: merge overlapping sparse sub-models, see reconstruct_sparse()
 
     Returns:
         dict with reconstruction results
@@ -528,6 +587,8 @@ def run_reconstruction(
           else "  GPU: None (CPU mode)")
     print(f"  Mode: {mode}")
     print(f"  Content: {detail['detail_level']} detail (variance: {detail['avg_variance']})")
+    if detail["resolution"]:
+        print(f"  Frames: {detail['frame_count']} at {detail['resolution'][0]}x{detail['resolution'][1]}")
 
     # For meshroom mode with --dense: try AliceVision first (SGM > PatchMatch)
     # Falls back to COLMAP if meshroom_batch not installed
@@ -553,6 +614,9 @@ def run_reconstruction(
         colmap_bin=colmap_bin,
         mode=mode,
         gpu_info=gpu_info,
+        matching=matching,
+        exhaustive_below=exhaustive_below,
+        merge_submodels=merge_submodels,
     )
 
     result = {"mode": "local", "sparse": sparse_result}
@@ -574,6 +638,7 @@ def run_reconstruction(
                 output_dir=recon_dir,
                 colmap_bin=colmap_bin,
                 gpu_info=gpu_info,
+                model_name=sparse_result["best_model"] or "0",
             )
             result["dense"] = dense_result
     elif dense and mode != "meshroom":
@@ -598,6 +663,14 @@ def main():
                         help="Skip local, print cloud service instructions")
     parser.add_argument("--check-hardware", action="store_true",
                         help="Detect GPU and print recommendation")
+    parser.add_argument("--matching", choices=MATCHING_STRATEGIES, default="auto",
+                        help="Pair selection: exhaustive, pairs (capture order + retrieval), "
+                             "orbit (capture order + adjacent turntable rings) "
+                             "or auto (default: exhaustive below --exhaustive-below frames)")
+    parser.add_argument("--exhaustive-below", type=int, default=EXHAUSTIVE_BELOW,
+                        help=f"Frame count under which auto matching stays exhaustive (default: {EXHAUSTIVE_BELOW})")
+    parser.add_argument("--merge-models", action="store_true",
+                        help="Merge sparse sub-models that share images instead of keeping only the largest")
 
     args = parser.parse_args()
 
@@ -632,6 +705,9 @@ def main():
         mode=args.mode,
         dense=args.dense,
         cloud=args.cloud,
+        matching=args.matching,
+        exhaustive_below=args.exhaustive_below,
+        merge_submodels=args.merge_models,
     )
 
     print("\n" + "=" * 60)
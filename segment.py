@@ -6,10 +6,11 @@ This dramatically improves photogrammetry reconstruction by preventing
 the engine from trying to map background clutter as geometry.
 
 Uses rembg (U2-Net / RMBG) for automatic foreground detection.
-No GPU required — runs on CPU, ~1-3 sec per frame.
+No GPU required — runs on CPU, ~1-3 sec per frame. `--engine onnx` runs the
+same models through onnxruntime directly, in batches.
 
 Usage:
-    python segment.py <input_dir> <output_dir> [--model u2net]
+    python segment.py <input_dir> <output_dir> [--model u2net] [--engine onnx --batch-size 8]
 
 Models:
     u2net       - General purpose, good default (~170MB)
@@ -18,14 +19,19 @@ Models:
 """
 
 import argparse
+import time
 from pathlib import Path
+from typing import List, Optional
 
 import cv2
 import numpy as np
 from PIL import Image
 from tqdm import tqdm
 
+from journal import JOURNAL_NAME, FrameJournal, input_fingerprint, output_matches
+
 VALID_SEGMENT_MODELS = ["u2net", "u2net_human_seg", "isnet-general-use"]
+SEGMENT_ENGINES = ["rembg", "onnx"]
 
 
 def remove_background(
@@ -61,21 +67,207 @@ def remove_background(
 
     # Extract alpha channel as mask
     alpha = result_np[:, :, 3]
-
-    # Create output with solid background color
-    bg = np.full_like(image, bg_color, dtype=np.uint8)
     fg = cv2.cvtColor(result_np[:, :, :3], cv2.COLOR_RGB2BGR)
 
-    # Blend using alpha
-    alpha_f = alpha.astype(np.float32) / 255.0
-    alpha_3 = np.stack([alpha_f] * 3, axis=-1)
-    output = (fg * alpha_3 + bg * (1 - alpha_3)).astype(np.uint8)
+    output = composite_background(fg, alpha, bg_color)
 
     if return_mask:
         return output, alpha
     return output
 
 
+def composite_background(
+    fg: np.ndarray,
+    alpha: np.ndarray,
+    bg_color: tuple = (0, 0, 0),
+    out: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    Blend a BGR foreground over a solid background color using an 8-bit alpha mask.
+
+    Integer arithmetic throughout (within ±1 of a float blend). A black
+    background is a plain premultiply via cv2.multiply; other colors use a
+    uint16 fixed-point blend. Pass `out` to reuse an output buffer across frames.
+    """
+    if out is None:
+        out = np.empty_like(fg)
+    alpha_3 = cv2.merge([alpha, alpha, alpha])
+
+    if tuple(bg_color) == (0, 0, 0):
+        return cv2.multiply(fg, alpha_3, dst=out, scale=1 / 255)
+
+    # fg * a + bg * (255 - a), max 255 * 255 fits in uint16
+    acc = np.multiply(fg, alpha_3, dtype=np.uint16)
+    np.subtract(255, alpha_3, out=alpha_3)
+    acc += alpha_3 * np.asarray(bg_color, dtype=np.uint16)
+    acc += 127
+    acc //= 255
+    np.copyto(out, acc, casting="unsafe")
+    return out
+
+
+def naive_cutout(image: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Foreground premultiplied by the mask, as rembg.remove() returns it (RGB of its RGBA cutout)."""
+    return cv2.multiply(image, cv2.merge([mask, mask, mask]), scale=1 / 255)
+
+
+class BatchSegmenter:
+    """
+    Runs the rembg U2-Net / ISNet models directly through onnxruntime.
+
+    Frames are resized, normalized and stacked in NumPy and sent through the
+    network in batches, with the session's intra-op thread count under our
+    control. Inputs and masks go through the same PIL LANCZOS resizes and
+    normalization as rembg's sessions (prepare_input, prediction_to_mask),
+    so results match the per-frame rembg path.
+
+    Models exported with a fixed batch dimension of 1 still work — they are
+    fed one frame per run, skipping the PIL round-trips.
+    """
+
+    # Input size and normalization per model (mirrors rembg's sessions)
+    MODEL_SPECS = {
+        "u2net": {"size": 320, "mean": (0.485, 0.456, 0.406), "std": (0.229, 0.224, 0.225)},
+        "u2net_human_seg": {"size": 320, "mean": (0.485, 0.456, 0.406), "std": (0.229, 0.224, 0.225)},
+        "isnet-general-use": {"size": 1024, "mean": (0.5, 0.5, 0.5), "std": (1.0, 1.0, 1.0)},
+    }
+
+    def __init__(self, model_name: str = "u2net", batch_size: int = 4, threads: int = 0, providers=None):
+        import onnxruntime as ort
+
+        self.model_name = validate_segment_model(model_name)
+        self.batch_size = max(1, batch_size)
+        spec = self.MODEL_SPECS[self.model_name]
+        self.size = spec["size"]
+        self.mean = spec["mean"]
+        self.std = spec["std"]
+
+        options = ort.SessionOptions()
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            str(_model_path(self.model_name)),
+            sess_options=options,
+            providers=providers or ort.get_available_providers(),
+        )
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        # Symbolic / None batch dim means the model accepts any batch size
+        self.max_batch = model_input.shape[0] if isinstance(model_input.shape[0], int) else None
+
+    def prepare(self, image: np.ndarray) -> np.ndarray:
+        """BGR frame -> normalized (3, size, size) float32 network input."""
+        return prepare_input(image, self.size, self.mean, self.std)
+
+    def predict_masks(self, images: List[np.ndarray]) -> List[np.ndarray]:
+        """Alpha masks (uint8, same size as each frame) for a list of BGR frames."""
+        masks = []
+        for start in range(0, len(images), self.batch_size):
+            chunk = images[start:start + self.batch_size]
+            batch = np.stack([self.prepare(img) for img in chunk])
+            step = self.max_batch or len(chunk)
+            preds = np.concatenate([
+                self.session.run(None, {self.input_name: batch[i:i + step]})[0][:, 0]
+                for i in range(0, len(chunk), step)
+            ])
+            masks.extend(
+                prediction_to_mask(pred, (img.shape[1], img.shape[0]))
+                for pred, img in zip(preds, chunk)
+            )
+        return masks
+
+    def remove_backgrounds(self, images: List[np.ndarray], bg_color: tuple = (0, 0, 0)) -> List[tuple]:
+        """Batched remove_background(..., return_mask=True): list of (image, mask)."""
+        return [
+            (composite_background(naive_cutout(img, mask), mask, bg_color), mask)
+            for img, mask in zip(images, self.predict_masks(images))
+        ]
+
+
+def prepare_input(image: np.ndarray, size: int, mean: tuple, std: tuple) -> np.ndarray:
+    """
+    BGR frame -> (3, size, size) float32 network input, as rembg's
+    BaseSession.normalize builds it: PIL LANCZOS resize, scale by the max,
+    then per-channel (x - mean) / std in float64.
+    """
+    rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    x = np.asarray(Image.fromarray(rgb).resize((size, size), Image.Resampling.LANCZOS))
+    x = x / max(np.max(x), 1e-6)
+    x = (x - np.asarray(mean)) / np.asarray(std)
+    return x.transpose(2, 0, 1).astype(np.float32)
+
+
+def prediction_to_mask(pred: np.ndarray, size: tuple) -> np.ndarray:
+    """
+    Min-max normalize one network output map and resize it to (width, height)
+    as uint8, with PIL LANCZOS like rembg's sessions.
+    """
+    ma, mi = pred.max(), pred.min()
+    pred = (pred - mi) / max(ma - mi, 1e-12)
+    mask = (np.clip(pred, 0, 1) * 255).astype(np.uint8)
+    return np.asarray(Image.fromarray(mask).resize(size, Image.Resampling.LANCZOS))
+
+
+def _model_path(model_name: str) -> Path:
+    """Local path to a rembg model file, downloading it through rembg if needed."""
+    from rembg.sessions import sessions_class
+
+    for session_class in sessions_class:
+        if session_class.name() == model_name:
+            return Path(session_class.download_models())
+    raise ValueError(f"rembg has no session for model '{model_name}'")
+
+
+def propagate_mask(
+    prev_image: np.ndarray,
+    prev_mask: np.ndarray,
+    image: np.ndarray,
+    flow_size: int = 512,
+) -> tuple:
+    """
+    Carry a mask from the previous frame onto this one with dense optical flow.
+
+    Flow is computed backwards (this frame -> previous) on grayscale copies
+    downscaled to at most flow_size px, then both the mask and the previous
+    frame are warped with it. Confidence is 1 - mean absolute difference
+    between the warped previous frame and this frame inside the (dilated)
+    mask, on a 0-1 scale: low values mean the flow didn't explain the motion.
+
+    Returns (mask, confidence).
+    """
+    h, w = image.shape[:2]
+    scale = min(1.0, flow_size / max(h, w))
+    small = (max(1, int(round(w * scale))), max(1, int(round(h * scale))))
+    gray = cv2.resize(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), small, interpolation=cv2.INTER_AREA)
+    prev_gray = cv2.resize(cv2.cvtColor(prev_image, cv2.COLOR_BGR2GRAY), small, interpolation=cv2.INTER_AREA)
+
+    flow = cv2.calcOpticalFlowFarneback(gray, prev_gray, None, 0.5, 4, 21, 3, 7, 1.5, 0)
+    if scale < 1.0:
+        flow = cv2.resize(flow, (w, h), interpolation=cv2.INTER_LINEAR) / scale
+
+    grid_x, grid_y = np.meshgrid(np.arange(w, dtype=np.float32), np.arange(h, dtype=np.float32))
+    map_x = grid_x + flow[..., 0]
+    map_y = grid_y + flow[..., 1]
+    mask = cv2.remap(prev_mask, map_x, map_y, cv2.INTER_LINEAR, borderValue=0)
+    warped = cv2.remap(prev_image, map_x, map_y, cv2.INTER_LINEAR, borderValue=0)
+
+    region = cv2.dilate(mask, np.ones((15, 15), np.uint8)) > 127
+    if not region.any():
+        return mask, 0.0
+    error = cv2.absdiff(warped, image)[region].mean() / 255.0
+    return mask, float(1.0 - error)
+
+
+def mask_iou(a: np.ndarray, b: np.ndarray, threshold: int = 127) -> float:
+    """Intersection over union of two alpha masks, binarized at threshold."""
+    a = a > threshold
+    b = b > threshold
+    union = np.logical_or(a, b).sum()
+    if union == 0:
+        return 1.0
+    return float(np.logical_and(a, b).sum() / union)
+
+
 def validate_segment_model(model_name: str) -> str:
     """Ensure the requested rembg model is one we support."""
     if model_name not in VALID_SEGMENT_MODELS:
@@ -85,6 +277,46 @@ def validate_segment_model(model_name: str) -> str:
     return model_name
 
 
+def _segment_done(journal: Optional[FrameJournal], output_dir: Path, name: str,
+                  save_masks: bool) -> Optional[dict]:
+    """Journal record for a frame that needs no more work, or None (outputs missing or rewritten)."""
+    record = journal.get(name) if journal is not None else None
+    if record is None or record["status"] == "error":
+        return record
+    if not output_matches(record, output_dir / name):
+        return None
+    if save_masks and not output_matches(record, output_dir / "masks" / name, "mask_bytes"):
+        return None
+    return record
+
+
+def _replay_segment(record: dict, stats: dict):
+    """Apply a journaled frame to stats exactly as segmenting it would."""
+    if record["status"] == "error":
+        stats["errors"] += 1
+        return
+    stats["processed"] += 1
+    if "source" in record:
+        stats[record["source"]] += 1
+        stats["fallbacks"] += record["fallback"]
+
+
+def _journal_written(journal: Optional[FrameJournal], output_dir: Path, name: str,
+                     save_masks: bool, **fields):
+    """Record a frame whose outputs are on disk, with their sizes."""
+    if journal is None:
+        return
+    sizes = {"bytes": (output_dir / name).stat().st_size}
+    if save_masks:
+        sizes["mask_bytes"] = (output_dir / "masks" / name).stat().st_size
+    journal.record(name, "processed", **sizes, **fields)
+
+
+def _journal_error(journal: Optional[FrameJournal], name: str):
+    if journal is not None:
+        journal.record(name, "error")
+
+
 def segment_frames(
     input_dir: Path,
     output_dir: Path,
@@ -92,6 +324,13 @@ def segment_frames(
     bg_color: tuple = (0, 0, 0),
     save_masks: bool = False,
     verbose: bool = True,
+    engine: str = "rembg",
+    batch_size: int = 4,
+    threads: int = 0,
+    keyframe_interval: int = 1,
+    min_confidence: float = 0.9,
+    max_area_change: float = 0.15,
+    resume: bool = False,
 ) -> dict:
     """
     Remove background from all frames in a directory.
@@ -103,20 +342,35 @@ def segment_frames(
         bg_color: background replacement color
         save_masks: also save alpha masks (useful for debugging)
         verbose: show progress bar
+        engine: "rembg" (one rembg.remove call per frame) or "onnx"
+            (BatchSegmenter: batched onnxruntime inference)
+        batch_size: frames per inference run (onnx engine)
+        threads: onnxruntime intra-op threads, 0 = runtime default (onnx engine)
+        keyframe_interval: run the network on every Kth frame only and
+            propagate masks to the frames in between (1 = every frame)
+        min_confidence: re-run the network when a propagated mask's
+            confidence (see propagate_mask) falls below this
+        max_area_change: ... or when its area changes by more than this
+            fraction from the previous frame's mask
+        resume: pick up the journal (output_dir/.journal.jsonl) left by an
+            interrupted run with the same settings and input frames,
+            skipping finished frames. Output and stats match an
+            uninterrupted run; in keyframe mode the run restarts at the
+            last keyframe so the propagation chain is rebuilt.
 
     Returns:
         dict with processing stats
     """
-    from rembg import new_session
-
+    if engine not in SEGMENT_ENGINES:
+        raise ValueError(f"Unknown segmentation engine '{engine}'. Supported: {', '.join(SEGMENT_ENGINES)}.")
     model_name = validate_segment_model(model_name)
 
     input_dir = Path(input_dir)
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
 
+    mask_dir = output_dir / "masks"
     if save_masks:
-        mask_dir = output_dir / "masks"
         mask_dir.mkdir(exist_ok=True)
 
     extensions = {".png", ".jpg", ".jpeg"}
@@ -127,38 +381,218 @@ def segment_frames(
     stats = {"total": len(frames), "processed": 0, "errors": 0}
 
     if verbose:
-        print(f"Segmenting {len(frames)} frames (model: {model_name})")
+        print(f"Segmenting {len(frames)} frames (model: {model_name}, engine: {engine})")
         print(f"Background color: {bg_color}")
 
-    # Create session once — reused for all frames (big speed win)
-    session = new_session(model_name)
+    params = {
+        "model": model_name,
+        "bg_color": list(bg_color),
+        "save_masks": save_masks,
+        "engine": engine,
+        "keyframe_interval": keyframe_interval,
+        "min_confidence": min_confidence,
+        "max_area_change": max_area_change,
+    }
+    with FrameJournal(output_dir / JOURNAL_NAME, "segment", params,
+                      input_fingerprint(frames), resume=resume) as journal:
+        if verbose and len(journal):
+            print(f"Resuming: {len(journal)} frames already journaled")
+
+        if keyframe_interval > 1:
+            if engine == "onnx":
+                segmenter = BatchSegmenter(model_name, batch_size=1, threads=threads)
+                infer = lambda img: segmenter.predict_masks([img])[0]
+            else:
+                from rembg import new_session
+
+                session = new_session(model_name)
+                infer = lambda img: remove_background(img, session=session, return_mask=True)[1]
+            _segment_propagated(infer, frames, output_dir, bg_color, save_masks, stats, verbose,
+                                keyframe_interval, min_confidence, max_area_change, journal=journal)
+            return stats
+
+        pending = []
+        for frame_path in frames:
+            record = _segment_done(journal, output_dir, frame_path.name, save_masks)
+            if record is not None:
+                _replay_segment(record, stats)
+            else:
+                pending.append(frame_path)
+        if not pending:
+            return stats
+
+        if engine == "onnx":
+            segmenter = BatchSegmenter(model_name, batch_size=batch_size, threads=threads)
+            _segment_batched(segmenter, pending, output_dir, bg_color, save_masks, stats, verbose,
+                             journal=journal)
+            return stats
+
+        from rembg import new_session
+
+        # Create session once — reused for all frames (big speed win)
+        session = new_session(model_name)
+
+        for frame_path in tqdm(pending, disable=not verbose, desc="Segmenting"):
+            try:
+                image = cv2.imread(str(frame_path))
+                if image is None:
+                    stats["errors"] += 1
+                    _journal_error(journal, frame_path.name)
+                    continue
+
+                if save_masks:
+                    result, mask = remove_background(
+                        image, session=session, bg_color=bg_color, return_mask=True
+                    )
+                    cv2.imwrite(str(mask_dir / frame_path.name), mask)
+                else:
+                    result = remove_background(
+                        image, session=session, bg_color=bg_color
+                    )
+
+                cv2.imwrite(str(output_dir / frame_path.name), result)
+                stats["processed"] += 1
+                _journal_written(journal, output_dir, frame_path.name, save_masks)
+
+            except Exception as e:
+                if verbose:
+                    print(f"Error on {frame_path.name}: {e}")
+                stats["errors"] += 1
+                _journal_error(journal, frame_path.name)
+
+    return stats
 
-    for frame_path in tqdm(frames, disable=not verbose, desc="Segmenting"):
+
+def _segment_batched(
+    segmenter: BatchSegmenter,
+    frames: List[Path],
+    output_dir: Path,
+    bg_color: tuple,
+    save_masks: bool,
+    stats: dict,
+    verbose: bool,
+    journal: Optional[FrameJournal] = None,
+) -> None:
+    """Read, segment and write frames one batch at a time."""
+    mask_dir = output_dir / "masks"
+    batch_size = segmenter.batch_size
+    with tqdm(total=len(frames), disable=not verbose, desc="Segmenting") as progress:
+        for start in range(0, len(frames), batch_size):
+            batch = []
+            for frame_path in frames[start:start + batch_size]:
+                image = cv2.imread(str(frame_path))
+                if image is None:
+                    stats["errors"] += 1
+                    _journal_error(journal, frame_path.name)
+                else:
+                    batch.append((frame_path, image))
+            try:
+                results = segmenter.remove_backgrounds([img for _, img in batch], bg_color=bg_color)
+                for (frame_path, _), (result, mask) in zip(batch, results):
+                    if save_masks:
+                        cv2.imwrite(str(mask_dir / frame_path.name), mask)
+                    cv2.imwrite(str(output_dir / frame_path.name), result)
+                    stats["processed"] += 1
+                    _journal_written(journal, output_dir, frame_path.name, save_masks)
+            except Exception as e:
+                if verbose:
+                    print(f"Error on batch starting {frames[start].name}: {e}")
+                stats["errors"] += len(batch)
+                for frame_path, _ in batch:
+                    _journal_error(journal, frame_path.name)
+            progress.update(len(frames[start:start + batch_size]))
+
+
+def _segment_propagated(
+    infer_mask,
+    frames: List[Path],
+    output_dir: Path,
+    bg_color: tuple,
+    save_masks: bool,
+    stats: dict,
+    verbose: bool,
+    keyframe_interval: int,
+    min_confidence: float,
+    max_area_change: float,
+    journal: Optional[FrameJournal] = None,
+) -> None:
+    """
+    Keyframe segmentation: infer_mask(image) on every Kth frame, optical-flow
+    propagation in between, with a fallback to inference when a propagated
+    mask looks unreliable. Adds inferred/propagated/fallback counts to stats.
+
+    Journaled frames are replayed up to the last keyframe before the first
+    unfinished frame; from there on frames are redone, since the masks the
+    propagation chain carries are not kept on disk.
+    """
+    mask_dir = output_dir / "masks"
+    stats.update({"inferred": 0, "propagated": 0, "fallbacks": 0})
+    prev_image = prev_mask = None
+    since_keyframe = 0
+    result = None
+    start = time.perf_counter()
+
+    records = [_segment_done(journal, output_dir, f.name, save_masks) for f in frames]
+    first = next((i for i, record in enumerate(records) if record is None), len(records))
+    restart = max((i for i in range(first) if records[i].get("source") == "inferred"), default=first)
+    for record in records[:restart]:
+        _replay_segment(record, stats)
+    # A keyframe that was a fallback had a propagation attempt before it
+    restart_fallback = restart < first and records[restart]["fallback"]
+
+    for i, frame_path in enumerate(tqdm(frames[restart:], disable=not verbose, desc="Segmenting"),
+                                   start=restart):
         try:
             image = cv2.imread(str(frame_path))
             if image is None:
                 stats["errors"] += 1
+                _journal_error(journal, frame_path.name)
                 continue
 
+            mask = None
+            fallback = i == restart and restart_fallback
+            if fallback:
+                stats["fallbacks"] += 1
+            if prev_mask is not None and since_keyframe < keyframe_interval and prev_image.shape == image.shape:
+                candidate, confidence = propagate_mask(prev_image, prev_mask, image)
+                prev_area = max(int((prev_mask > 127).sum()), 1)
+                area_change = abs(int((candidate > 127).sum()) - prev_area) / prev_area
+                if confidence >= min_confidence and area_change <= max_area_change:
+                    mask = candidate
+                    stats["propagated"] += 1
+                    since_keyframe += 1
+                else:
+                    stats["fallbacks"] += 1
+                    fallback = True
+
+            source = "propagated"
+            if mask is None:
+                mask = infer_mask(image)
+                stats["inferred"] += 1
+                since_keyframe = 1
+                source = "inferred"
+
+            if result is None or result.shape != image.shape:
+                result = np.empty_like(image)
+            composite_background(naive_cutout(image, mask), mask, bg_color, out=result)
             if save_masks:
-                result, mask = remove_background(
-                    image, session=session, bg_color=bg_color, return_mask=True
-                )
                 cv2.imwrite(str(mask_dir / frame_path.name), mask)
-            else:
-                result = remove_background(
-                    image, session=session, bg_color=bg_color
-                )
-
             cv2.imwrite(str(output_dir / frame_path.name), result)
             stats["processed"] += 1
+            _journal_written(journal, output_dir, frame_path.name, save_masks,
+                             source=source, fallback=fallback)
+            prev_image, prev_mask = image, mask
 
         except Exception as e:
             if verbose:
                 print(f"Error on {frame_path.name}: {e}")
             stats["errors"] += 1
+            _journal_error(journal, frame_path.name)
 
-    return stats
+    stats["seconds"] = round(time.perf_counter() - start, 2)
+    if verbose and stats["processed"]:
+        print(f"Network ran on {stats['inferred']}/{stats['processed']} frames "
+              f"({stats['propagated']} propagated, {stats['fallbacks']} fallbacks) in {stats['seconds']}s")
 
 
 def main():
@@ -190,6 +624,35 @@ def main():
         action="store_true",
         help="Also save alpha masks for debugging",
     )
+    parser.add_argument(
+        "--engine",
+        default="rembg",
+        choices=SEGMENT_ENGINES,
+        help="rembg (per frame) or onnx (batched onnxruntime, default: rembg)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=4,
+        help="Frames per inference run with --engine onnx (default: 4)",
+    )
+    parser.add_argument(
+        "--keyframe-interval",
+        type=int,
+        default=1,
+        help="Run the network on every Kth frame, propagate masks in between (default: 1 = every frame)",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=0,
+        help="onnxruntime intra-op threads with --engine onnx (default: 0 = auto)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted run from the journal in output_dir",
+    )
 
     args = parser.parse_args()
 
@@ -203,6 +666,11 @@ def main():
         model_name=args.model,
         bg_color=tuple(args.bg_color),
         save_masks=args.save_masks,
+        engine=args.engine,
+        batch_size=args.batch_size,
+        threads=args.threads,
+        keyframe_interval=args.keyframe_interval,
+        resume=args.resume,
     )
 
     print("\n" + "=" * 60)
@@ -211,6 +679,8 @@ def main():
     print(f"Total frames:  {stats['total']}")
     print(f"Processed:     {stats['processed']}")
     print(f"Errors:        {stats['errors']}")
+    if "inferred" in stats:
+        print(f"Network runs:  {stats['inferred']} ({stats['propagated']} propagated)")
     print("=" * 60)
     print(f"\nSegmented frames saved to: {args.output_dir}")
 
@@ -0,0 +1,145 @@
+"""
+Content-addressed stage cache for pipeline.py runs.
+
+Each stage's output directory gets a small JSON manifest recording the stage
+key: a hash of the upstream key (the video bytes for the first stage) plus the
+stage's own parameters. Keys chain, so changing e.g. the blur threshold
+invalidates preprocessing and everything after it, while extraction is reused.
+
+A stage is reused only if its manifest key matches and the output directory
+still has the same files (name, size, mtime) as when the manifest was written,
+so hand-edited or partially deleted outputs are recomputed. Stale outputs are
+cleared before a stage reruns so frames from an old parameter set never leak
+into the new one.
+
+A manifest without outputs is written when a stage starts. If the run is
+killed, a resumable stage (one whose step journals per-frame progress, see
+journal.py) rerun with the same key keeps its partial outputs instead.
+"""
+
+import hashlib
+import json
+import shutil
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+MANIFEST_NAME = ".stage.json"
+CACHE_VERSION = 1
+
+
+def file_digest(path: Path, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's bytes."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(chunk_size):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def stage_key(stage: str, params: dict, upstream: str) -> str:
+    """Key for a stage run: upstream key + stage name + JSON-canonical parameters."""
+    payload = json.dumps(
+        {"version": CACHE_VERSION, "stage": stage, "params": params, "upstream": upstream},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def output_digest(stage_dir: Path) -> str:
+    """Digest of every output file's relative path, size and mtime (not contents)."""
+    h = hashlib.sha256()
+    stage_dir = Path(stage_dir)
+    for path in sorted(p for p in stage_dir.rglob("*") if p.is_file() and p.name != MANIFEST_NAME):
+        st = path.stat()
+        h.update(f"{path.relative_to(stage_dir).as_posix()}|{st.st_size}|{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+def load_manifest(stage_dir: Path) -> Optional[dict]:
+    """Stage manifest, or None if missing or unreadable."""
+    try:
+        with open(Path(stage_dir) / MANIFEST_NAME) as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def is_stage_fresh(stage_dir: Path, key: str) -> bool:
+    """True if stage_dir holds untouched outputs of a run with this key."""
+    manifest = load_manifest(stage_dir)
+    return (
+        manifest is not None
+        and manifest.get("key") == key
+        and manifest.get("outputs") == output_digest(stage_dir)
+    )
+
+
+def is_stage_interrupted(stage_dir: Path, key: str) -> bool:
+    """True if a run with this key started in stage_dir and never finished."""
+    manifest = load_manifest(stage_dir)
+    return manifest is not None and manifest.get("key") == key and manifest.get("outputs") is None
+
+
+def mark_stage_started(stage_dir: Path, stage: str, key: str) -> Path:
+    """Record that a stage run began; replaced by write_stage_manifest() when it completes."""
+    manifest_path = Path(stage_dir) / MANIFEST_NAME
+    with open(manifest_path, 'w') as f:
+        json.dump({"stage": stage, "key": key, "outputs": None}, f, indent=2, sort_keys=True)
+    return manifest_path
+
+
+def reset_stage_dir(stage_dir: Path):
+    """Remove a stage's previous outputs and recreate the empty directory."""
+    stage_dir = Path(stage_dir)
+    if stage_dir.exists():
+        shutil.rmtree(stage_dir)
+    stage_dir.mkdir(parents=True)
+
+
+def write_stage_manifest(stage_dir: Path, stage: str, key: str, params: dict,
+                         upstream: str, stats: Optional[dict] = None,
+                         seconds: float = 0.0) -> Path:
+    """Record a completed stage run. Written last, after all outputs exist."""
+    manifest_path = Path(stage_dir) / MANIFEST_NAME
+    manifest = {
+        "stage": stage,
+        "key": key,
+        "upstream": upstream,
+        "params": params,
+        "stats": stats or {},
+        "seconds": round(seconds, 3),
+        "outputs": output_digest(stage_dir),
+    }
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True, default=str)
+    return manifest_path
+
+
+def run_stage(stage: str, stage_dir: Path, params: dict, upstream: str,
+              run: Callable[[], Optional[dict]], use_cache: bool = True,
+              resumable: bool = False) -> dict:
+    """
+    Run a stage unless a fresh cached result exists.
+
+    `run` produces the outputs in stage_dir (already cleared) and returns a
+    JSON-serializable summary stored in the manifest. With resumable=True,
+    stage_dir is left as is when an interrupted run with the same key was
+    there, and `run` is expected to resume from its journal.
+
+    Returns:
+        Dict with key, stats (the summary, from the manifest on a hit) and cached
+    """
+    key = stage_key(stage, params, upstream)
+    if use_cache and is_stage_fresh(stage_dir, key):
+        manifest = load_manifest(stage_dir)
+        return {"key": key, "stats": manifest.get("stats", {}), "cached": True}
+
+    if not (use_cache and resumable and is_stage_interrupted(stage_dir, key)):
+        reset_stage_dir(stage_dir)
+    mark_stage_started(stage_dir, stage, key)
+    start = time.time()
+    stats = run() or {}
+    write_stage_manifest(stage_dir, stage, key, params, upstream, stats, time.time() - start)
+    return {"key": key, "stats": stats, "cached": False}
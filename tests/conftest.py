@@ -0,0 +1,70 @@
+"""
+Synthetic inputs shared across test modules, as fixtures returning factories.
+"""
+
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def write_video():
+    """write_video(path, n_frames=24, size=(160, 120)) -> path of an MJPG clip with a moving block."""
+
+    def write(path: Path, n_frames: int = 24, size=(160, 120)) -> Path:
+        writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 12, size)
+        if not writer.isOpened():
+            pytest.skip("No video encoder available")
+        rng = np.random.default_rng(0)
+        for i in range(n_frames):
+            frame = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+            # Textured block that moves every other frame, so some frames are duplicates
+            x = 20 + (i // 2) * 4
+            frame[40:100, x:x + 50] = rng.integers(0, 255, (60, 50, 3), dtype=np.uint8)
+            writer.write(frame)
+        writer.release()
+        return path
+
+    return write
+
+
+@pytest.fixture
+def write_frames():
+    """write_frames(frames, frames_dir) -> paths of the frames written as frame_%06d.png."""
+
+    def write(frames, frames_dir: Path) -> list:
+        frames_dir.mkdir(parents=True, exist_ok=True)
+        paths = []
+        for i, frame in enumerate(frames):
+            paths.append(frames_dir / f"frame_{i:06d}.png")
+            cv2.imwrite(str(paths[-1]), frame)
+        return paths
+
+    return write
+
+
+@pytest.fixture
+def rotating_object():
+    """
+    rotating_object(n_frames=16, size=(320, 240), step_deg=3.0, seed=0) -> (frames, masks):
+    a textured, asymmetric object turning about the frame centre on black.
+    """
+
+    def make(n_frames: int = 16, size=(320, 240), step_deg: float = 3.0, seed: int = 0):
+        w, h = size
+        rng = np.random.default_rng(seed)
+        texture = cv2.GaussianBlur(rng.integers(0, 255, (h, w, 3), dtype=np.uint8), (5, 5), 0)
+        shape = np.zeros((h, w), np.uint8)
+        cv2.ellipse(shape, (w // 2, h // 2), (w // 4, h // 3), 0, 0, 360, 255, -1)
+        cv2.rectangle(shape, (w // 2, h // 2 - 10), (w // 2 + w // 3, h // 2 + 10), 255, -1)
+        frames, masks = [], []
+        for i in range(n_frames):
+            rot = cv2.getRotationMatrix2D((w / 2, h / 2), i * step_deg, 1.0)
+            mask = cv2.warpAffine(shape, rot, (w, h))
+            frames.append(np.where(mask[..., None] > 127, cv2.warpAffine(texture, rot, (w, h)), 0).astype(np.uint8))
+            masks.append(mask)
+        return frames, masks
+
+    return make
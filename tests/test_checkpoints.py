@@ -0,0 +1,143 @@
+"""
+Background checkpoint writer: PLY and .pt come from one snapshot taken at
+save() time, old checkpoints (including a resumed run's) are pruned to
+keep_last, worker errors reach the training thread, and a run resumed from a
+full-state checkpoint ends bit-for-bit where the uninterrupted run does.
+"""
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from checkpoints import (  # noqa: E402
+    CheckpointWriter,
+    checkpoint_path,
+    latest_checkpoint,
+    load_checkpoint,
+    ply_path,
+    restore_training_state,
+    training_state,
+)
+
+
+def _splats(n=50, seed=0):
+    gen = torch.Generator().manual_seed(seed)
+    return {
+        "means": torch.nn.Parameter(torch.randn(n, 3, generator=gen)),
+        "scales": torch.nn.Parameter(torch.randn(n, 3, generator=gen)),
+        "quats": torch.nn.Parameter(torch.randn(n, 4, generator=gen)),
+        "opacities": torch.nn.Parameter(torch.randn(n, generator=gen)),
+        "sh0": torch.nn.Parameter(torch.randn(n, 1, 3, generator=gen)),
+    }
+
+
+def _read_ply(path):
+    with open(path, "rb") as f:
+        names = []
+        while (line := f.readline().decode().strip()) != "end_header":
+            if line.startswith("property"):
+                names.append(line.split()[-1])
+        return np.fromfile(f, dtype=[(name, "<f4") for name in names])
+
+
+def test_checkpoint_matches_snapshot(tmp_path):
+    splats = _splats()
+    expected = {k: v.detach().clone() for k, v in splats.items()}
+    with CheckpointWriter(tmp_path) as writer:
+        writer.save(splats, 100)
+        # Training carries on while the worker writes
+        with torch.no_grad():
+            for p in splats.values():
+                p.add_(1.0)
+
+    ckpt = load_checkpoint(checkpoint_path(tmp_path, 100))
+    assert ckpt["step"] == 100
+    assert all(torch.equal(ckpt["splats"][k], expected[k]) for k in expected)
+    vertices = _read_ply(ply_path(tmp_path, 100))
+    assert len(vertices) == 50
+    assert np.allclose(vertices["x"], expected["means"][:, 0].numpy())
+    assert np.allclose(vertices["f_dc_2"], expected["sh0"][:, 0, 2].numpy())
+    assert np.allclose(vertices["opacity"], expected["opacities"].numpy())
+    assert np.allclose(vertices["rot_3"], expected["quats"][:, 3].numpy())
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_keep_last_prunes_old_checkpoints(tmp_path):
+    splats = _splats()
+    with CheckpointWriter(tmp_path, keep_last=2) as writer:
+        for step in (100, 200, 300, 400):
+            writer.save(splats, step)
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "checkpoint_300.pt", "checkpoint_400.pt", "splat_300.ply", "splat_400.ply",
+    ]
+
+
+def test_keep_last_counts_checkpoints_of_the_resumed_run(tmp_path):
+    splats = _splats()
+    with CheckpointWriter(tmp_path, keep_last=2) as writer:
+        for step in (100, 200):
+            writer.save(splats, step)
+    # A resumed run gets a new writer; the first run's checkpoints are still pruned
+    with CheckpointWriter(tmp_path, keep_last=2) as writer:
+        for step in (200, 300):
+            writer.save(splats, step)
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "checkpoint_200.pt", "checkpoint_300.pt", "splat_200.ply", "splat_300.ply",
+    ]
+
+
+def test_worker_error_is_raised(tmp_path):
+    writer = CheckpointWriter(tmp_path / "missing")
+    writer.save(_splats(), 1)
+    with pytest.raises(FileNotFoundError):
+        writer.close()
+
+
+def _run(splats, optimizers, schedulers, steps, writer=None, save_at=None):
+    """Toy training loop: noisy targets exercise the RNG, Adam and the scheduler."""
+    for step in steps:
+        loss = sum(((p - torch.randn_like(p)) ** 2).mean() for p in splats.values())
+        for opt in optimizers.values():
+            opt.zero_grad()
+        loss.backward()
+        for opt in optimizers.values():
+            opt.step()
+        for sched in schedulers.values():
+            sched.step()
+        if writer is not None and step == save_at:
+            writer.save(splats, step, training_state(optimizers, schedulers, step + 1, seed=7))
+
+
+def _setup(splats):
+    optimizers = {name: torch.optim.Adam([p], lr=0.01) for name, p in splats.items()}
+    schedulers = {"means": torch.optim.lr_scheduler.LambdaLR(optimizers["means"], lambda s: 0.99**s)}
+    return optimizers, schedulers
+
+
+def test_resume_continues_bit_for_bit(tmp_path):
+    torch.manual_seed(0)
+    splats = _splats()
+    optimizers, schedulers = _setup(splats)
+    with CheckpointWriter(tmp_path) as writer:
+        _run(splats, optimizers, schedulers, range(30), writer, save_at=11)
+    assert latest_checkpoint(tmp_path) == checkpoint_path(tmp_path, 11)
+
+    ckpt = load_checkpoint(latest_checkpoint(tmp_path))
+    resumed = {k: torch.nn.Parameter(v.clone()) for k, v in ckpt["splats"].items()}
+    optimizers, schedulers = _setup(resumed)
+    torch.manual_seed(123)  # clobbered by the restored RNG state
+    next_step = restore_training_state(ckpt, optimizers, schedulers)
+    assert next_step == 12 and ckpt["seed"] == 7
+    _run(resumed, optimizers, schedulers, range(next_step, 30))
+
+    assert all(torch.equal(resumed[k], splats[k]) for k in splats)
+    assert schedulers["means"].last_epoch == 30
+
+
+def test_splats_only_checkpoint_cannot_resume(tmp_path):
+    torch.save({k: v.detach() for k, v in _splats().items()}, tmp_path / "checkpoint_5.pt")
+    ckpt = load_checkpoint(tmp_path / "checkpoint_5.pt")
+    assert set(ckpt["splats"]) == {"means", "scales", "quats", "opacities", "sh0"}
+    with pytest.raises(ValueError):
+        restore_training_state(ckpt, *_setup(_splats()))
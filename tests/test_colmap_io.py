@@ -0,0 +1,147 @@
+"""
+COLMAP binary I/O: a synthetic model written with the writers must read back
+field for field, the bulk readers must agree with a plain struct parser, and
+the header-only inspector must agree with the full readers.
+"""
+
+import struct
+
+import numpy as np
+
+from colmap_io import (
+    inspect_model,
+    read_cameras_binary,
+    read_images_binary,
+    read_points3D_binary,
+    read_points3D_full,
+    write_cameras_binary,
+    write_images_binary,
+    write_points3D_binary,
+)
+from reconstruct import inspect_models, select_best_model
+
+
+def _synthetic_model(rng, n_images=12, n_points=300):
+    cameras = {
+        1: {"model_id": 1, "width": 640, "height": 480, "params": np.array([500.0, 510.0, 320.0, 240.0])},
+        2: {"model_id": 4, "width": 1920, "height": 1080, "params": rng.normal(size=8)},
+    }
+    images = {}
+    for img_id in range(1, n_images + 1):
+        n_kp = int(rng.integers(0, 40))
+        qvec = rng.normal(size=4)
+        images[img_id * 3] = {
+            "qvec": qvec / np.linalg.norm(qvec),
+            "tvec": rng.normal(size=3),
+            "camera_id": 1 + img_id % 2,
+            "name": f"frame_{img_id:06d}_ü.png",
+            "xys": rng.uniform(0, 640, (n_kp, 2)),
+            "point3D_ids": rng.integers(-1, n_points, n_kp),
+        }
+    lengths = rng.integers(0, 9, n_points)
+    track = np.zeros(int(lengths.sum()), dtype=[("image_id", "<i4"), ("point2D_idx", "<i4")])
+    track["image_id"] = rng.integers(1, n_images + 1, len(track))
+    track["point2D_idx"] = rng.integers(0, 40, len(track))
+    points = {
+        "ids": np.arange(n_points, dtype=np.int64) * 7 + 1,
+        "xyz": rng.normal(size=(n_points, 3)),
+        "rgb": rng.integers(0, 256, (n_points, 3), dtype=np.uint8),
+        "error": rng.uniform(0, 2, n_points),
+        "track_lengths": lengths,
+        "track": track,
+    }
+    return cameras, images, points
+
+
+def _struct_points3D(path):
+    """Reference parser: one record at a time, as COLMAP's read_write_model.py does."""
+    xyz, rgb, lengths = [], [], []
+    with open(path, "rb") as f:
+        for _ in range(struct.unpack("<Q", f.read(8))[0]):
+            _id, x, y, z, r, g, b, _err, n = struct.unpack("<Q3d3BdQ", f.read(51))
+            f.read(8 * n)
+            xyz.append((x, y, z))
+            rgb.append((r, g, b))
+            lengths.append(n)
+    return np.array(xyz), np.array(rgb, dtype=np.uint8), np.array(lengths)
+
+
+def test_round_trip(tmp_path):
+    cameras, images, points = _synthetic_model(np.random.default_rng(0))
+    write_cameras_binary(cameras, str(tmp_path / "cameras.bin"))
+    write_images_binary(images, str(tmp_path / "images.bin"))
+    write_points3D_binary(points, str(tmp_path / "points3D.bin"))
+
+    cams = read_cameras_binary(str(tmp_path / "cameras.bin"))
+    assert cams.keys() == cameras.keys()
+    for cam_id, cam in cameras.items():
+        assert (cams[cam_id]["model_id"], cams[cam_id]["width"], cams[cam_id]["height"]) == (
+            cam["model_id"], cam["width"], cam["height"]
+        )
+        np.testing.assert_array_equal(cams[cam_id]["params"], cam["params"])
+
+    imgs = read_images_binary(str(tmp_path / "images.bin"), with_points2D=True)
+    assert list(imgs) == list(images)
+    for img_id, img in images.items():
+        for key in ("qvec", "tvec", "xys", "point3D_ids"):
+            np.testing.assert_array_equal(imgs[img_id][key], img[key])
+        assert imgs[img_id]["name"] == img["name"]
+        assert imgs[img_id]["camera_id"] == img["camera_id"]
+    assert "xys" not in read_images_binary(str(tmp_path / "images.bin"))[3]
+
+    full = read_points3D_full(str(tmp_path / "points3D.bin"))
+    for key, value in points.items():
+        np.testing.assert_array_equal(full[key], value)
+
+    # Writing what was read reproduces the file byte for byte
+    write_points3D_binary(full, str(tmp_path / "again.bin"))
+    assert (tmp_path / "again.bin").read_bytes() == (tmp_path / "points3D.bin").read_bytes()
+
+
+def test_points3D_matches_struct_parser(tmp_path):
+    _, _, points = _synthetic_model(np.random.default_rng(1), n_points=500)
+    path = str(tmp_path / "points3D.bin")
+    write_points3D_binary(points, path)
+
+    xyz_ref, rgb_ref, lengths_ref = _struct_points3D(path)
+    xyz, rgb = read_points3D_binary(path)
+    assert xyz.dtype == np.float32 and rgb.dtype == np.uint8
+    np.testing.assert_array_equal(xyz, xyz_ref.astype(np.float32))
+    np.testing.assert_array_equal(rgb, rgb_ref)
+    np.testing.assert_array_equal(read_points3D_full(path)["track_lengths"], lengths_ref)
+
+
+def _write_model(model_dir, rng, **sizes):
+    model_dir.mkdir(parents=True)
+    cameras, images, points = _synthetic_model(rng, **sizes)
+    write_cameras_binary(cameras, str(model_dir / "cameras.bin"))
+    write_images_binary(images, str(model_dir / "images.bin"))
+    write_points3D_binary(points, str(model_dir / "points3D.bin"))
+    return images, points
+
+
+def test_inspect_model_matches_full_read(tmp_path):
+    images, points = _write_model(tmp_path / "0", np.random.default_rng(3))
+    summary = inspect_model(tmp_path / "0")
+    assert summary["registered_images"] == len(read_images_binary(str(tmp_path / "0" / "images.bin")))
+    full = read_points3D_full(str(tmp_path / "0" / "points3D.bin"))
+    assert summary["points"] == len(full["xyz"])
+    assert np.isclose(summary["mean_track_length"], full["track_lengths"].mean())
+
+
+def test_best_model_has_most_registered_images(tmp_path):
+    rng = np.random.default_rng(4)
+    # Model 0 has fewer cameras but far more keypoints, so a bigger images.bin
+    few, _ = _write_model(tmp_path / "0", rng, n_images=4, n_points=50)
+    for img in few.values():
+        img["xys"] = rng.uniform(0, 640, (5000, 2))
+        img["point3D_ids"] = np.full(5000, -1)
+    write_images_binary(few, str(tmp_path / "0" / "images.bin"))
+    _write_model(tmp_path / "1", rng, n_images=9, n_points=50)
+    assert (tmp_path / "0" / "images.bin").stat().st_size > (tmp_path / "1" / "images.bin").stat().st_size
+
+    (tmp_path / "2").mkdir()  # mapper left an empty directory
+    models = inspect_models(sorted(tmp_path.iterdir()))
+    assert sorted(models) == ["0", "1"]
+    assert select_best_model(models) == "1"
+    assert select_best_model({}) is None
@@ -0,0 +1,67 @@
+"""
+Frame-set analysis cache: an unchanged directory is measured once, any change
+to its frames is measured again, and cached results match a fresh measurement.
+"""
+
+import os
+
+import cv2
+import numpy as np
+
+import frame_analysis
+from frame_analysis import analyze_frames, clear_analysis_cache, list_frames, measure_frames
+from reconstruct import assess_detail_level
+
+
+def _frames(n_frames=12, size=(96, 64)):
+    rng = np.random.default_rng(0)
+    w, h = size
+    frames = []
+    for i in range(n_frames):
+        img = np.zeros((h, w, 3), np.uint8)
+        img[10:50, 20:70] = rng.integers(0, 255, (40, 50, 3), dtype=np.uint8)
+        frames.append(img)
+    return frames
+
+
+def test_unchanged_directory_is_measured_once(tmp_path, monkeypatch, write_frames):
+    clear_analysis_cache()
+    frames_dir = tmp_path / "frames"
+    write_frames(_frames(), frames_dir)
+    reads = []
+    imread = frame_analysis.cv2.imread
+    monkeypatch.setattr(frame_analysis.cv2, "imread", lambda *a: reads.append(a[0]) or imread(*a))
+
+    first = analyze_frames(frames_dir)
+    n_reads = len(reads)
+    second = assess_detail_level(frames_dir)
+
+    assert n_reads > 0 and len(reads) == n_reads
+    assert first == second
+    assert first["frame_count"] == 12 and first["resolution"] == (96, 64)
+    assert first["detail_level"] == "high"
+    assert {k: v for k, v in first.items() if k != "frames"} == measure_frames(list_frames(frames_dir))
+
+
+def test_changed_frames_are_measured_again(tmp_path, write_frames):
+    clear_analysis_cache()
+    frames_dir = tmp_path / "frames"
+    write_frames(_frames(), frames_dir)
+    before = analyze_frames(frames_dir)
+
+    (frames_dir / "frame_000011.png").unlink()
+    assert analyze_frames(frames_dir)["frame_count"] == 11
+
+    # Same names and count, rewritten content
+    target = frames_dir / "frame_000000.png"
+    cv2.imwrite(str(target), np.zeros((32, 48, 3), np.uint8))
+    os.utime(target, ns=(0, 0))
+    after = analyze_frames(frames_dir)
+    assert after["resolution"] == (48, 32) and after != before
+
+
+def test_empty_directory(tmp_path):
+    (tmp_path / "empty").mkdir()
+    analysis = analyze_frames(tmp_path / "empty")
+    assert analysis["frame_count"] == 0 and analysis["detail_level"] == "unknown"
+    assert analysis["resolution"] is None and analysis["frames"] == []
@@ -0,0 +1,91 @@
+"""
+Training image store: cached frames must equal a direct PIL decode + resize,
+and a warm cache must open without decoding anything.
+"""
+
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import image_store
+from image_store import ImageStore, load_resized, sample_order
+
+
+def _write_images(tmp_path, n=5):
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(n):
+        path = tmp_path / f"img_{i}.png"
+        Image.fromarray(rng.integers(0, 256, (48 + i, 64, 3), dtype=np.uint8)).save(path)
+        paths.append(str(path))
+    return paths
+
+
+def test_store_matches_direct_decode(tmp_path):
+    paths = _write_images(tmp_path)
+    sizes = [(24, 32), (25, 32), (12, 16), (50, 64), (26, 32)]
+    store = ImageStore(paths, sizes, str(tmp_path / "cache"), verbose=False)
+
+    assert not store.cache_hit
+    assert len(store) == len(paths)
+    for i, (path, (h, w)) in enumerate(zip(paths, sizes)):
+        expected = np.asarray(Image.open(path).convert("RGB").resize((w, h), Image.LANCZOS))
+        assert store[i].dtype == np.uint8
+        np.testing.assert_array_equal(store[i], expected)
+
+
+def test_warm_cache_skips_decode_and_detects_changes(tmp_path, monkeypatch):
+    paths = _write_images(tmp_path, n=3)
+    sizes = [(24, 32)] * 3
+    cache_dir = str(tmp_path / "cache")
+    first = ImageStore(paths, sizes, cache_dir, verbose=False)
+    expected = [np.array(first[i]) for i in range(3)]
+
+    def no_decode(*args):
+        raise AssertionError("warm cache must not decode")
+
+    monkeypatch.setattr(image_store, "load_resized", no_decode)
+    warm = ImageStore(paths, sizes, cache_dir, verbose=False)
+    assert warm.cache_hit
+    for i in range(3):
+        np.testing.assert_array_equal(warm[i], expected[i])
+
+    # Touching a source image changes the key and forces a rebuild
+    monkeypatch.setattr(image_store, "load_resized", load_resized)
+    st = os.stat(paths[1])
+    os.utime(paths[1], ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert not ImageStore(paths, sizes, cache_dir, verbose=False).cache_hit
+
+
+def test_prefetch_follows_sample_order(tmp_path):
+    paths = _write_images(tmp_path, n=4)
+    store = ImageStore(paths, [(8, 8)] * 4, str(tmp_path / "cache"), verbose=False)
+    order = sample_order(len(store), 50, seed=3)
+
+    seen = [(idx, frame) for idx, frame in store.prefetch(order, depth=2)]
+    assert [idx for idx, _ in seen] == list(order)
+    for idx, frame in seen:
+        np.testing.assert_array_equal(frame, store[idx])
+
+    # Abandoning the iterator early must not hang the worker thread
+    frames = store.prefetch(order, depth=2)
+    next(frames)
+    frames.close()
+
+    with pytest.raises(ValueError):
+        sample_order(0, 10)
+
+
+def test_parallel_build_matches_serial(tmp_path):
+    paths = _write_images(tmp_path, n=8)
+    sizes = [(20 + i, 30) for i in range(8)]
+    serial = ImageStore(paths, sizes, str(tmp_path / "serial"), verbose=False)
+    parallel = ImageStore(paths, sizes, str(tmp_path / "parallel"), verbose=False, workers=4)
+
+    assert len(parallel.load_times) == 8
+    pct = parallel.latency_percentiles()
+    assert 0 < pct["p50"] <= pct["p90"] <= pct["p99"]
+    with open(serial.data_path, "rb") as a, open(parallel.data_path, "rb") as b:
+        assert a.read() == b.read()
@@ -0,0 +1,68 @@
+"""
+SSIM: the separable, cached-window implementation matches a direct 2D
+Gaussian-window computation in value and gradient, whole-image or tiled.
+"""
+
+import pytest
+
+torch = pytest.importorskip("torch")
+import torch.nn.functional as F  # noqa: E402
+
+from losses import gaussian_window, photometric_loss, ssim  # noqa: E402
+
+
+def _reference_ssim(img1, img2, window_size=11, sigma=1.5):
+    x = img1.permute(2, 0, 1).unsqueeze(0)
+    y = img2.permute(2, 0, 1).unsqueeze(0)
+    C = x.shape[1]
+    coords = torch.arange(window_size, dtype=x.dtype) - window_size // 2
+    g = torch.exp(-(coords**2) / (2 * sigma**2))
+    g = g / g.sum()
+    window = (g[:, None] * g[None, :]).expand(C, 1, -1, -1)
+
+    def blur(t):
+        return F.conv2d(t, window, padding=window_size // 2, groups=C)
+
+    mu_x, mu_y = blur(x), blur(y)
+    sigma_x2 = blur(x * x) - mu_x**2
+    sigma_y2 = blur(y * y) - mu_y**2
+    sigma_xy = blur(x * y) - mu_x * mu_y
+    C1, C2 = 0.01**2, 0.03**2
+    ssim_map = ((2 * mu_x * mu_y + C1) * (2 * sigma_xy + C2)) / ((mu_x**2 + mu_y**2 + C1) * (sigma_x2 + sigma_y2 + C2))
+    return ssim_map.mean()
+
+
+def _images(h=37, w=53, dtype=torch.float64):
+    gen = torch.Generator().manual_seed(0)
+    target = torch.rand(h, w, 3, generator=gen, dtype=dtype)
+    rendered = (target + 0.1 * torch.randn(h, w, 3, generator=gen, dtype=dtype)).clamp(0, 1)
+    return rendered.requires_grad_(True), target
+
+
+@pytest.mark.parametrize("tile_rows", [0, 8, 36, 100])
+def test_ssim_matches_2d_reference(tile_rows):
+    rendered, target = _images()
+    expected = _reference_ssim(rendered, target)
+    (expected_grad,) = torch.autograd.grad(expected, rendered)
+
+    value = ssim(rendered, target, tile_rows=tile_rows)
+    (grad,) = torch.autograd.grad(value, rendered)
+    assert torch.allclose(value, expected, rtol=0, atol=1e-12)
+    assert torch.allclose(grad, expected_grad, rtol=0, atol=1e-12)
+
+
+def test_ssim_float32_and_window_cache():
+    rendered, target = _images(dtype=torch.float32)
+    assert torch.allclose(ssim(rendered, target), _reference_ssim(rendered, target), atol=1e-6)
+    assert ssim(target, target).item() == pytest.approx(1.0, abs=1e-6)
+    window = gaussian_window(11, 1.5, torch.float32, torch.device("cpu"))
+    assert window is gaussian_window(11, 1.5, torch.float32, torch.device("cpu"))
+    assert window.sum().item() == pytest.approx(1.0)
+
+
+def test_photometric_loss():
+    rendered, target = _images()
+    l1 = F.l1_loss(rendered, target)
+    assert torch.equal(photometric_loss(rendered, target, ssim_lambda=0), l1)
+    expected = 0.8 * l1 + 0.2 * (1 - _reference_ssim(rendered, target))
+    assert torch.allclose(photometric_loss(rendered, target, ssim_lambda=0.2), expected, atol=1e-12)
@@ -0,0 +1,105 @@
+"""
+Pair selection for COLMAP matching: capture-order pairs keep the chain,
+hash retrieval finds loop closures on later laps, turntable orbits get their
+lap period detected, and the pair count grows linearly with the number of frames.
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+from matching import (
+    build_pair_list,
+    detect_orbit_period,
+    frame_hashes,
+    popcount64,
+    resolve_strategy,
+    retrieval_pairs,
+    select_pairs,
+    sequential_pairs,
+    write_pair_list,
+)
+from preprocess import perceptual_hash
+
+
+def test_popcount_matches_python():
+    rng = np.random.default_rng(0)
+    values = rng.integers(0, 2**63, 200, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    assert [int(c) for c in popcount64(values)] == [int(v).bit_count() for v in values]
+
+
+def test_resolve_strategy():
+    assert resolve_strategy("auto", 100, exhaustive_below=300) == "exhaustive"
+    assert resolve_strategy("auto", 300, exhaustive_below=300) == "pairs"
+    assert resolve_strategy("exhaustive", 5000) == "exhaustive"
+    with pytest.raises(ValueError):
+        resolve_strategy("vocab_tree", 10)
+
+
+def test_sequential_pairs_cover_window():
+    pairs = sequential_pairs(6, window=2)
+    assert pairs == {(0, 1), (0, 2), (1, 2), (1, 3), (2, 3), (2, 4), (3, 4), (3, 5), (4, 5)}
+
+
+def test_retrieval_skips_temporal_neighbours_and_unreadable_frames():
+    hashes = np.array([0b1111, 0b1110, 0b1111, 0xFFFF0000, 0b1111], dtype=np.uint64)
+    valid = np.array([True, True, True, True, False])
+    pairs = retrieval_pairs(hashes, neighbors=1, valid=valid, min_gap=1)
+    assert (0, 2) in pairs
+    assert all(abs(i - j) > 1 for i, j in pairs)
+    assert all(4 not in pair for pair in pairs)
+
+
+def _spiral(rotating_object, per_lap, laps):
+    """Orbit frames where each lap is seen from a lower ring (vertically squashed a bit more)."""
+    frames, _ = rotating_object(n_frames=per_lap * laps, step_deg=360 / per_lap)
+    h, w = frames[0].shape[:2]
+    spiral = []
+    for i, frame in enumerate(frames):
+        squash = 1.0 - 0.06 * (i // per_lap)
+        scaled = cv2.resize(frame, (w, int(h * squash)))
+        top = (h - scaled.shape[0]) // 2
+        spiral.append(cv2.copyMakeBorder(scaled, top, h - scaled.shape[0] - top, 0, 0, cv2.BORDER_CONSTANT))
+    return spiral
+
+
+def test_pairs_close_loops_across_laps(tmp_path, rotating_object, write_frames):
+    per_lap, laps = 24, 3
+    frames, _ = rotating_object(n_frames=per_lap * laps, step_deg=360 / per_lap)
+    paths = write_frames(frames, tmp_path)
+
+    window, neighbors = 3, 4
+    pairs, _ = select_pairs(paths, window=window, neighbors=neighbors, orbit=False)
+
+    assert len(pairs) == len(set(pairs))
+    assert len(pairs) <= len(paths) * (window + neighbors)
+    names = set(pairs)
+    for i in range(len(paths) - per_lap):
+        assert (paths[i].name, paths[i + per_lap].name) in names
+    for i in range(len(paths) - 1):
+        assert (paths[i].name, paths[i + 1].name) in names
+
+    pair_list = write_pair_list(pairs, tmp_path / "pairs.txt")
+    assert pair_list.read_text().splitlines()[0] == f"{paths[0].name} {paths[1].name}"
+
+
+@pytest.mark.parametrize("per_lap", [20, 31, 90])
+def test_orbit_period_detected_on_spiral(tmp_path, per_lap, rotating_object, write_frames):
+    paths = write_frames(_spiral(rotating_object, per_lap, laps=3), tmp_path)
+    hashes, valid = frame_hashes(paths)
+    assert detect_orbit_period(hashes, valid) == per_lap
+
+    result = build_pair_list(paths, tmp_path / "pairs.txt", strategy="orbit", window=3)
+    assert result["period"] == per_lap
+    pairs = {tuple(line.split()) for line in (tmp_path / "pairs.txt").read_text().splitlines()}
+    assert len(pairs) == result["pairs"] <= len(paths) * (3 + 7)
+    for i in range(len(paths) - per_lap):
+        assert (paths[i].name, paths[i + per_lap].name) in pairs
+
+
+def test_no_orbit_without_a_second_lap(rotating_object):
+    frames, _ = rotating_object(n_frames=40, step_deg=360 / 40)
+    hashes = np.array([perceptual_hash(f) for f in frames], dtype=np.uint64)
+    assert detect_orbit_period(hashes) is None
+    rng = np.random.default_rng(3)
+    assert detect_orbit_period(rng.integers(0, 2**63, 200, dtype=np.uint64)) is None
@@ -0,0 +1,130 @@
+"""
+Sub-model merging on a synthetic orbit split into overlapping fragments, each
+in its own similarity frame: the merged model must recover every camera and
+point in one frame, with consistent 2D-3D links, and survive a write/read.
+"""
+
+import numpy as np
+
+from colmap_io import qvec2rotmat, rotmat2qvec
+from model_merge import (
+    camera_center,
+    load_model,
+    merge_model_dirs,
+    merge_models,
+    similarity_transform,
+    transform_model,
+    write_model,
+)
+
+
+def _look_at(center):
+    z = -center / np.linalg.norm(center)
+    x = np.cross([0.0, 0.0, 1.0], z)
+    x /= np.linalg.norm(x)
+    R = np.stack([x, np.cross(z, x), z])
+    return R, -R @ center
+
+
+def _random_rotation(rng):
+    q = rng.normal(size=4)
+    return qvec2rotmat(q / np.linalg.norm(q))
+
+
+def _fragment(image_ids, point_ids, centers, xyz, name_offset=0):
+    """Sub-model seeing image_ids and point_ids of the scene, in the world frame."""
+    images = {}
+    for local_id, i in enumerate(image_ids, start=1):
+        R, t = _look_at(centers[i])
+        cam = xyz @ R.T + t
+        links = np.full(len(xyz), -1, dtype=np.int64)
+        links[point_ids] = point_ids + 1
+        images[local_id] = {"qvec": rotmat2qvec(R), "tvec": t, "camera_id": 1,
+                            "name": f"frame_{i + name_offset:06d}.png",
+                            "xys": cam[:, :2] / cam[:, 2:] * 500 + 320, "point3D_ids": links}
+    lengths = np.full(len(point_ids), len(image_ids), dtype=np.int64)
+    track = np.zeros(int(lengths.sum()), dtype=[("image_id", "<i4"), ("point2D_idx", "<i4")])
+    track["image_id"] = np.tile(np.arange(1, len(image_ids) + 1), len(point_ids))
+    track["point2D_idx"] = np.repeat(point_ids, len(image_ids))
+    points = {"ids": point_ids.astype(np.int64) + 1, "xyz": xyz[point_ids].copy(),
+              "rgb": np.full((len(point_ids), 3), 128, dtype=np.uint8),
+              "error": np.full(len(point_ids), 0.5), "track_lengths": lengths, "track": track}
+    cameras = {1: {"model_id": 1, "width": 640, "height": 480, "params": np.array([500.0, 500.0, 320.0, 240.0])}}
+    return {"cameras": cameras, "images": images, "points": points}
+
+
+def _scene(rng, n_images=16, n_points=200):
+    angles = np.linspace(0, 2 * np.pi, n_images, endpoint=False)
+    centers = np.stack([5 * np.cos(angles), 5 * np.sin(angles), rng.uniform(-1, 1, n_images)], axis=1)
+    return centers, rng.uniform(-1, 1, (n_points, 3))
+
+
+def _check_links(model):
+    starts = np.cumsum(model["points"]["track_lengths"]) - model["points"]["track_lengths"]
+    observed = set()
+    for p, point_id in enumerate(model["points"]["ids"]):
+        track = model["points"]["track"][starts[p]:starts[p] + model["points"]["track_lengths"][p]]
+        assert len(track) >= 2
+        for image_id, idx in zip(track["image_id"], track["point2D_idx"]):
+            assert model["images"][int(image_id)]["point3D_ids"][idx] == point_id
+            observed.add((int(image_id), int(idx)))
+    linked = {(i, int(k)) for i, img in model["images"].items() for k in np.flatnonzero(img["point3D_ids"] >= 0)}
+    assert linked == observed
+
+
+def test_rotmat_qvec_round_trip():
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        R = _random_rotation(rng)
+        assert np.allclose(qvec2rotmat(rotmat2qvec(R)), R)
+
+
+def test_similarity_transform_recovers_known_transform():
+    rng = np.random.default_rng(1)
+    src = rng.normal(size=(10, 3))
+    R, t = _random_rotation(rng), rng.normal(size=3)
+    scale, R_fit, t_fit = similarity_transform(src, 2.5 * src @ R.T + t)
+    assert np.isclose(scale, 2.5) and np.allclose(R_fit, R) and np.allclose(t_fit, t)
+
+
+def test_merge_fragmented_models(tmp_path):
+    rng = np.random.default_rng(2)
+    centers, xyz = _scene(rng)
+    a = _fragment(np.arange(0, 10), np.arange(0, 120), centers, xyz)
+    b = _fragment(np.arange(6, 16), np.arange(80, 200), centers, xyz)
+    # Each sub-model comes out of the mapper in its own arbitrary frame
+    b = transform_model(b, 0.3, _random_rotation(rng), rng.normal(size=3))
+    a = transform_model(a, 1.0, np.eye(3), np.zeros(3))
+    stray = _fragment(np.arange(0, 4), np.arange(0, 50), centers, xyz, name_offset=1000)
+
+    for name, model in [("0", a), ("1", b), ("2", stray)]:
+        write_model(model, tmp_path / "sparse" / name)
+    report = merge_model_dirs([tmp_path / "sparse" / n for n in ["0", "1", "2"]], tmp_path / "sparse" / "merged")
+
+    assert report["merged"] == ["0", "1"] and report["skipped"] == ["2"]
+    assert report["alignments"]["1"]["shared"] == 4
+    assert report["alignments"]["1"]["error"] < 1e-6
+    assert report["registered_images"] == 16
+
+    merged = load_model(tmp_path / "sparse" / "merged")
+    _check_links(merged)
+    for img in merged["images"].values():
+        assert np.allclose(camera_center(img), centers[int(img["name"][6:12])], atol=1e-6)
+    # Points only model 1 saw are brought into model 0's frame
+    by_id = dict(zip(merged["points"]["ids"], merged["points"]["xyz"]))
+    assert len(by_id) == 200
+    assert all(any(np.allclose(p, xyz[k], atol=1e-6) for p in by_id.values()) for k in range(120, 200))
+
+
+def test_merge_leaves_inputs_untouched():
+    rng = np.random.default_rng(3)
+    centers, xyz = _scene(rng)
+    a = _fragment(np.arange(0, 10), np.arange(0, 120), centers, xyz)
+    b = _fragment(np.arange(5, 16), np.arange(60, 200), centers, xyz)
+    links = a["images"][7]["point3D_ids"].copy()
+
+    merged, report = merge_models({"0": a, "1": b})
+    assert report["merged"] == ["1", "0"]  # starts from the model with more images
+    assert np.array_equal(a["images"][7]["point3D_ids"], links)
+    assert len(merged["images"]) == 16
+    _check_links(merged)
@@ -0,0 +1,86 @@
+"""
+Frame extraction engines and streaming mode must match the raw_frames/ round-trip;
+fused masking/cropping must match the separate passes.
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+from pipeline import (
+    EXTRACT_ENGINES,
+    auto_crop_frames,
+    crop_frames_to_union,
+    extract_frames,
+    iter_video_frames,
+    mask_corner_artifacts,
+    preprocess_video,
+)
+from preprocess import preprocess_frames
+
+
+def test_stream_matches_directory_path(tmp_path, write_video):
+    video = write_video(tmp_path / "capture.avi")
+    options = dict(skip_ui=False, min_blur_score=1.0, duplicate_threshold=0.98, verbose=False)
+
+    extract_frames(video, tmp_path / "raw", every_n_frames=2)
+    dir_stats = preprocess_frames(tmp_path / "raw", tmp_path / "clean_dir", **options)
+    stream_stats = preprocess_video(video, tmp_path / "clean_stream", every_n_frames=2, **options)
+
+    assert stream_stats == dir_stats
+    assert dir_stats["kept"] > 0
+    manifest_dir = (tmp_path / "clean_dir" / "frames_manifest.txt").read_text()
+    manifest_stream = (tmp_path / "clean_stream" / "frames_manifest.txt").read_text()
+    assert manifest_stream == manifest_dir
+
+    for f in sorted((tmp_path / "clean_dir").glob("*.png")):
+        a = cv2.imread(str(f))
+        b = cv2.imread(str(tmp_path / "clean_stream" / f.name))
+        assert b is not None and np.array_equal(a, b)
+
+
+@pytest.mark.parametrize("engine", EXTRACT_ENGINES)
+def test_extraction_engines_yield_same_frames(tmp_path, engine, write_video):
+    video = write_video(tmp_path / "capture.avi", n_frames=31)
+    reference = list(iter_video_frames(video, every_n_frames=4, engine="read"))
+    frames = list(iter_video_frames(video, every_n_frames=4, engine=engine, seek_min_gap=2))
+
+    assert [name for name, _ in frames] == [name for name, _ in reference]
+    assert len(frames) == 8
+    for (_, a), (_, b) in zip(frames, reference):
+        assert np.array_equal(a, b)
+
+
+def test_fused_mask_and_crop_match_separate_passes(tmp_path):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    rng = np.random.default_rng(4)
+    for i in range(6):
+        frame = np.zeros((300, 400, 3), dtype=np.uint8)
+        frame[100 + i * 5:180 + i * 5, 150 - i * 8:260] = rng.integers(40, 255, (80, 110 + i * 8, 3), dtype=np.uint8)
+        if i % 2:
+            frame[270:290, 300:390] = 12  # faint corner light artifact
+        cv2.imwrite(str(raw / f"frame_{i:06d}.png"), frame)
+    options = dict(skip_ui=False, skip_duplicates=False, min_blur_score=0.0, verbose=False)
+
+    # Separate passes: preprocess, mask, then scan + crop
+    preprocess_frames(raw, tmp_path / "separate", **options)
+    assert mask_corner_artifacts(tmp_path / "separate") == 3
+    separate = auto_crop_frames(tmp_path / "separate", padding=0.1)
+
+    # Masking and boxes captured while preprocessing writes, then one crop pass
+    stats = preprocess_frames(raw, tmp_path / "fused", mask_margin=80, track_bbox=True, **options)
+    assert stats["artifacts_masked"] == 3
+    fused = crop_frames_to_union(tmp_path / "fused", stats["bboxes"], stats["frame_size"], padding=0.1)
+
+    # Single-scan directory version
+    preprocess_frames(raw, tmp_path / "scan", **options)
+    scanned = auto_crop_frames(tmp_path / "scan", padding=0.1, mask_margin=80)
+
+    assert not separate["skipped"]
+    assert fused == separate
+    assert scanned == dict(separate, artifacts_masked=3)
+    for f in sorted((tmp_path / "separate").glob("*.png")):
+        expected = cv2.imread(str(f))
+        assert np.array_equal(cv2.imread(str(tmp_path / "fused" / f.name)), expected)
+        assert np.array_equal(cv2.imread(str(tmp_path / "scan" / f.name)), expected)
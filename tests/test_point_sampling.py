@@ -0,0 +1,53 @@
+"""
+Initial-point subsampling: the voxel and farthest-point samplers return the
+exact budget, keep a thin feature that random choice starves, and leave
+small clouds alone.
+"""
+
+import numpy as np
+import pytest
+
+from point_sampling import morton_codes, subsample_points
+
+
+def _blob_and_wire(n_blob=100000, n_wire=400, seed=0):
+    """A dense blob with a thin wire sticking out of it (indices n_blob and up)."""
+    rng = np.random.default_rng(seed)
+    blob = rng.normal(0, 0.05, (n_blob, 3))
+    wire = np.zeros((n_wire, 3))
+    wire[:, 0] = np.linspace(0.3, 1.0, n_wire)
+    return np.concatenate([blob, wire]), n_blob
+
+
+def test_morton_codes_preserve_cell_nesting():
+    rng = np.random.default_rng(1)
+    points = rng.uniform(-1, 1, (2000, 3))
+    codes = morton_codes(points)
+    # Two points in the same cell of a 2^k grid share the top 3k bits of code
+    cells = np.floor((points - points.min(axis=0)) / np.ptp(points, axis=0).max() * 8).clip(0, 7).astype(int)
+    for (i, j) in rng.integers(0, len(points), (200, 2)):
+        if (cells[i] == cells[j]).all():
+            assert codes[i] >> np.uint64(54) == codes[j] >> np.uint64(54)
+
+
+@pytest.mark.parametrize("method", ["voxel", "fps"])
+def test_budget_spread_over_thin_features(method):
+    points, n_blob = _blob_and_wire()
+    idx = subsample_points(points, 2000, method)
+    assert len(idx) == 2000 and len(np.unique(idx)) == 2000
+    assert np.all(np.diff(idx) > 0)
+
+    on_wire = (idx >= n_blob).sum()
+    random_on_wire = (subsample_points(points, 2000, "random", rng=np.random.default_rng(0)) >= n_blob).sum()
+    assert on_wire >= 20 and on_wire > 2 * random_on_wire
+
+
+def test_small_cloud_and_duplicates():
+    points = np.random.default_rng(2).normal(size=(100, 3))
+    assert np.array_equal(subsample_points(points, 100), np.arange(100))
+    # Ten distinct positions cannot fill a budget of 50
+    repeated = np.repeat(points[:10], 30, axis=0)
+    idx = subsample_points(repeated, 50)
+    assert len(idx) == 10 and len(np.unique(repeated[idx], axis=0)) == 10
+    with pytest.raises(ValueError):
+        subsample_points(points, 10, "octree")
@@ -0,0 +1,150 @@
+"""
+Frame filtering: the parallel path must keep exactly the frames the serial path keeps,
+the global perceptual-hash index must agree with a brute-force scan, and a run
+resumed from its journal must match an uninterrupted one.
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+from journal import JOURNAL_NAME
+from preprocess import CANDIDATE_DIR, HammingIndex, content_bbox, hamming_distance, perceptual_hash, preprocess_frames
+
+
+def _frames(n_frames: int = 30) -> list:
+    rng = np.random.default_rng(1)
+    texture = rng.integers(0, 255, (80, 80, 3), dtype=np.uint8)
+    frames = []
+    for i in range(n_frames):
+        # Scene colour changes every third frame; frames in between are duplicates
+        hsv = np.full((240, 320, 3), ((i // 3) * 17 % 180, 200, 200), dtype=np.uint8)
+        frame = cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
+        frame[100:180, 40:120] = texture
+        if i % 7 == 0:
+            frame = cv2.GaussianBlur(frame, (31, 31), 12)  # blurry frame
+        if i % 11 == 0:
+            frame[:40, :] = (200, 120, 40)  # UI-coloured band in the top region
+        frames.append(frame)
+    return frames
+
+
+@pytest.mark.parametrize("enhance,global_dedup", [(False, False), (True, False), (False, True), (True, True)])
+def test_parallel_matches_serial(tmp_path, enhance, global_dedup, write_frames):
+    frames_dir = tmp_path / "raw"
+    write_frames(_frames(), frames_dir)
+    options = dict(min_blur_score=50.0, duplicate_threshold=0.98, sharpen=enhance,
+                   global_dedup=global_dedup, verbose=False)
+
+    serial = preprocess_frames(frames_dir, tmp_path / "serial", **options)
+    parallel = preprocess_frames(frames_dir, tmp_path / "parallel", workers=3, **options)
+
+    assert parallel == serial
+    assert serial["ui_filtered"] and serial["blur_filtered"] and serial["duplicate_filtered"]
+    assert (tmp_path / "parallel" / "frames_manifest.txt").read_text() == \
+        (tmp_path / "serial" / "frames_manifest.txt").read_text()
+    # No enhanced candidates left behind
+    assert sorted(f.name for f in (tmp_path / "parallel").iterdir()) == \
+        sorted(f.name for f in (tmp_path / "serial").iterdir())
+    for f in sorted((tmp_path / "serial").glob("*.png")):
+        assert np.array_equal(cv2.imread(str(f)), cv2.imread(str(tmp_path / "parallel" / f.name)))
+
+
+def _interrupt(out_dir):
+    """Leave out_dir as a run killed just before journaling its last two frames would."""
+    # A parallel run also leaves its scratch candidates behind
+    (out_dir / CANDIDATE_DIR).mkdir(exist_ok=True)
+    cv2.imwrite(str(out_dir / CANDIDATE_DIR / "frame_999999.png"), np.zeros((8, 8, 3), np.uint8))
+    journal = out_dir / JOURNAL_NAME
+    lines = journal.read_text().splitlines(keepends=True)
+    keep_records = len(lines) - 3
+    journal.write_text("".join(lines[:1 + keep_records]) + '{"name": "frame_0000')  # torn write
+    journaled = {line.split('"name": "')[1].split('"')[0] for line in lines[1:1 + keep_records]}
+    for f in out_dir.glob("*.png"):
+        if f.name not in journaled:
+            f.unlink()
+    (out_dir / "frames_manifest.txt").unlink()
+    # A journaled frame whose output changed since (e.g. cropped) is redone
+    first = sorted(out_dir.glob("*.png"))[0]
+    cv2.imwrite(str(first), cv2.imread(str(first))[10:, 10:])
+
+
+@pytest.mark.parametrize("workers,resume_workers,global_dedup",
+                         [(1, 1, False), (3, 3, False), (1, 3, False), (3, 1, False), (1, 1, True)])
+def test_resume_matches_uninterrupted(tmp_path, workers, resume_workers, global_dedup, write_frames):
+    frames_dir = tmp_path / "raw"
+    write_frames(_frames(), frames_dir)
+    options = dict(min_blur_score=50.0, duplicate_threshold=0.98, sharpen=True, global_dedup=global_dedup,
+                   mask_margin=20, track_bbox=True, verbose=False)
+
+    expected = preprocess_frames(frames_dir, tmp_path / "full", **options)
+
+    out_dir = tmp_path / "resumed"
+    preprocess_frames(frames_dir, out_dir, workers=workers, **options)
+    _interrupt(out_dir)
+    resumed = preprocess_frames(frames_dir, out_dir, workers=resume_workers, resume=True, **options)
+
+    assert resumed == expected
+    assert not (out_dir / CANDIDATE_DIR).exists()
+    assert (out_dir / "frames_manifest.txt").read_text() == (tmp_path / "full" / "frames_manifest.txt").read_text()
+    assert sorted(f.name for f in out_dir.glob("*.png")) == sorted(f.name for f in (tmp_path / "full").glob("*.png"))
+    for f in sorted((tmp_path / "full").glob("*.png")):
+        assert np.array_equal(cv2.imread(str(f)), cv2.imread(str(out_dir / f.name)))
+
+
+def test_resume_ignores_journal_from_other_parameters(tmp_path, write_frames):
+    frames_dir = tmp_path / "raw"
+    write_frames(_frames(n_frames=12), frames_dir)
+    preprocess_frames(frames_dir, tmp_path / "out", min_blur_score=50.0, verbose=False)
+    stricter = preprocess_frames(frames_dir, tmp_path / "out", min_blur_score=5000.0, resume=True, verbose=False)
+    assert stricter["kept"] == 0 and stricter["blur_filtered"] > 0
+
+
+def test_hamming_index_matches_linear_scan():
+    rng = np.random.default_rng(2)
+    stored = [int(v) for v in rng.integers(0, 2**63, 500, dtype=np.uint64)]
+    index = HammingIndex()
+    for value in stored:
+        index.add(value)
+    assert len(index) == len(stored)
+
+    # Queries: exact copies, a few flipped bits, and unrelated hashes
+    queries = stored[:50] + [v ^ (1 << 3) ^ (1 << 40) for v in stored[50:100]]
+    queries += [int(v) for v in rng.integers(0, 2**63, 100, dtype=np.uint64)]
+    for radius in (0, 2, 6):
+        for q in queries:
+            expected = any(hamming_distance(q, v) <= radius for v in stored)
+            found = index.find_within(q, radius)
+            assert (found is not None) == expected
+            if found is not None:
+                assert hamming_distance(q, found) <= radius
+
+
+def test_global_dedup_drops_repeat_laps(tmp_path, write_frames):
+    frames_dir = tmp_path / "raw"
+    rng = np.random.default_rng(3)
+    views = [rng.integers(0, 255, (120, 160, 3), dtype=np.uint8) for _ in range(6)]
+    views = [cv2.resize(cv2.resize(v, (16, 12)), (160, 120), interpolation=cv2.INTER_NEAREST) for v in views]
+    write_frames(views * 3, frames_dir)  # three laps
+    assert perceptual_hash(views[0]) != perceptual_hash(views[1])
+
+    options = dict(skip_ui=False, skip_duplicates=False, min_blur_score=0.0, verbose=False)
+    plain = preprocess_frames(frames_dir, tmp_path / "plain", **options)
+    dedup = preprocess_frames(frames_dir, tmp_path / "dedup", global_dedup=True, **options)
+
+    assert plain["kept"] == 18
+    assert dedup["kept"] == 6
+    assert dedup["global_duplicate_filtered"] == 12
+    assert "# Global duplicate filtered: 12" in (tmp_path / "dedup" / "frames_manifest.txt").read_text()
+
+
+def test_content_bbox_matches_index_scan():
+    rng = np.random.default_rng(5)
+    assert content_bbox(np.zeros((50, 60, 3), dtype=np.uint8)) is None
+    for _ in range(20):
+        image = np.zeros((90, 120, 3), dtype=np.uint8)
+        for _ in range(rng.integers(1, 4)):
+            y, x = rng.integers(0, 80), rng.integers(0, 110)
+            image[y:y + rng.integers(1, 10), x:x + rng.integers(1, 10)] = rng.integers(4, 255)
+        ys, xs = np.where(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) > 3)
+        assert content_bbox(image) == (xs.min(), ys.min(), xs.max(), ys.max())
@@ -0,0 +1,170 @@
+"""
+Compositing helpers shared by the rembg and batched onnxruntime engines,
+keyframe mask propagation on a synthetic rotating object, and resuming
+keyframe segmentation from its journal.
+"""
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from journal import JOURNAL_NAME, FrameJournal
+from segment import (
+    _segment_propagated,
+    composite_background,
+    mask_iou,
+    BatchSegmenter,
+    naive_cutout,
+    prediction_to_mask,
+    prepare_input,
+    propagate_mask,
+)
+
+
+def test_naive_cutout_matches_rembg_composite():
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, (40, 50, 3), dtype=np.uint8)
+    mask = rng.integers(0, 256, (40, 50), dtype=np.uint8)
+
+    # rembg.bg.naive_cutout: Image.composite(img, transparent, mask)
+    empty = Image.new("RGBA", (50, 40), 0)
+    expected = np.array(Image.composite(Image.fromarray(image), empty, Image.fromarray(mask)))
+
+    assert np.array_equal(naive_cutout(image, mask), expected[:, :, :3])
+
+
+@pytest.mark.parametrize("bg_color", [(0, 0, 0), (255, 255, 255), (12, 200, 77)])
+def test_composite_matches_float_blend(bg_color):
+    rng = np.random.default_rng(1)
+    fg = rng.integers(0, 256, (60, 70, 3), dtype=np.uint8)
+    alpha = rng.integers(0, 256, (60, 70), dtype=np.uint8)
+    alpha[:5] = 0
+    alpha[-5:] = 255
+
+    # The original float path
+    a = np.stack([alpha.astype(np.float32) / 255.0] * 3, axis=-1)
+    expected = (fg * a + np.full_like(fg, bg_color) * (1 - a)).astype(np.uint8)
+
+    out = np.empty_like(fg)
+    result = composite_background(fg, alpha, bg_color, out=out)
+    assert result is out
+    assert np.abs(result.astype(int) - expected).max() <= 1
+
+
+def test_prediction_to_mask_normalizes_and_resizes():
+    pred = np.linspace(-3.0, 5.0, 320 * 320, dtype=np.float32).reshape(320, 320)
+    mask = prediction_to_mask(pred, (640, 480))
+
+    assert mask.shape == (480, 640)
+    assert mask.dtype == np.uint8
+    assert mask.min() == 0 and mask.max() >= 254
+    assert prediction_to_mask(np.zeros((8, 8), np.float32), (4, 4)).max() == 0
+
+
+class _StubOrtSession:
+    """Stands in for rembg's onnxruntime session: records the input, returns a fixed output."""
+
+    def __init__(self, output):
+        self.output = output
+        self.fed = None
+
+    def get_inputs(self):
+        return [type("Input", (), {"name": "input"})()]
+
+    def run(self, output_names, feeds):
+        self.fed = feeds["input"]
+        return [self.output]
+
+
+@pytest.mark.parametrize("model_name", list(BatchSegmenter.MODEL_SPECS))
+def test_batch_path_matches_rembg_sessions(model_name):
+    sessions = pytest.importorskip("rembg.sessions")
+    session_class = next(cls for cls in sessions.sessions_class if cls.name() == model_name)
+    spec = BatchSegmenter.MODEL_SPECS[model_name]
+    rng = np.random.default_rng(2)
+    image = rng.integers(0, 200, (90, 120, 3), dtype=np.uint8)
+    output = rng.normal(size=(1, 1, spec["size"], spec["size"])).astype(np.float32)
+
+    # rembg's own predict(), with the onnxruntime session swapped for the stub
+    session = object.__new__(session_class)
+    session.inner_session = _StubOrtSession(output)
+    [expected_mask] = session.predict(Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB)))
+
+    x = prepare_input(image, spec["size"], spec["mean"], spec["std"])
+    assert x.dtype == np.float32
+    assert np.array_equal(x, session.inner_session.fed[0])
+    assert np.array_equal(prediction_to_mask(output[0, 0], (120, 90)), np.array(expected_mask))
+
+
+def test_propagated_masks_track_rotation(rotating_object):
+    frames, masks = rotating_object()
+    mask = masks[0]
+    for i in range(1, len(frames)):
+        mask, confidence = propagate_mask(frames[i - 1], mask, frames[i])
+        assert confidence > 0.9
+        assert mask_iou(mask, masks[i]) > 0.95
+
+
+def test_propagation_confidence_drops_on_a_cut(rotating_object):
+    frames, masks = rotating_object()
+    other, _ = rotating_object(seed=5)
+    _, confidence = propagate_mask(frames[0], masks[0], np.roll(other[0], 100, axis=1))
+    assert confidence < 0.9
+
+
+def test_keyframe_mode_runs_network_on_every_kth_frame(tmp_path, rotating_object, write_frames):
+    frames, masks = rotating_object(n_frames=13)
+    paths = write_frames(frames, tmp_path)
+    truth = {frame.tobytes(): mask for frame, mask in zip(frames, masks)}
+    out = tmp_path / "out"
+    (out / "masks").mkdir(parents=True)
+    stats = {"total": len(paths), "processed": 0, "errors": 0}
+
+    _segment_propagated(lambda img: truth[img.tobytes()], paths, out, (0, 0, 0), True, stats,
+                        False, keyframe_interval=4, min_confidence=0.9, max_area_change=0.15)
+
+    assert stats["processed"] == 13
+    assert stats["inferred"] == 4 and stats["propagated"] == 9 and stats["fallbacks"] == 0
+    for path, mask in zip(paths, masks):
+        assert mask_iou(cv2.imread(str(out / "masks" / path.name), cv2.IMREAD_GRAYSCALE), mask) > 0.95
+
+
+@pytest.mark.parametrize("journaled", [0, 3, 6, 9, 12])
+def test_resumed_keyframe_run_matches_uninterrupted(tmp_path, journaled, rotating_object, write_frames):
+    frames, masks = rotating_object(n_frames=12)
+    other, other_masks = rotating_object(n_frames=12, seed=5)
+    # A cut at frame 6 forces a fallback keyframe
+    frames[6:] = [np.roll(f, 100, axis=1) for f in other[6:]]
+    masks[6:] = [np.roll(m, 100, axis=1) for m in other_masks[6:]]
+    paths = write_frames(frames, tmp_path / "frames")
+    truth = {frame.tobytes(): mask for frame, mask in zip(frames, masks)}
+    options = dict(bg_color=(0, 0, 0), save_masks=True, verbose=False, keyframe_interval=4,
+                   min_confidence=0.9, max_area_change=0.15)
+
+    def run(out, resume):
+        (out / "masks").mkdir(parents=True, exist_ok=True)
+        stats = {"total": len(paths), "processed": 0, "errors": 0}
+        with FrameJournal(out / JOURNAL_NAME, "segment", {}, "", resume=resume) as journal:
+            _segment_propagated(lambda img: truth[img.tobytes()], paths, out, options["bg_color"],
+                                options["save_masks"], stats, options["verbose"], options["keyframe_interval"],
+                                options["min_confidence"], options["max_area_change"], journal=journal)
+        del stats["seconds"]
+        return stats
+
+    expected = run(tmp_path / "full", resume=False)
+    assert expected["fallbacks"] == 1
+
+    out = tmp_path / "resumed"
+    run(out, resume=False)
+    # Kill after `journaled` frames: later records and outputs never happened
+    lines = (out / JOURNAL_NAME).read_text().splitlines(keepends=True)
+    (out / JOURNAL_NAME).write_text("".join(lines[:1 + journaled]))
+    for path in paths[journaled:]:
+        (out / path.name).unlink()
+
+    assert run(out, resume=True) == expected
+    for path in paths:
+        assert np.array_equal(cv2.imread(str(out / path.name)), cv2.imread(str(tmp_path / "full" / path.name)))
+        assert np.array_equal(cv2.imread(str(out / "masks" / path.name)),
+                              cv2.imread(str(tmp_path / "full" / "masks" / path.name)))
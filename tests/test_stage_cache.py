@@ -0,0 +1,110 @@
+"""
+Stage cache: a stage reruns only when its upstream key or parameters change,
+or when its outputs were touched since the manifest was written.
+"""
+
+import sys
+
+import pipeline
+from stage_cache import MANIFEST_NAME, load_manifest, run_stage, stage_key
+
+
+def _writer(stage_dir, calls, name="out.txt"):
+    def run():
+        calls.append(name)
+        (stage_dir / name).write_text(str(len(calls)))
+        return {"files": 1}
+    return run
+
+
+def test_run_stage_reuses_until_inputs_change(tmp_path):
+    stage_dir = tmp_path / "stage"
+    calls = []
+
+    first = run_stage("demo", stage_dir, {"threshold": 1}, "up", _writer(stage_dir, calls))
+    again = run_stage("demo", stage_dir, {"threshold": 1}, "up", _writer(stage_dir, calls))
+    assert not first["cached"] and again["cached"]
+    assert again["key"] == first["key"] and again["stats"] == {"files": 1}
+    assert calls == ["out.txt"]
+
+    # Parameter change, upstream change and --no-cache all recompute
+    run_stage("demo", stage_dir, {"threshold": 2}, "up", _writer(stage_dir, calls))
+    run_stage("demo", stage_dir, {"threshold": 2}, "other", _writer(stage_dir, calls))
+    run_stage("demo", stage_dir, {"threshold": 2}, "other", _writer(stage_dir, calls), use_cache=False)
+    assert len(calls) == 4
+
+
+def test_touched_outputs_are_recomputed_and_stale_files_cleared(tmp_path):
+    stage_dir = tmp_path / "stage"
+    calls = []
+    run_stage("demo", stage_dir, {}, "up", _writer(stage_dir, calls, "a.txt"))
+
+    (stage_dir / "a.txt").unlink()
+    run_stage("demo", stage_dir, {}, "up", _writer(stage_dir, calls, "a.txt"))
+    assert len(calls) == 2
+
+    run_stage("demo", stage_dir, {"v": 2}, "up", _writer(stage_dir, calls, "b.txt"))
+    assert sorted(p.name for p in stage_dir.iterdir()) == [MANIFEST_NAME, "b.txt"]
+
+
+def test_interrupted_resumable_stage_keeps_partial_outputs(tmp_path):
+    stage_dir = tmp_path / "stage"
+    calls = []
+
+    def killed():
+        (stage_dir / "partial.txt").write_text("1")
+        raise KeyboardInterrupt
+
+    for resumable, survives in [(False, False), (True, True)]:
+        try:
+            run_stage("demo", stage_dir, {}, "up", killed, use_cache=False)
+        except KeyboardInterrupt:
+            pass
+        assert load_manifest(stage_dir)["outputs"] is None
+        result = run_stage("demo", stage_dir, {}, "up", _writer(stage_dir, calls), resumable=resumable)
+        assert not result["cached"]
+        assert (stage_dir / "partial.txt").exists() == survives
+
+    # A different key never inherits the partial outputs
+    try:
+        run_stage("demo", stage_dir, {}, "up", killed, resumable=True)
+    except KeyboardInterrupt:
+        pass
+    run_stage("demo", stage_dir, {"v": 2}, "up", _writer(stage_dir, calls), resumable=True)
+    assert not (stage_dir / "partial.txt").exists()
+
+
+def test_stage_key_is_order_independent():
+    assert stage_key("s", {"a": 1, "b": 2}, "u") == stage_key("s", {"b": 2, "a": 1}, "u")
+    assert stage_key("s", {"a": 1}, "u") != stage_key("t", {"a": 1}, "u")
+
+
+def test_pipeline_reruns_only_changed_stages(tmp_path, monkeypatch, write_video):
+    video = write_video(tmp_path / "capture.avi", n_frames=36)
+    project = tmp_path / "project"
+
+    def run(*extra):
+        monkeypatch.setattr(sys, "argv", ["pipeline.py", str(video), str(project), "--no-segment",
+                                          "--no-duplicate-filter", "--fps", "6", *extra])
+        pipeline.main()
+        return (load_manifest(project / "raw_frames")["key"],
+                load_manifest(project / "clean_frames")["key"])
+
+    raw_key, clean_key = run()
+    raw_mtime = (project / "raw_frames" / "frame_000000.png").stat().st_mtime_ns
+    clean_manifest = load_manifest(project / "clean_frames")
+
+    # Same inputs: nothing is rewritten
+    assert run() == (raw_key, clean_key)
+    assert load_manifest(project / "clean_frames") == clean_manifest
+
+    # Preprocessing parameter change: extraction reused, preprocessing redone
+    new_raw_key, new_clean_key = run("--crop-padding", "0.2")
+    assert new_raw_key == raw_key and new_clean_key != clean_key
+    assert (project / "raw_frames" / "frame_000000.png").stat().st_mtime_ns == raw_mtime
+
+    # Streaming produces the same clean frames, so it shares the cache entry
+    assert run("--crop-padding", "0.2", "--stream")[1] == new_clean_key
+
+    # Extraction parameter change invalidates both
+    assert run("--fps", "3")[0] != raw_key
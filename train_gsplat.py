@@ -1,116 +1,36 @@
 """
 Gaussian Splatting training using gsplat 1.5.x on COLMAP sparse data.
-Self-contained: includes COLMAP binary parser (no pycolmap needed).
+COLMAP binary models are read with colmap_io (no pycolmap needed).
 Optimized for 4GB VRAM (GTX 1650).
 
 Usage:
     python train_gsplat.py --data novel-shapes/gsplat_data --output novel-shapes/gsplat_output
     python train_gsplat.py --data novel-shapes/gsplat_data --output novel-shapes/gsplat_output --factor 8 --max-steps 3000
+    python train_gsplat.py --data novel-shapes/gsplat_data --output novel-shapes/gsplat_output --resume
 """
 
 import argparse
-import math
 import os
-import struct
 import sys
 import time
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional
 
 import numpy as np
 import torch
-import torch.nn.functional as F
-from PIL import Image
-from torch import Tensor
 
 from gsplat import rasterization
-from gsplat.utils import save_ply
-
-
-# ── COLMAP binary parsers ──────────────────────────────────────────────
-
-
-def read_cameras_binary(path: str) -> Dict:
-    """Parse COLMAP cameras.bin. Returns {cam_id: {model, width, height, params}}."""
-    cameras = {}
-    with open(path, "rb") as f:
-        num_cameras = struct.unpack("<Q", f.read(8))[0]
-        for _ in range(num_cameras):
-            cam_id = struct.unpack("<I", f.read(4))[0]
-            model_id = struct.unpack("<i", f.read(4))[0]
-            width = struct.unpack("<Q", f.read(8))[0]
-            height = struct.unpack("<Q", f.read(8))[0]
-            # Number of params per model type
-            num_params = {0: 3, 1: 4, 2: 4, 3: 5, 4: 4, 5: 5}.get(model_id, 4)
-            params = struct.unpack(f"<{num_params}d", f.read(8 * num_params))
-            cameras[cam_id] = {
-                "model_id": model_id,
-                "width": width,
-                "height": height,
-                "params": np.array(params),
-            }
-    return cameras
-
-
-def read_images_binary(path: str) -> Dict:
-    """Parse COLMAP images.bin. Returns {img_id: {qvec, tvec, cam_id, name}}."""
-    images = {}
-    with open(path, "rb") as f:
-        num_images = struct.unpack("<Q", f.read(8))[0]
-        for _ in range(num_images):
-            img_id = struct.unpack("<I", f.read(4))[0]
-            qvec = np.array(struct.unpack("<4d", f.read(32)))
-            tvec = np.array(struct.unpack("<3d", f.read(24)))
-            cam_id = struct.unpack("<I", f.read(4))[0]
-            name = b""
-            while True:
-                c = f.read(1)
-                if c == b"\x00":
-                    break
-                name += c
-            num_points2D = struct.unpack("<Q", f.read(8))[0]
-            # Skip 2D point data (x, y, point3D_id per point)
-            f.read(num_points2D * 24)
-            images[img_id] = {
-                "qvec": qvec,
-                "tvec": tvec,
-                "camera_id": cam_id,
-                "name": name.decode("utf-8"),
-            }
-    return images
-
-
-def read_points3D_binary(path: str) -> Tuple[np.ndarray, np.ndarray]:
-    """Parse COLMAP points3D.bin. Returns (xyz [N,3], rgb [N,3])."""
-    points = []
-    colors = []
-    with open(path, "rb") as f:
-        num_points = struct.unpack("<Q", f.read(8))[0]
-        for _ in range(num_points):
-            _point3D_id = struct.unpack("<Q", f.read(8))[0]
-            xyz = np.array(struct.unpack("<3d", f.read(24)))
-            rgb = np.array(struct.unpack("<3B", f.read(3)))
-            _error = struct.unpack("<d", f.read(8))[0]
-            track_length = struct.unpack("<Q", f.read(8))[0]
-            f.read(track_length * 8)  # skip track (image_id + point2D_idx pairs)
-            points.append(xyz)
-            colors.append(rgb)
-    return np.array(points, dtype=np.float32), np.array(colors, dtype=np.uint8)
 
-
-# ── Quaternion / pose utilities ────────────────────────────────────────
+from checkpoints import CheckpointWriter, latest_checkpoint, load_checkpoint, restore_training_state, training_state
+from colmap_io import qvec2rotmat, read_cameras_binary, read_images_binary, read_points3D_binary
+from image_store import ImageStore, sample_order
+from losses import photometric_loss
+from point_sampling import SUBSAMPLE_METHODS, subsample_points
+from train_engine import MEMORY_POLICIES, MemoryPolicy, make_optimizer, make_scheduler, train_step
 
 
-def qvec2rotmat(qvec: np.ndarray) -> np.ndarray:
-    """COLMAP quaternion (w,x,y,z) to 3x3 rotation matrix."""
-    w, x, y, z = qvec
-    return np.array(
-        [
-            [1 - 2 * y * y - 2 * z * z, 2 * x * y - 2 * w * z, 2 * x * z + 2 * w * y],
-            [2 * x * y + 2 * w * z, 1 - 2 * x * x - 2 * z * z, 2 * y * z - 2 * w * x],
-            [2 * x * z - 2 * w * y, 2 * y * z + 2 * w * x, 1 - 2 * x * x - 2 * y * y],
-        ]
-    )
+# ── Quaternion / pose utilities ────────────────────────────────────────
 
 
 def colmap_to_viewmat(qvec: np.ndarray, tvec: np.ndarray) -> np.ndarray:
@@ -138,6 +58,9 @@ def get_intrinsics(cam: Dict, factor: int) -> np.ndarray:
     elif model_id == 3:  # RADIAL: f, cx, cy, k1, k2
         fx = fy = params[0]
         cx, cy = params[1], params[2]
+    elif model_id in (4, 5, 6):  # OPENCV, OPENCV_FISHEYE, FULL_OPENCV: fx, fy, cx, cy, ...
+        fx, fy = params[0], params[1]
+        cx, cy = params[2], params[3]
     else:
         fx = fy = params[0]
         cx, cy = params[1], params[2]
@@ -149,10 +72,25 @@ def get_intrinsics(cam: Dict, factor: int) -> np.ndarray:
 # ── Scene loading ──────────────────────────────────────────────────────
 
 
-def load_scene(data_dir: str, factor: int = 4, test_every: int = 8):
-    """Load COLMAP scene. Returns training data dict."""
+def load_scene(
+    data_dir: str,
+    factor: int = 4,
+    test_every: int = 8,
+    cache_dir: Optional[str] = None,
+    load_workers: int = 1,
+):
+    """
+    Load COLMAP scene. Returns training data dict.
+
+    Images are not decoded into RAM: train_images / val_images are ImageStores
+    over a uint8 memory-mapped cache in `cache_dir` (default: <data_dir>/image_cache),
+    built with `load_workers` decode threads when cold. The train/val split is
+    fixed by name order and `test_every` before any image is decoded.
+    """
     sparse_dir = os.path.join(data_dir, "sparse", "0")
     images_dir = os.path.join(data_dir, "images")
+    if cache_dir is None:
+        cache_dir = os.path.join(data_dir, "image_cache")
 
     cameras = read_cameras_binary(os.path.join(sparse_dir, "cameras.bin"))
     images = read_images_binary(os.path.join(sparse_dir, "images.bin"))
@@ -170,11 +108,11 @@ def load_scene(data_dir: str, factor: int = 4, test_every: int = 8):
     # Build per-image data
     train_viewmats = []
     train_Ks = []
-    train_images_list = []
+    train_paths = []
     train_sizes = []
     val_viewmats = []
     val_Ks = []
-    val_images_list = []
+    val_paths = []
     val_sizes = []
 
     sorted_images = sorted(images.items(), key=lambda x: x[1]["name"])
@@ -192,25 +130,27 @@ def load_scene(data_dir: str, factor: int = 4, test_every: int = 8):
         W = cam["width"] // factor
         H = cam["height"] // factor
 
-        # Load and resize image
+        # Images are decoded and resized by the ImageStore below
         img_path = os.path.join(images_dir, img_data["name"])
         if not os.path.exists(img_path):
             continue
-        img = Image.open(img_path).convert("RGB").resize((W, H), Image.LANCZOS)
-        img_tensor = torch.from_numpy(np.array(img)).float() / 255.0  # (H, W, 3)
 
         if idx % test_every == 0:
             val_viewmats.append(w2c)
             val_Ks.append(K)
-            val_images_list.append(img_tensor)
+            val_paths.append(img_path)
             val_sizes.append((H, W))
         else:
             train_viewmats.append(w2c)
             train_Ks.append(K)
-            train_images_list.append(img_tensor)
+            train_paths.append(img_path)
             train_sizes.append((H, W))
 
     print(f"Train: {len(train_viewmats)} images, Val: {len(val_viewmats)} images")
+    train_store = ImageStore(train_paths, train_sizes, cache_dir, workers=load_workers)
+    val_store = ImageStore(val_paths, val_sizes, cache_dir, workers=load_workers)
+    if train_store.cache_hit and val_store.cache_hit:
+        print(f"Image cache hit: {cache_dir}")
     print(f"Image size (after {factor}x downsample): {train_sizes[0][1]}x{train_sizes[0][0]}")
 
     return {
@@ -218,11 +158,11 @@ def load_scene(data_dir: str, factor: int = 4, test_every: int = 8):
         "point_colors": point_colors,
         "train_viewmats": np.array(train_viewmats, dtype=np.float32),
         "train_Ks": np.array(train_Ks, dtype=np.float32),
-        "train_images": train_images_list,
+        "train_images": train_store,
         "train_sizes": train_sizes,
         "val_viewmats": np.array(val_viewmats, dtype=np.float32),
         "val_Ks": np.array(val_Ks, dtype=np.float32),
-        "val_images": val_images_list,
+        "val_images": val_store,
         "val_sizes": val_sizes,
     }
 
@@ -270,43 +210,6 @@ def init_gaussians(points: np.ndarray, colors: np.ndarray, device: str = "cuda")
     return splats
 
 
-# ── SSIM ───────────────────────────────────────────────────────────────
-
-
-def ssim(img1: Tensor, img2: Tensor, window_size: int = 11) -> Tensor:
-    """Compute SSIM between two images (H, W, 3). Returns scalar."""
-    # Reshape to (1, 3, H, W) for conv2d
-    x = img1.permute(2, 0, 1).unsqueeze(0)
-    y = img2.permute(2, 0, 1).unsqueeze(0)
-    C = x.shape[1]
-
-    # Gaussian window
-    sigma = 1.5
-    coords = torch.arange(window_size, dtype=x.dtype, device=x.device) - window_size // 2
-    g = torch.exp(-(coords**2) / (2 * sigma**2))
-    g = g / g.sum()
-    window = g.unsqueeze(1) * g.unsqueeze(0)
-    window = window.unsqueeze(0).unsqueeze(0).expand(C, 1, -1, -1)
-
-    pad = window_size // 2
-    mu_x = F.conv2d(x, window, padding=pad, groups=C)
-    mu_y = F.conv2d(y, window, padding=pad, groups=C)
-
-    mu_x2 = mu_x * mu_x
-    mu_y2 = mu_y * mu_y
-    mu_xy = mu_x * mu_y
-
-    sigma_x2 = F.conv2d(x * x, window, padding=pad, groups=C) - mu_x2
-    sigma_y2 = F.conv2d(y * y, window, padding=pad, groups=C) - mu_y2
-    sigma_xy = F.conv2d(x * y, window, padding=pad, groups=C) - mu_xy
-
-    C1 = 0.01**2
-    C2 = 0.03**2
-
-    ssim_map = ((2 * mu_xy + C1) * (2 * sigma_xy + C2)) / ((mu_x2 + mu_y2 + C1) * (sigma_x2 + sigma_y2 + C2))
-    return ssim_map.mean()
-
-
 # ── Training ───────────────────────────────────────────────────────────
 
 
@@ -318,35 +221,57 @@ def train(args):
     print(f"GPU: {torch.cuda.get_device_name(0)} ({vram_gb:.1f} GB VRAM)")
 
     # Load scene
-    scene = load_scene(args.data, factor=args.factor, test_every=args.test_every)
-
-    # Subsample points if too many (4GB VRAM constraint)
-    max_init_points = args.max_points
-    points = scene["points3D"]
-    colors = scene["point_colors"]
-    if len(points) > max_init_points:
-        idx = np.random.choice(len(points), max_init_points, replace=False)
-        points = points[idx]
-        colors = colors[idx]
-        print(f"Subsampled {len(scene['points3D'])} -> {max_init_points} points")
-
-    # Initialize Gaussians
-    splats = init_gaussians(points, colors, device)
-    num_points = len(points)
-    print(f"Initialized {num_points} Gaussians")
-
-    # Optimizers — SparseAdam for means (sparse_grad=True)
-    optimizers = {
-        "means": torch.optim.Adam([splats["means"]], lr=1.6e-4),
-        "scales": torch.optim.Adam([splats["scales"]], lr=5e-3),
-        "quats": torch.optim.Adam([splats["quats"]], lr=1e-3),
-        "opacities": torch.optim.Adam([splats["opacities"]], lr=5e-2),
-        "sh0": torch.optim.Adam([splats["sh0"]], lr=2.5e-3),
-    }
+    scene = load_scene(
+        args.data,
+        factor=args.factor,
+        test_every=args.test_every,
+        cache_dir=args.cache_dir,
+        load_workers=args.load_workers,
+    )
 
-    # LR scheduler for means (decay to 1% by end)
-    lr_lambda = lambda step: max(0.01, math.exp(-step * math.log(100) / args.max_steps))
-    schedulers = {"means": torch.optim.lr_scheduler.LambdaLR(optimizers["means"], lr_lambda)}
+    # Resume: splats and training state come from the checkpoint instead of the point cloud
+    ckpt = None
+    if args.resume:
+        ckpt_path = latest_checkpoint(args.output) if args.resume == "latest" else Path(args.resume)
+        if ckpt_path is None:
+            raise FileNotFoundError(f"No checkpoint_<step>.pt to resume from in {args.output}")
+        ckpt = load_checkpoint(ckpt_path)
+        if ckpt.get("max_steps", args.max_steps) != args.max_steps:
+            raise ValueError(f"{ckpt_path} was trained for --max-steps {ckpt['max_steps']}, not {args.max_steps}")
+        print(f"Resuming from {ckpt_path}")
+
+    if ckpt is not None:
+        splats = {name: torch.nn.Parameter(t.to(device)) for name, t in ckpt["splats"].items()}
+        num_points = len(splats["means"])
+        print(f"Restored {num_points} Gaussians")
+    else:
+        # Subsample points if too many (4GB VRAM constraint)
+        max_init_points = args.max_points
+        points = scene["points3D"]
+        colors = scene["point_colors"]
+        if len(points) > max_init_points:
+            # Spread the budget over the object before init_gaussians builds its KDTree
+            idx = subsample_points(points, max_init_points, args.subsample)
+            points = points[idx]
+            colors = colors[idx]
+            print(f"Subsampled {len(scene['points3D'])} -> {len(points)} points ({args.subsample})")
+
+        # Initialize Gaussians
+        splats = init_gaussians(points, colors, device)
+        num_points = len(points)
+        print(f"Initialized {num_points} Gaussians")
+
+    # One fused Adam over all attributes; means LR decays to 1% by the end
+    optimizer = make_optimizer(splats)
+    optimizers = {"adam": optimizer}
+    schedulers = {"adam": make_scheduler(optimizer, args.max_steps)}
+
+    start_step = 0
+    seed = args.seed
+    if ckpt is not None:
+        # Adam moments, LR schedule position and RNG states; the same seed redraws the same image order
+        start_step = restore_training_state(ckpt, optimizers, schedulers)
+        seed = ckpt["seed"]
 
     # Training data on GPU
     train_viewmats = torch.from_numpy(scene["train_viewmats"]).to(device)
@@ -354,18 +279,43 @@ def train(args):
     num_train = len(scene["train_images"])
 
     os.makedirs(args.output, exist_ok=True)
+    # PLY + .pt written off the training thread; only the last --keep-checkpoints stay on disk
+    checkpoints = CheckpointWriter(args.output, keep_last=args.keep_checkpoints)
 
     # Adaptive density control state
     grad_accum = torch.zeros(num_points, device=device)
     grad_count = torch.zeros(num_points, device=device, dtype=torch.int32)
 
-    print(f"\nStarting training for {args.max_steps} steps...")
+    rasterize = partial(
+        rasterization,
+        near_plane=0.01,
+        far_plane=1e10,
+        packed=True,
+        sparse_grad=False,
+        render_mode="RGB",
+        rasterize_mode="classic",
+    )
+    # L1 + D-SSIM; on a 4GB card, --ssim-tile-rows bounds SSIM's extra VRAM
+    loss_fn = partial(
+        photometric_loss,
+        ssim_lambda=args.ssim_lambda,
+        tile_rows=args.ssim_tile_rows,
+        downscale=args.ssim_downscale,
+    )
+    # Cached allocator blocks are kept for the next step unless the policy says otherwise
+    memory = MemoryPolicy(args.memory_policy, every=args.empty_cache_every, threshold=args.empty_cache_above, device=device)
+
+    # Training image per step, drawn up front so the store can read ahead
+    order = sample_order(num_train, args.max_steps, seed=seed)
+    train_frames = scene["train_images"].prefetch(order[start_step:])
+
+    print(f"\nStarting training for {args.max_steps} steps (from step {start_step})...")
     start_time = time.time()
 
-    for step in range(args.max_steps):
-        # Random training image
-        idx = torch.randint(0, num_train, (1,)).item()
-        gt_image = scene["train_images"][idx].to(device)
+    for step in range(start_step, args.max_steps):
+        idx, frame = next(train_frames)
+        # uint8 over the bus, float on the GPU
+        gt_image = torch.from_numpy(frame).to(device, non_blocking=True).float() / 255.0
         H, W = scene["train_sizes"][idx]
         viewmat = train_viewmats[idx : idx + 1]
         K = train_Ks[idx : idx + 1]
@@ -376,45 +326,11 @@ def train(args):
         else:
             sh_degree = 0  # Keep at 0 to save VRAM on 4GB card
 
-        # Forward pass — clamp scales to prevent OOM from huge projections
-        clamped_scales = torch.exp(torch.clamp(splats["scales"], max=-4.0))  # max exp(-4)=0.018
-        renders, alphas, info = rasterization(
-            means=splats["means"],
-            quats=F.normalize(splats["quats"], dim=-1),
-            scales=clamped_scales,
-            opacities=torch.sigmoid(splats["opacities"]),
-            colors=splats["sh0"],
-            viewmats=viewmat,
-            Ks=K,
-            width=W,
-            height=H,
-            sh_degree=sh_degree,
-            near_plane=0.01,
-            far_plane=1e10,
-            packed=True,
-            sparse_grad=False,
-            render_mode="RGB",
-            rasterize_mode="classic",
+        loss = train_step(
+            splats, optimizer, schedulers["adam"], rasterize, loss_fn, gt_image, viewmat, K, W, H, sh_degree
         )
-
-        rendered = renders[0]  # (H, W, 3)
-
-        # Simple L1 loss only (skip SSIM to save VRAM on 4GB card)
-        loss = F.l1_loss(rendered, gt_image)
-
-        # Backward
-        for opt in optimizers.values():
-            opt.zero_grad()
-        loss.backward()
-
-        # Free computation graph BEFORE optimizer step
-        del renders, alphas, info, rendered, gt_image
-        torch.cuda.empty_cache()
-
-        for opt in optimizers.values():
-            opt.step()
-        for sched in schedulers.values():
-            sched.step()
+        del gt_image
+        memory.after_step(step)
 
         # Logging
         if step % 100 == 0:
@@ -431,47 +347,19 @@ def train(args):
 
         # Save checkpoint
         if step > 0 and step % args.save_every == 0:
-            save_checkpoint(splats, args.output, step)
+            state = training_state(optimizers, schedulers, step + 1, seed=seed, max_steps=args.max_steps)
+            checkpoints.save(splats, step, state)
 
         del loss
 
     # Final save
-    save_checkpoint(splats, args.output, args.max_steps)
+    state = training_state(optimizers, schedulers, args.max_steps, seed=seed, max_steps=args.max_steps)
+    checkpoints.save(splats, args.max_steps, state)
+    checkpoints.close()
     print(f"\nTraining complete in {time.time() - start_time:.0f}s")
     print(f"Output saved to {args.output}")
 
 
-def save_checkpoint(splats: Dict, output_dir: str, step: int):
-    """Save Gaussians as PLY and PyTorch checkpoint."""
-    means = splats["means"].detach().cpu().numpy()
-    quats = F.normalize(splats["quats"].detach(), dim=-1).cpu().numpy()
-    scales = torch.exp(splats["scales"].detach()).cpu().numpy()
-    opacities = torch.sigmoid(splats["opacities"].detach()).cpu().numpy()
-
-    # Convert SH0 back to RGB for PLY
-    C0 = 0.28209479177387814
-    sh0 = splats["sh0"].detach().cpu().numpy().reshape(-1, 3)
-    colors = np.clip(sh0 * C0 + 0.5, 0, 1)
-
-    ply_path = os.path.join(output_dir, f"splat_{step}.ply")
-
-    # Use gsplat's save_ply
-    save_ply(
-        means=torch.from_numpy(means),
-        scales=torch.from_numpy(scales),
-        quats=torch.from_numpy(quats),
-        opacities=torch.from_numpy(opacities.reshape(-1)),
-        sh0=splats["sh0"].detach().cpu().reshape(-1, 1, 3),
-        path=ply_path,
-    )
-    print(f"  Saved PLY: {ply_path}")
-
-    # Also save torch checkpoint for resuming
-    ckpt_path = os.path.join(output_dir, f"checkpoint_{step}.pt")
-    torch.save({k: v.detach().cpu() for k, v in splats.items()}, ckpt_path)
-    print(f"  Saved checkpoint: {ckpt_path}")
-
-
 # ── Entry point ────────────────────────────────────────────────────────
 
 if __name__ == "__main__":
@@ -482,6 +370,21 @@ if __name__ == "__main__":
     parser.add_argument("--max-steps", type=int, default=7000, help="Training steps (default: 7000)")
     parser.add_argument("--test-every", type=int, default=8, help="Hold out every Nth image for val (default: 8)")
     parser.add_argument("--save-every", type=int, default=1000, help="Save checkpoint every N steps (default: 1000)")
+    parser.add_argument("--keep-checkpoints", type=int, default=3, help="Keep only the N most recent checkpoints, 0 keeps all (default: 3)")
+    parser.add_argument("--resume", type=str, nargs="?", const="latest", default=None,
+                        help="Continue from a checkpoint_<step>.pt (default with no path: the latest in --output)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the training image order (default: 0)")
     parser.add_argument("--max-points", type=int, default=5000, help="Max initial Gaussians (subsample if more, default: 5000)")
+    parser.add_argument("--subsample", type=str, default="voxel", choices=SUBSAMPLE_METHODS,
+                        help="How to pick --max-points initial points: voxel grid, farthest-point, or random (default: voxel)")
+    parser.add_argument("--ssim-lambda", type=float, default=0.2, help="D-SSIM weight in the loss, 0 for L1 only (default: 0.2)")
+    parser.add_argument("--ssim-tile-rows", type=int, default=0, help="Compute SSIM in bands of N rows to save VRAM (default: 0, whole image)")
+    parser.add_argument("--ssim-downscale", type=int, default=1, help="Average-pool by N before SSIM, approximate (default: 1)")
+    parser.add_argument("--memory-policy", type=str, default="none", choices=MEMORY_POLICIES,
+                        help="When to release cached VRAM: never, every --empty-cache-every steps, or above --empty-cache-above (default: none)")
+    parser.add_argument("--empty-cache-every", type=int, default=1000, help="Steps between releases for --memory-policy interval (default: 1000)")
+    parser.add_argument("--empty-cache-above", type=float, default=0.9, help="Reserved VRAM fraction for --memory-policy pressure (default: 0.9)")
+    parser.add_argument("--cache-dir", type=str, default=None, help="Resized image cache (default: <data>/image_cache)")
+    parser.add_argument("--load-workers", type=int, default=os.cpu_count() or 1, help="Image decode threads for a cold cache (default: all cores)")
     args = parser.parse_args()
     train(args)